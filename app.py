@@ -1,15 +1,22 @@
 import streamlit as st
 import pandas as pd
+import asyncio
 import json
 import logging
 import os
+import threading
 import time
-import re
 import altair as alt
 from logic.ingestion import ResumeParser, WebScraper
 from logic.analyzer import ProspectAnalyzer
-from logic.generator import MessageGenerator
+from logic.pipeline import ProspectPipeline
+from logic.pre_extractor import EXAMPLE_MARKERS, reconcile_fields
+from logic.generator import MessageGenerator, CHANNELS, VARIANT_ANGLES
 from logic.knowledge_base import KnowledgeBase
+from logic.llm_client import KaggleClient
+from logic.analysis_cache import AnalysisCache
+from logic.llm_cache import ResponseCache
+from logic.prompts import prompt_version
 
 # Page Config
 st.set_page_config(
@@ -46,28 +53,130 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_response_cache():
+    """Process-wide LLM response cache (memory LRU + SQLite file)."""
+    return ResponseCache(path="llm_cache.db")
+
+@st.cache_resource
+def get_analysis_cache():
+    """Process-wide cache of analyzed profiles (SQLite file), reset when the analyzer prompt changes."""
+    return AnalysisCache(prompt_version("analyzer"), path="analysis_cache.db")
+
+@st.cache_resource
+def get_knowledge_base():
+    """Process-wide knowledge base (SQLite; imports knowledge_base.json on first run)."""
+    return KnowledgeBase()
+
+@st.cache_resource
+def _llm_clients():
+    """Holder for the live client, so a connection change can close the one it replaces."""
+    return {"config": None, "client": None, "lock": threading.Lock()}
+
+def get_llm_client(base_url, pool_maxsize, keep_alive, max_concurrency, use_cache, streaming, routing, hedge):
+    """
+    One pooled client for the current connection settings, shared across
+    Streamlit reruns. Changing them closes the previous client (its
+    connections, health thread and workers); the other options are applied
+    to the live client without rebuilding it.
+    """
+    holder = _llm_clients()
+    config = (base_url, pool_maxsize, keep_alive, max_concurrency)
+    with holder["lock"]:
+        client = holder["client"]
+        if client is None or holder["config"] != config:
+            if client is not None:
+                client.close()
+            client = KaggleClient(base_url=base_url, pool_maxsize=pool_maxsize, keep_alive=keep_alive,
+                                  max_concurrency=max_concurrency, health_check_interval=30)
+            holder["config"], holder["client"] = config, client
+        client.cache = get_response_cache() if use_cache else None
+        client.streaming = streaming
+        client.pool.strategy = routing
+        client.hedge = hedge
+    return client
+
 # Sidebar
 with st.sidebar:
     st.header("⚙️ Configuration")
-    llm_url = st.text_input("Kaggle Endpoint URL", value="https://ununited-laudable-anya.ngrok-free.dev")
+    llm_url = st.text_area("Kaggle Endpoint URL(s)", value="https://ununited-laudable-anya.ngrok-free.dev",
+                           help="One endpoint per line; requests are load-balanced across all of them")
+    
+    with st.expander("🔌 Connection Pool"):
+        pool_maxsize = st.number_input("Max connections per host", min_value=1, max_value=64, value=10)
+        keep_alive = st.checkbox("Keep-alive", value=True)
+        max_concurrency = st.number_input("Max concurrent LLM requests", min_value=1, max_value=32, value=4)
+        routing = st.selectbox("Routing", ["least_outstanding", "latency"],
+                               help="least_outstanding: fewest in-flight requests; latency: fastest recent responses")
+    
+    use_cache = st.checkbox("Cache LLM responses", value=False,
+                            help="Reuse answers for identical prompts (speeds up re-running a batch)")
+    use_analysis_cache = st.checkbox("Reuse earlier profile analyses", value=True,
+                                     help="Skip the extraction call for a profile already analyzed; only messages are regenerated")
+    streaming = st.checkbox("Stream tokens (stop at complete JSON)", value=False,
+                            help="Needs a /generate_stream endpoint; falls back to /generate otherwise")
+    hedge = st.checkbox("Hedge slow requests", value=False,
+                        help="Re-send a request that runs past the p95 latency (max ~10% extra load)")
+    pipeline_mode = st.selectbox("Pipeline mode", ["two_step", "fused"],
+                                 format_func=lambda m: {"two_step": "Analyze, then generate (2 calls)",
+                                                        "fused": "Fused analyze + generate (1 call)"}[m],
+                                 help="Fused mode extracts the profile and writes all messages in one LLM call")
+    parallel_channels = st.checkbox("Generate channels in parallel", value=False,
+                                    help="One smaller LLM call per channel; the email shows as soon as it is ready")
+    map_reduce = st.checkbox("Split long profiles into parallel chunks", value=False,
+                             help="Analyze LinkedIn + resume + notes beyond the prompt budget in parallel and merge the results")
+    rules_first = st.checkbox("Skip analysis for clear-cut profiles", value=False,
+                              help="When name, company and role are found reliably by local rules, skip the LLM extraction call; "
+                                   "when they are likely right, send a shorter analysis prompt that already contains them")
+    llm_client = get_llm_client(llm_url, int(pool_maxsize), keep_alive, int(max_concurrency), use_cache,
+                                streaming, routing, hedge)
     
     if st.button("Test Connection"):
         try:
-            from logic.llm_client import KaggleClient
-            client = KaggleClient(base_url=llm_url)
+            client = llm_client
+            for endpoint, health in client.health_check().items():
+                if health == "ok":
+                    st.success(f"Reachable: {endpoint}")
+                elif health.startswith("unknown"):
+                    st.warning(f"No health route: {endpoint} ({health})")
+                else:
+                    st.error(f"Unreachable: {endpoint} ({health})")
             st.info("Sending test request...")
-            res = client.generate("Test connection", max_new_tokens=5)
+            res = client.generate("Test connection", max_new_tokens=5, use_cache=False)
             if "Error" not in res:
                 st.success(f"Connected! Response: {res}")
             else:
                 st.error(f"Connection failed: {res}")
         except Exception as e:
             st.error(f"Connection failed: {e}")
+    
+    conn_stats = llm_client.connection_stats()
+    st.caption(f"Connections: {conn_stats['new_connections']} new / {conn_stats['reused_connections']} reused")
+    flight_stats = llm_client.inflight_stats()
+    if flight_stats["collapsed"]:
+        st.caption(f"Duplicate calls collapsed: {flight_stats['collapsed']}")
+    if len(llm_client.pool.backends) > 1:
+        with st.expander("📡 Endpoint Status"):
+            st.dataframe(pd.DataFrame(llm_client.backend_stats()), hide_index=True)
+    if llm_client.cache is not None:
+        cache_stats = llm_client.cache.stats()
+        st.caption(f"Cache: {cache_stats['hit_rate']:.0%} hit rate, {cache_stats['disk_entries']} stored")
+        if st.button("Clear LLM Cache"):
+            llm_client.cache.clear()
+    if use_analysis_cache:
+        analysis_stats = get_analysis_cache().stats()
+        st.caption(f"Analyses: {analysis_stats['hits']} reused, {analysis_stats['entries']} stored")
+        if st.button("Clear Analysis Cache"):
+            get_analysis_cache().clear()
 
 # Initialize Logic
-analyzer = ProspectAnalyzer(llm_url=llm_url)
-generator = MessageGenerator(llm_url=llm_url)
-kb = KnowledgeBase()
+analyzer = ProspectAnalyzer(llm_url=llm_url, client=llm_client, map_reduce=map_reduce,
+                            cache=get_analysis_cache() if use_analysis_cache else None,
+                            skip_llm_confidence=0.7 if rules_first else None,
+                            reduce_prompt_confidence=0.6 if rules_first else None)
+generator = MessageGenerator(llm_url=llm_url, client=llm_client)
+kb = get_knowledge_base()
+pipeline = ProspectPipeline(analyzer, generator, kb, mode=pipeline_mode, parallel_channels=parallel_channels)
 
 # Main Content
 st.title("🚀 Autonomous Outreach Assistant")
@@ -164,7 +273,7 @@ with tab1:
             # Reset previous results to avoid stale data
             st.session_state.analysis_result = None
             st.session_state.generated_messages = None
-            st.session_state.generated_messages_b = None
+            st.session_state.variants = None
             
             # Collect data from all sources
             combined_text = ""
@@ -223,9 +332,15 @@ with tab1:
                 # Store data sources in session state
                 st.session_state.data_sources_used = data_sources_used
                 
-                with st.spinner("🧠 Analyzing & combining data from all sources..."):
-                    analysis = analyzer.analyze_profile(combined_text)
-                    st.session_state.analysis_result = analysis
+                fused = None
+                if pipeline_mode == "fused":
+                    with st.spinner("🧠 Analyzing & writing messages in one pass..."):
+                        fused = pipeline.run(combined_text, my_offering)
+                        analysis = fused["analysis"]
+                else:
+                    with st.spinner("🧠 Analyzing & combining data from all sources..."):
+                        analysis = analyzer.analyze_profile(combined_text)
+                st.session_state.analysis_result = analysis
                 
                 # DEBUG: Show what we actually scraped to build trust
                 expander_text = "🕵️‍♂️ View Combined Data (What the AI analyzed)" if len(data_sources_used) > 1 else "🕵️‍♂️ View Source Data"
@@ -235,7 +350,10 @@ with tab1:
                     if len(data_sources_used) > 1:
                         st.caption("👆 This shows all data merged together before AI analysis")
                 
-                if "error" not in analysis:
+                if "error" not in analysis and fused is not None and fused["messages"]:
+                    st.session_state.similar_prospects = fused["similar_prospects"]
+                    st.session_state.generated_messages = fused["messages"]
+                elif "error" not in analysis:
                     # Check for similar prospects in KB
                     company = analysis.get("company")
                     industry = analysis.get("industry")
@@ -251,17 +369,33 @@ with tab1:
                     st.session_state.similar_prospects = similar_prospects
                     
                     with st.spinner(f"Generating Multi-Channel Campaigns (Found {len(similar_prospects)} similar profiles)..."):
-                        messages = generator.generate_campaign(analysis, my_offering, context_prospects=similar_prospects)
-                        
-                        # Retry logic if generation fails (empty messages)
-                        has_email = messages and messages.get("email", {}).get("body", "")
-                        has_linkedin = messages and messages.get("linkedin", "")
-                        
-                        if not has_email and not has_linkedin:
-                            st.warning("First attempt empty, retrying generation...")
-                            time.sleep(2)
+                        if parallel_channels:
+                            channel_status = st.empty()
+                            email_preview = st.empty()
+                            
+                            def show_channel(channel, message, seconds):
+                                channel_status.caption(f"✅ {channel.title()} ready after {seconds:.1f}s")
+                                if channel == "email":
+                                    email_preview.text_area("Email draft (other channels still generating...)",
+                                                            value=message.get("body", ""), height=200, disabled=True)
+                            
+                            result = generator.generate_channels(analysis, my_offering, context_prospects=similar_prospects,
+                                                                 on_channel=show_channel)
+                            messages = result["messages"]
+                            email_preview.empty()
+                            if "first_channel" in result["timings"]:
+                                channel_status.caption(f"First channel after {result['timings']['first_channel']:.1f}s, "
+                                                       f"all after {result['timings']['total']:.1f}s")
+                        else:
                             messages = generator.generate_campaign(analysis, my_offering, context_prospects=similar_prospects)
                         
+                        # Retry only the channels that came back empty
+                        failed = generator.failed_channels(messages)
+                        if failed and llm_client.is_available():
+                            st.warning(f"Empty {', '.join(failed)}, regenerating just those...")
+                            messages = generator.regenerate_channels(analysis, my_offering, messages, failed,
+                                                                     context_prospects=similar_prospects)["messages"]
+                        
                         st.session_state.generated_messages = messages
                 else:
                     st.error(f"Analysis Error: {analysis.get('error')}")
@@ -293,107 +427,115 @@ with tab1:
         with col2:
             st.subheader("✨ Generated Messages")
             
-            # A/B Test Button
-            if st.button("🔄 Generate A/B Variant"):
-                 with st.spinner("Creating Variant B..."):
-                    variant_msgs = generator.generate_campaign(
-                        st.session_state.analysis_result, 
-                        my_offering,
-                        context_prospects=st.session_state.get('similar_prospects'),
-                        variant_mode=True
-                    )
-                    st.session_state.generated_messages_b = variant_msgs
+            # A/B Test: more variants in one batched call that shares the prompt prefix
+            variant_count = st.number_input("Variants", min_value=2, max_value=len(VARIANT_ANGLES), value=2,
+                                            help="Variant A is the campaign above; the rest are generated together")
+            if st.button("🔄 Generate A/B Variants"):
+                labels = list(VARIANT_ANGLES)[1:int(variant_count)]
+                with st.spinner(f"Creating Variants {', '.join(labels)}..."):
+                    st.session_state.variants = [{"variant": "A", "messages": st.session_state.generated_messages}] + \
+                        generator.generate_variants(
+                            st.session_state.analysis_result,
+                            my_offering,
+                            context_prospects=st.session_state.get('similar_prospects'),
+                            variants=labels
+                        )
             
-            # Show Messages (Tabs for A / B if exists)
-            display_msgs = st.session_state.generated_messages
-            if st.session_state.get('generated_messages_b'):
-                st.warning("Displaying VARIANT B")
-                display_msgs = st.session_state.generated_messages_b
-                
-            if display_msgs:
-                # Check for error in generation
-                if "error" in display_msgs:
-                    st.error(f"Generation Error: {display_msgs['error']}")
-                else:
-                    # Generate a unique suffix for keys based on the analysis ID or timestamp
-                    # We can use the prospect's name hash or a random token stored in session state
-                    if "gen_id" not in st.session_state:
-                         import uuid
-                         st.session_state.gen_id = str(uuid.uuid4())
+            def render_campaign(display_msgs, key_prefix=""):
+                """Render one campaign's channel tabs; key_prefix keeps widget keys unique per variant."""
+                if display_msgs:
+                    # Check for error in generation
+                    if "error" in display_msgs:
+                        st.error(f"Generation Error: {display_msgs['error']}")
+                    else:
+                        # Generate a unique suffix for keys based on the analysis ID or timestamp
+                        # We can use the prospect's name hash or a random token stored in session state
+                        if "gen_id" not in st.session_state:
+                             import uuid
+                             st.session_state.gen_id = str(uuid.uuid4())
                     
-                    # Update gen_id if we just generated new content (we can check if this is a fresh run)
-                    # Actually, we set session_state.generated_messages in the logic block.
-                    # We should also set a new gen_id there. 
-                    # For now, let's just use a hash of the body content as part of the key to force update.
+                        # Update gen_id if we just generated new content (we can check if this is a fresh run)
+                        # Actually, we set session_state.generated_messages in the logic block.
+                        # We should also set a new gen_id there. 
+                        # For now, let's just use a hash of the body content as part of the key to force update.
                     
-                    c_email, c_li, c_wa, c_sms, c_insta = st.tabs(["Email", "LinkedIn", "WhatsApp", "SMS", "Instagram"])
+                        c_email, c_li, c_wa, c_sms, c_insta = st.tabs(["Email", "LinkedIn", "WhatsApp", "SMS", "Instagram"])
                     
-                    with c_email:
-                        email_data = display_msgs.get("email", {})
-                        if isinstance(email_data, dict):
-                            s_key = f"subj_{hash(email_data.get('subject', ''))}"
-                            b_key = f"body_{hash(email_data.get('body', ''))}"
+                        with c_email:
+                            email_data = display_msgs.get("email", {})
+                            if isinstance(email_data, dict):
+                                s_key = f"{key_prefix}subj_{hash(email_data.get('subject', ''))}"
+                                b_key = f"{key_prefix}body_{hash(email_data.get('body', ''))}"
                             
-                            subj = st.text_input("Subject", value=email_data.get("subject", ""), key=s_key)
-                            body = st.text_area("Body", value=email_data.get("body", ""), height=300, key=b_key)
+                                subj = st.text_input("Subject", value=email_data.get("subject", ""), key=s_key)
+                                body = st.text_area("Body", value=email_data.get("body", ""), height=300, key=b_key)
                             
-                            # Email Action
-                            recipient_email = st.text_input("Recipient Email (Paste here)", key=f"rec_email_{s_key}")
-                            if recipient_email and st.button("🚀 Send Email (Mailto)", key=f"btn_email_{s_key}"):
-                                # Create Mailto Link
-                                import urllib.parse
-                                subject_enc = urllib.parse.quote(subj)
-                                body_enc = urllib.parse.quote(body)
-                                mailto_link = f"mailto:{recipient_email}?subject={subject_enc}&body={body_enc}"
-                                st.markdown(f'<meta http-equiv="refresh" content="0;url={mailto_link}">', unsafe_allow_html=True)
-                                st.success("Opened default mail client!")
-                        else:
-                            st.info(str(email_data))
+                                # Email Action
+                                recipient_email = st.text_input("Recipient Email (Paste here)", key=f"rec_email_{s_key}")
+                                if recipient_email and st.button("🚀 Send Email (Mailto)", key=f"btn_email_{s_key}"):
+                                    # Create Mailto Link
+                                    import urllib.parse
+                                    subject_enc = urllib.parse.quote(subj)
+                                    body_enc = urllib.parse.quote(body)
+                                    mailto_link = f"mailto:{recipient_email}?subject={subject_enc}&body={body_enc}"
+                                    st.markdown(f'<meta http-equiv="refresh" content="0;url={mailto_link}">', unsafe_allow_html=True)
+                                    st.success("Opened default mail client!")
+                            else:
+                                st.info(str(email_data))
                             
-                    with c_li:
-                        li_msg = display_msgs.get("linkedin", "")
-                        final_li = st.text_area("Message", value=li_msg, height=200, key=f"li_{hash(li_msg)}")
+                        with c_li:
+                            li_msg = display_msgs.get("linkedin", "")
+                            final_li = st.text_area("Message", value=li_msg, height=200, key=f"{key_prefix}li_{hash(li_msg)}")
                         
-                        # LinkedIn Action
-                        if st.button("🤖 Draft on LinkedIn (Auto-Type)", key=f"btn_li_{hash(li_msg)}"):
-                            with st.spinner("Opening browser & typing..."):
-                                # Use current scraping URL if valid
-                                if "linkedin.com/in/" in url:
-                                    scraper = WebScraper()
-                                    res = scraper.draft_linkedin_message(url, final_li)
-                                    st.success(res)
-                                else:
-                                    st.error("Invalid Profile URL for automation.")
+                            # LinkedIn Action
+                            if st.button("🤖 Draft on LinkedIn (Auto-Type)", key=f"{key_prefix}btn_li_{hash(li_msg)}"):
+                                with st.spinner("Opening browser & typing..."):
+                                    # Use current scraping URL if valid
+                                    if "linkedin.com/in/" in url:
+                                        scraper = WebScraper()
+                                        res = scraper.draft_linkedin_message(url, final_li)
+                                        st.success(res)
+                                    else:
+                                        st.error("Invalid Profile URL for automation.")
                         
-                    with c_wa:
-                        wa_msg = display_msgs.get("whatsapp", "")
-                        st.text_area("Message", value=wa_msg, height=150, key=f"wa_{hash(wa_msg)}")
+                        with c_wa:
+                            wa_msg = display_msgs.get("whatsapp", "")
+                            st.text_area("Message", value=wa_msg, height=150, key=f"{key_prefix}wa_{hash(wa_msg)}")
                         
-                    with c_sms:
-                        sms_msg = display_msgs.get("sms", "")
-                        st.text_area("Message", value=sms_msg, height=100, key=f"sms_{hash(sms_msg)}")
+                        with c_sms:
+                            sms_msg = display_msgs.get("sms", "")
+                            st.text_area("Message", value=sms_msg, height=100, key=f"{key_prefix}sms_{hash(sms_msg)}")
                         
-                    with c_insta:
-                        insta_msg = display_msgs.get("instagram", "")
-                        final_insta = st.text_area("Message", value=insta_msg, height=150, key=f"insta_{hash(insta_msg)}")
+                        with c_insta:
+                            insta_msg = display_msgs.get("instagram", "")
+                            final_insta = st.text_area("Message", value=insta_msg, height=150, key=f"{key_prefix}insta_{hash(insta_msg)}")
                         
-                        # Insta Action
-                        insta_handle = st.text_input("Instagram Handle (e.g. zuck)", key=f"rec_insta_{hash(insta_msg)}")
-                        if insta_handle and st.button("📸 Open DM", key=f"btn_insta_{hash(insta_msg)}"):
-                            insta_url = f"https://www.instagram.com/{insta_handle}/"
-                            st.markdown(f'<a href="{insta_url}" target="_blank">Click to Open Profile</a>', unsafe_allow_html=True)
-                            st.info("Opened profile. Copy/Paste the message manually.")
+                            # Insta Action
+                            insta_handle = st.text_input("Instagram Handle (e.g. zuck)", key=f"{key_prefix}rec_insta_{hash(insta_msg)}")
+                            if insta_handle and st.button("📸 Open DM", key=f"{key_prefix}btn_insta_{hash(insta_msg)}"):
+                                insta_url = f"https://www.instagram.com/{insta_handle}/"
+                                st.markdown(f'<a href="{insta_url}" target="_blank">Click to Open Profile</a>', unsafe_allow_html=True)
+                                st.info("Opened profile. Copy/Paste the message manually.")
 
-                    st.info(f"Personalization Score: {display_msgs.get('analysis', {}).get('personalization_score', 'N/A')}")
+                        st.info(f"Personalization Score: {display_msgs.get('analysis', {}).get('personalization_score', 'N/A')}")
                     
-                    if st.button("Save to Knowledge Base"):
-                        saved_url = url if input_method == "LinkedIn URL" else ""
-                        kb.save_prospect(
-                            st.session_state.analysis_result,
-                            messages=display_msgs,
-                            url=saved_url
-                        )
-                        st.success("✅ Saved to Knowledge Base with messages!")
+                        if st.button("Save to Knowledge Base", key=f"{key_prefix}save_kb"):
+                            saved_url = url if input_method == "LinkedIn URL" else ""
+                            kb.save_prospect(
+                                st.session_state.analysis_result,
+                                messages=display_msgs,
+                                url=saved_url
+                            )
+                            st.success("✅ Saved to Knowledge Base with messages!")
+
+            variants = st.session_state.get('variants')
+            if variants:
+                variant_tabs = st.tabs([f"Variant {v['variant']}" for v in variants])
+                for variant_tab, variant in zip(variant_tabs, variants):
+                    with variant_tab:
+                        render_campaign(variant["messages"], key_prefix=f"variant_{variant['variant']}_")
+            else:
+                render_campaign(st.session_state.generated_messages)
 
 with tab2:
     st.subheader("🚀 Batch Processing")
@@ -423,66 +565,6 @@ with tab2:
             import random
             base_delay = 8 if total_rows > 10 else 5
             
-            # Helper: Check if a value is garbage (section markers, etc.)
-            def is_garbage(val):
-                """Return True if value looks like scraping artifact, not real data."""
-                if not val or val == "Unknown":
-                    return True
-                v = val.strip()
-                if "===" in v:
-                    return True
-                if v.isdigit():
-                    return True
-                if len(v) < 2:
-                    return True
-                return False
-
-            # Helper: Sanitize a field (remove multi-line junk)
-            def sanitize_field(value):
-                """Clean a field value: take only meaningful content."""
-                if not value or value == "Unknown":
-                    return "Unknown"
-                val = str(value)
-                # Always normalize: replace literal 2-char \n with real newline
-                val = val.replace(chr(92) + 'n', chr(10))
-                lines = [l.strip() for l in val.split(chr(10)) if l.strip()]
-                if not lines:
-                    return "Unknown"
-                # Filter out garbage lines
-                clean_lines = [l for l in lines if not is_garbage(l)]
-                if not clean_lines:
-                    return lines[-1] if lines else "Unknown"
-                if len(clean_lines) == 1:
-                    return clean_lines[0]
-                return clean_lines[-1]
-            
-            # Hallucination markers from the example prompts
-            EXAMPLE_MARKERS = ["sarah jones", "sarah", "cloudscale"]
-            
-            # Role keywords for field validation
-            ROLE_KEYWORDS = [
-                "developer", "engineer", "manager", "designer", "analyst", 
-                "architect", "lead", "director", "vp", "intern", "student", 
-                "consultant", "founder", "cto", "ceo", "scientist", 
-                "specialist", "coordinator", "administrator", "associate", 
-                "officer", "joiner", "trainee", "executive"
-            ]
-            
-            def looks_like_role(text):
-                """Returns True if text contains role-like keywords."""
-                return any(kw in text.lower() for kw in ROLE_KEYWORDS)
-            
-            def looks_like_name(text):
-                """Returns True if text looks like a person name (2-3 capitalized words, no role keywords)."""
-                words = text.strip().split()
-                if len(words) < 1 or len(words) > 5:
-                    return False
-                if looks_like_role(text):
-                    return False
-                # Most words should be capitalized
-                cap_count = sum(1 for w in words if w[0].isupper())
-                return cap_count >= len(words) * 0.5
-            
             def check_msg_hallucination(msgs_dict):
                 """Return True if messages reference the example profile."""
                 if not msgs_dict:
@@ -490,61 +572,19 @@ with tab2:
                 all_text = json.dumps(msgs_dict).lower()
                 return any(marker in all_text for marker in EXAMPLE_MARKERS)
             
-            def extract_name_from_url(url):
-                """Extract a name from the LinkedIn URL slug."""
-                url_match = re.search(r'linkedin\.com/in/([^/]+)', url)
-                if url_match:
-                    slug = url_match.group(1)
-                    # Remove trailing hash/ID (e.g., '-40842a1a2')
-                    slug = re.sub(r'-[a-f0-9]{5,}$', '', slug)
-                    slug = slug.replace('-', ' ').replace('/', '').strip()
-                    # Remove any remaining trailing digits
-                    slug = re.sub(r'\d+$', '', slug).strip()
-                    if slug and len(slug) > 2:
-                        return slug.title()
-                return "Unknown"
-            
-            def extract_from_experience(cleaned_text):
-                """Extract name, role, company directly from Experience section text."""
-                hdr_name = "Unknown"
-                hdr_role = "Unknown"
-                hdr_company = "Unknown"
-                
-                # Name: first line after any section marker
-                for marker in ["=== EXPERIENCE ===", "=== EDUCATION ===", "=== SKILLS ==="]:
-                    match = re.search(re.escape(marker) + r'\s*\n\s*(.+)', cleaned_text)
-                    if match:
-                        candidate = match.group(1).strip()
-                        if candidate and not is_garbage(candidate) and candidate not in ("Experience", "Education", "Skills", "Licenses & certifications"):
-                            hdr_name = candidate
-                            break
-                
-                # Company and Role: look for "Company · Full-time/Part-time/Internship" pattern
-                exp_start = cleaned_text.find("=== EXPERIENCE ===")
-                if exp_start >= 0:
-                    exp_text = cleaned_text[exp_start:exp_start+1500]
-                    company_match = re.search(
-                        r'([A-Za-z0-9][A-Za-z0-9\s&.,\'\-]+?)\s*·\s*(?:Full-time|Part-time|Internship|Contract|Freelance|Apprenticeship)',
-                        exp_text
-                    )
-                    if company_match:
-                        hdr_company = company_match.group(1).strip()
-                    
-                    # Role: line immediately before the company line
-                    exp_lines = exp_text.split('\n')
-                    for i, eline in enumerate(exp_lines):
-                        if '·' in eline and any(t in eline for t in ['Full-time', 'Part-time', 'Internship', 'Contract', 'Freelance', 'Apprenticeship']):
-                            if i > 0:
-                                role_candidate = exp_lines[i-1].strip()
-                                if role_candidate and not is_garbage(role_candidate) and role_candidate != "Experience":
-                                    hdr_role = role_candidate
-                            break
-                
-                return hdr_name, hdr_role, hdr_company
+            def failed_row(target_url, status, data=""):
+                return {
+                    "URL": target_url, "Name": "", "Company": "", "Role": "",
+                    "Email Subject": "", "Email Body": "", "LinkedIn Msg": "",
+                    "WhatsApp Msg": "", "SMS Msg": "",
+                    "Status": status, "Data": data
+                }
             
-            def process_profile(scraper, analyzer, generator, target_url, my_offering, status_text, idx, total):
-                """Process a single profile. Returns a result dict."""
-                status_text.text(f"Processing ({idx+1}/{total}): {target_url}...")
+            def scrape_profile(scraper, target_url):
+                """Scrape and clean one profile on the shared browser. Returns the cleaned text, or a failed row."""
+                # 0. Fail fast while the LLM circuit is open - no point scraping what we can't analyze
+                if not analyzer.client.is_available():
+                    return failed_row(target_url, f"Failed - LLM unavailable (retry in {analyzer.client.retry_after():.0f}s)")
                 
                 # 1. Scrape
                 raw_text = scraper.scrape_url(target_url)
@@ -562,29 +602,29 @@ with tab2:
                 is_error = raw_text.strip().startswith("Error")
                 
                 if is_error or is_auth_wall or not has_useful_content:
-                    return {
-                        "URL": target_url, "Name": "", "Company": "", "Role": "",
-                        "Email Subject": "", "Email Body": "", "LinkedIn Msg": "",
-                        "WhatsApp Msg": "", "SMS Msg": "",
-                        "Status": "Failed to Scrape", "Data": cleaned_text[:200]
-                    }
-                
-                # 4. Analyze with Retry
+                    return failed_row(target_url, "Failed to Scrape", cleaned_text[:200])
+                return cleaned_text
+            
+            async def process_profile(target_url, cleaned_text):
+                """LLM part of one scraped profile (runs on the batch's event loop). Returns a result dict."""
+                # 4-6. Analyze, query the KB and generate messages (two calls or one fused call,
+                # per the pipeline mode)
                 analysis = {}
                 analysis_error = None
+                msgs = {}
                 
-                # Try up to 2 times
+                # Try up to 2 times (the client already backs off between its own retries)
                 for attempt in range(2):
                     try:
-                        analysis = analyzer.analyze_profile(cleaned_text)
+                        result = await pipeline.arun(cleaned_text, my_offering, url=target_url)
+                        analysis, msgs, similar = result["analysis"], result["messages"], result["similar_prospects"]
                         if "error" not in analysis:
                             break
                         analysis_error = analysis.get("error")
-                        status_text.text(f"Analysis failed (attempt {attempt+1}), retrying...")
-                        time.sleep(2)
+                        if not analyzer.client.is_available():
+                            break  # Endpoint is down, skip instead of waiting blindly
                     except Exception as e:
                         analysis_error = str(e)
-                        time.sleep(2)
                 
                 # If analysis failed completely
                 if not analysis or "error" in analysis:
@@ -597,138 +637,29 @@ with tab2:
                     }
                     msgs = {} # Skip generation
                 else:
-                    # 5. Query KB for similar prospects (social proof context)
-                    similar = kb.find_similar(
-                        company=analysis.get("company"),
-                        industry=analysis.get("industry"),
-                        role=analysis.get("role"),
-                        offering=my_offering
-                    )
-                    
-                    # 6. Generate messages with KB context
-                    msgs = generator.generate_campaign(analysis, my_offering, context_prospects=similar)
-                    
-                    # Check for empty messages and retry generation
-                    has_email = msgs and msgs.get("email", {}).get("body", "")
-                    has_linkedin = msgs and msgs.get("linkedin", "")
-                    
-                    if not has_email and not has_linkedin:
-                        status_text.text(f"Retrying message generation ({idx+1}/{total})...")
-                        time.sleep(5)
-                        msgs = generator.generate_campaign(analysis, my_offering, context_prospects=similar)
+                    # Retry only the channels that came back empty
+                    failed = generator.failed_channels(msgs)
+                    if failed and generator.client.is_available():
+                        msgs = (await asyncio.to_thread(generator.regenerate_channels, analysis, my_offering, msgs,
+                                                        failed, similar))["messages"]
 
-                has_email = msgs and msgs.get("email", {}).get("body", "")
-                has_linkedin = msgs and msgs.get("linkedin", "")
-                
-                # 6. Hallucination check for messages
-                if check_msg_hallucination(msgs):
-                    status_text.text(f"Detected example data in messages, regenerating ({idx+1}/{total})...")
-                    time.sleep(5)
-                    msgs = generator.generate_campaign(analysis, my_offering)
-                    has_email = msgs and msgs.get("email", {}).get("body", "")
-                    has_linkedin = msgs and msgs.get("linkedin", "")
-                    if check_msg_hallucination(msgs):
-                        msgs = {}
-                        has_email = False
-                        has_linkedin = False
-                
-                # 7. Extract & sanitize fields
-                name = sanitize_field(analysis.get("name") or "Unknown")
-                company = sanitize_field(analysis.get("company") or "Unknown")
-                role = sanitize_field(analysis.get("role") or "Unknown")
-                
-                if is_garbage(name): name = "Unknown"
-                if is_garbage(company): company = "Unknown"
-                if is_garbage(role): role = "Unknown"
-                
-                # Reject hallucinated example values
-                if name.lower() in EXAMPLE_MARKERS: name = "Unknown"
-                if company.lower() in EXAMPLE_MARKERS: company = "Unknown"
+                # 6. Hallucination check for messages, channel by channel
+                hallucinated = [c for c in CHANNELS if check_msg_hallucination({c: (msgs or {}).get(c)})]
+                if hallucinated:
+                    if generator.client.is_available():
+                        msgs = (await asyncio.to_thread(generator.regenerate_channels, analysis, my_offering, msgs,
+                                                        hallucinated))["messages"]
+                    # Drop whatever is still contaminated, keep the clean channels
+                    msgs = {k: v for k, v in (msgs or {}).items()
+                            if k not in hallucinated or not check_msg_hallucination({k: v})}
                 
-                # 7.5 URL-BASED NAME CROSS-VALIDATION
-                # If LLM name doesn't match URL slug at all, it came from sidebar
-                url_name = extract_name_from_url(target_url)
-                if name != "Unknown" and url_name != "Unknown":
-                    url_parts = set(url_name.lower().split())
-                    name_parts = set(name.lower().split())
-                    if not url_parts.intersection(name_parts):
-                        # Name is wrong - override from section header or URL
-                        hdr_name, hdr_role, hdr_company = extract_from_experience(cleaned_text)
-                        name = hdr_name if hdr_name != "Unknown" else url_name
-                        # Company/role also likely wrong - override if we found better
-                        if hdr_company != "Unknown":
-                            company = hdr_company
-                        if hdr_role != "Unknown":
-                            role = hdr_role
-                
-                # 8. FIELD CROSS-VALIDATION
-                # If company looks like a role title
-                if company != "Unknown" and looks_like_role(company):
-                    if role == "Unknown":
-                        role = company
-                        company = "Unknown"
-                    elif not looks_like_role(role):
-                        role = company
-                        company = "Unknown"
-                    elif looks_like_name(role):
-                        # role is actually a name (e.g., "Nitish Chintakindi")
-                        if name == "Unknown":
-                            name = role
-                        role = company
-                        company = "Unknown"
-                
-                # If role looks like a person name, move to name
-                if role != "Unknown" and name == "Unknown" and looks_like_name(role):
-                    name = role
-                    role = "Unknown"
-                
-                # 9. REGEX FALLBACKS
-                if company == "Unknown" or role == "Unknown":
-                    # Pattern 1: "Role at Company"
-                    match = re.search(
-                        r'([A-Za-z\s\-/]+(?:Developer|Engineer|Manager|Designer|Analyst|Consultant|Architect|Intern|Student|Lead|Director|VP|Founder))\s+at\s+([A-Za-z0-9\s\-&.]+)',
-                        cleaned_text[:1000]
-                    )
-                    if match:
-                        if role == "Unknown": role = match.group(1).strip()
-                        if company == "Unknown": company = match.group(2).strip().split('\n')[0]
-                    
-                    # Pattern 2: "Role | Company"
-                    if company == "Unknown":
-                        match2 = re.search(r'([A-Za-z0-9\s\-]+)\s*\|\s*([A-Za-z0-9\s\-&.]+)', cleaned_text[:1000])
-                        if match2:
-                            if role == "Unknown": role = match2.group(1).strip()
-                            company = match2.group(2).strip().split('\n')[0]
-                    
-                    # Pattern 3: Role keywords
-                    if role == "Unknown":
-                        role_match = re.search(
-                            r'((?:Senior\s+|Junior\s+|Lead\s+|Full[\s-]?Stack\s+)?'
-                            r'(?:Software|Java|Python|Backend|Frontend|Web|Data|Cloud|DevOps|ML|AI|System|Network|QA|Test|Mobile|iOS|Android)\s+'
-                            r'(?:Developer|Engineer|Architect|Analyst|Scientist|Designer))',
-                            cleaned_text[:1000], re.IGNORECASE
-                        )
-                        if role_match:
-                            role = role_match.group(1).strip()
-                    
-                    # Pattern 4: Company from Experience section
-                    if company == "Unknown":
-                        exp_match = re.search(r'(?:EXPERIENCE|Experience).*?(?:at|·|-)\s*([A-Z][A-Za-z0-9\s&.]+?)(?:\n|$)', cleaned_text[:1500])
-                        if exp_match:
-                            company = exp_match.group(1).strip()
-                
-                # 10. Name fallback
-                if name == "Unknown":
-                    header_match = re.search(r'=== PROFILE HEADER ===\s*(.+)', cleaned_text)
-                    if header_match:
-                        candidate = header_match.group(1).strip().split('\n')[0]
-                        if not is_garbage(candidate) and candidate.lower() not in EXAMPLE_MARKERS:
-                            name = candidate
+                has_email = msgs and isinstance(msgs.get("email"), dict) and msgs["email"].get("body", "")
+                has_linkedin = msgs and msgs.get("linkedin", "")
                 
-                if name == "Unknown":
-                    name = extract_name_from_url(target_url)
+                # 7. Sanitize, cross-validate and fill fields with the rule-based extractor
+                name, company, role = reconcile_fields(analysis, cleaned_text, target_url)
                 
-                # 11. Determine status
+                # 8. Determine status
                 if has_email or has_linkedin:
                     status = "Success"
                 else:
@@ -743,6 +674,50 @@ with tab2:
                     "SMS Msg": msgs.get("sms", "") if msgs else "",
                     "Status": status
                 }
+            
+            # LLM work runs on its own event loop: scraping stays sequential on the one
+            # browser, while scraped profiles are analyzed concurrently (at most the
+            # client's max_concurrency prompts in flight)
+            llm_loop = asyncio.new_event_loop()
+            threading.Thread(target=llm_loop.run_forever, name="batch-llm", daemon=True).start()
+            
+            def run_pass(urls, label, delay_range, delay_first=False, show_progress=False):
+                """Scrape `urls` one by one and hand each to the LLM loop at once. Returns rows in order."""
+                rows = [None] * len(urls)
+                futures = {}
+                
+                def update_progress():
+                    if show_progress:
+                        finished = sum(1 for r in rows if r is not None) + sum(f.done() for f in futures.values())
+                        progress_bar.progress(finished / len(urls))
+                
+                for k, target_url in enumerate(urls):
+                    # Randomized delay to avoid rate limiting
+                    if k > 0 or delay_first:
+                        delay = random.uniform(*delay_range)
+                        status_text.text(f"Waiting {delay:.0f}s before next profile...")
+                        time.sleep(delay)
+                    
+                    in_flight = sum(not f.done() for f in futures.values())
+                    status_text.text(f"{label} ({k+1}/{len(urls)}): {target_url}... ({in_flight} being analyzed)")
+                    try:
+                        scraped = scrape_profile(scraper, target_url)
+                    except Exception as e:
+                        scraped = failed_row(target_url, f"Error: {str(e)}")
+                    if isinstance(scraped, dict):
+                        rows[k] = scraped
+                    else:
+                        futures[k] = asyncio.run_coroutine_threadsafe(process_profile(target_url, scraped), llm_loop)
+                    update_progress()
+                
+                for k, future in futures.items():
+                    status_text.text(f"{label}: waiting for {sum(not f.done() for f in futures.values())} analyses...")
+                    try:
+                        rows[k] = future.result()
+                    except Exception as e:
+                        rows[k] = failed_row(urls[k], f"Error: {str(e)}")
+                    update_progress()
+                return rows
 
             try:
                 # Initialize ONE browser session for the entire batch
@@ -750,27 +725,8 @@ with tab2:
                 scraper.init_browser()
                 
                 # === MAIN PASS ===
-                for i, row in df.iterrows():
-                    target_url = row[url_col]
-                    
-                    # Randomized delay to avoid rate limiting
-                    if i > 0:
-                        delay = random.uniform(base_delay, base_delay + 4)
-                        status_text.text(f"Waiting {delay:.0f}s before next profile...")
-                        time.sleep(delay)
-
-                    try:
-                        result = process_profile(scraper, analyzer, generator, target_url, my_offering, status_text, i, total_rows)
-                        results.append(result)
-                    except Exception as e:
-                        results.append({
-                            "URL": target_url, "Name": "", "Company": "", "Role": "",
-                            "Email Subject": "", "Email Body": "", "LinkedIn Msg": "",
-                            "WhatsApp Msg": "", "SMS Msg": "",
-                            "Status": f"Error: {str(e)}", "Data": ""
-                        })
-                    
-                    progress_bar.progress((i + 1) / total_rows)
+                results = run_pass(df[url_col].tolist(), "Processing", (base_delay, base_delay + 4),
+                                   show_progress=True)
                 
                 # === RETRY PASS: Re-attempt failed / partial profiles ===
                 failed_indices = [j for j, r in enumerate(results) 
@@ -780,37 +736,27 @@ with tab2:
                     status_text.text(f"Retrying {len(failed_indices)} failed/partial profiles...")
                     time.sleep(3)
                     
-                    for retry_idx, orig_idx in enumerate(failed_indices):
-                        target_url = results[orig_idx]["URL"]
-                        status_text.text(f"Retry ({retry_idx+1}/{len(failed_indices)}): {target_url}...")
-                        
-                        # Longer delay for retry pass
-                        delay = random.uniform(10, 15)
-                        time.sleep(delay)
+                    # Longer delay for retry pass
+                    retry_results = run_pass([results[j]["URL"] for j in failed_indices], "Retry", (10, 15),
+                                             delay_first=True)
+                    for orig_idx, retry_result in zip(failed_indices, retry_results):
+                        # Only replace if retry is better
+                        retry_status = retry_result.get("Status", "")
+                        orig_status = results[orig_idx].get("Status", "")
                         
-                        try:
-                            retry_result = process_profile(
-                                scraper, analyzer, generator, target_url, my_offering, 
-                                status_text, retry_idx, len(failed_indices)
-                            )
-                            # Only replace if retry is better
-                            retry_status = retry_result.get("Status", "")
-                            orig_status = results[orig_idx].get("Status", "")
-                            
-                            if retry_status == "Success":
-                                results[orig_idx] = retry_result
-                            elif retry_status.startswith("Partial") and orig_status.startswith(("Failed", "Error")):
-                                results[orig_idx] = retry_result
-                        except Exception:
-                            pass  # Keep original result
+                        if retry_status == "Success":
+                            results[orig_idx] = retry_result
+                        elif retry_status.startswith("Partial") and orig_status.startswith(("Failed", "Error")):
+                            results[orig_idx] = retry_result
                         
             finally:
                 scraper.close_browser()
+                llm_loop.call_soon_threadsafe(llm_loop.stop)
                 
             status_text.text("Batch Processing Complete!")
             
-            # Auto-save successful profiles to Knowledge Base
-            saved_count = 0
+            # Auto-save successful profiles to Knowledge Base (one bulk upsert)
+            to_save = []
             for r in results:
                 if r.get("Status") == "Success" and r.get("Name") and r.get("Name") != "Unknown":
                     profile_for_kb = {
@@ -824,8 +770,8 @@ with tab2:
                         "whatsapp": r.get("WhatsApp Msg", ""),
                         "sms": r.get("SMS Msg", ""),
                     }
-                    kb.save_prospect(profile_for_kb, messages=msgs_for_kb, url=r.get("URL", ""))
-                    saved_count += 1
+                    to_save.append({"profile": profile_for_kb, "messages": msgs_for_kb, "url": r.get("URL", "")})
+            saved_count = kb.save_prospects_bulk(to_save)
             
             # Show Results
             if results:
@@ -860,6 +806,10 @@ with tab3:
     col_s3.metric("Industries", stats["industries"])
     
     data = kb.load_all()
+    cache_stats = kb.cache_stats()
+    if cache_stats:
+        st.caption(f"KB cache: {cache_stats['entries']} entries, "
+                   f"{cache_stats['hit_rate']:.0%} hit rate ({cache_stats['hits']} hits / {cache_stats['misses']} reloads)")
     if data:
         # Display as a clean table
         # Display as an editable table
@@ -916,13 +866,12 @@ with tab3:
                  
                  if pid in id_to_index:
                      idx = id_to_index[pid]
-                     # Check if status changed
+                     # Check if status changed; only that row is written
                      if data[idx].get("status", "Sent") != new_status:
-                         data[idx]["status"] = new_status
+                         kb.update_status(pid, new_status)
                          changes_count += 1
             
             if changes_count > 0:
-                kb.save_all(data)
                 st.toast(f"✅ Updated {changes_count} prospect(s)!")
                 time.sleep(1) # Brief pause to show toast before rerun
                 st.rerun()
@@ -984,10 +933,8 @@ with tab3:
                 
                 if st.button("Simulate Reply", type="primary"):
                     with st.spinner(f"Simulating {p_data.get('name')}..."):
-                        # Initialize Client
-                        from logic.llm_client import KaggleClient
-                        # Use global llm_url from sidebar
-                        client = KaggleClient(base_url=llm_url)
+                        # Reuse the pooled client from the sidebar
+                        client = llm_client
                         
                         # Construct Prompt
                         prompt = f"""
@@ -1008,7 +955,7 @@ with tab3:
                         If interested, ask a relevant follow-up question.
                         """
                         
-                        reply = client.generate(prompt, max_new_tokens=150)
+                        reply = client.generate(prompt, max_new_tokens=150, use_cache=False)
                         
                         st.markdown(f"**📩 Reply from {p_data.get('name')}:**")
                         st.info(reply)
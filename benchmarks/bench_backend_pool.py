@@ -0,0 +1,54 @@
+"""
+Batch throughput vs number of LLM endpoints behind one KaggleClient.
+Each stub endpoint serves one completion at a time, like a notebook GPU.
+
+Run from the repo root:
+    python -m benchmarks.bench_backend_pool --endpoints 1,2,4 --prompts 16
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from logic.llm_client import KaggleClient
+
+
+async def run_batch(client, prompts, max_new_tokens):
+    return await asyncio.gather(*[client.agenerate(p, max_new_tokens=max_new_tokens) for p in prompts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoints", default="1,2,4")
+    parser.add_argument("--prompts", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--routing", default="least_outstanding", choices=["least_outstanding", "latency"])
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.endpoints.split(",")]
+    servers = [StubLLMServer(token_delay=args.token_delay).start() for _ in range(max(counts))]
+    prompts = [f"prompt {i}" for i in range(args.prompts)]
+    baseline = None
+    try:
+        for n in counts:
+            urls = [s.url for s in servers[:n]]
+            client = KaggleClient(base_url=urls, routing=args.routing,
+                                  max_concurrency=2 * n, pool_maxsize=2 * n)
+            start = time.perf_counter()
+            results = asyncio.run(run_batch(client, prompts, args.max_new_tokens))
+            elapsed = time.perf_counter() - start
+            assert not any(r.startswith("Error") for r in results)
+            throughput = len(prompts) / elapsed
+            baseline = baseline or throughput
+            spread = ", ".join(str(b["requests"]) for b in client.backend_stats())
+            print(f"{n} endpoint(s): {throughput:6.1f} prompts/s  ({throughput / baseline:.1f}x)  "
+                  f"requests per endpoint: {spread}")
+            client.close()
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
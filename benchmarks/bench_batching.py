@@ -0,0 +1,47 @@
+"""
+generate_many() against a stub endpoint that serves one forward pass at a
+time: sequential generate() vs micro-batched /generate_batch vs the
+parallel-singles fallback when the backend has no batch route.
+
+Run from the repo root:
+    python -m benchmarks.bench_batching --prompts 32
+"""
+import argparse
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from logic.llm_client import KaggleClient
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    assert len(results) == n and not any(r.startswith("Error") for r in results)
+    print(f"{label:<34} {elapsed:6.2f}s  {n / elapsed:6.1f} prompts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=32)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+    prompts = [f"prompt {i}" for i in range(args.prompts)]
+
+    for batch in (True, False):
+        with StubLLMServer(token_delay=args.token_delay, batch=batch) as server:
+            client = KaggleClient(base_url=server.url, batch_max_size=args.batch_size)
+            label = "batch route" if batch else "no batch route"
+            if batch:
+                timed("sequential generate()", lambda: [client.generate(p, args.max_new_tokens) for p in prompts],
+                      len(prompts))
+            timed(f"generate_many() [{label}]", lambda: client.generate_many(prompts, args.max_new_tokens),
+                  len(prompts))
+            print(f"  batcher: {client.batch_stats()}, server: {server.snapshot()}")
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Time-to-first-channel and total time: one full campaign call vs one call
+per channel in parallel (generate_channels), and the cost of regenerating
+a single failed channel vs the whole campaign. The stub's `--capacity` is
+how many completions the backend runs at once.
+
+Run from the repo root:
+    python -m benchmarks.bench_channels --capacity 5
+"""
+import argparse
+import time
+
+from benchmarks.stub_server import PROFILE_ANSWER, StubLLMServer
+from logic.generator import MessageGenerator
+from logic.llm_client import KaggleClient
+
+OFFERING = "An AI-driven hiring platform for engineering leaders"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with StubLLMServer(token_delay=args.token_delay, capacity=args.capacity) as server:
+        client = KaggleClient(base_url=server.url, streaming=True, max_concurrency=5)
+        generator = MessageGenerator(client=client)
+
+        start = time.perf_counter()
+        campaign = generator.generate_campaign(PROFILE_ANSWER, OFFERING)
+        full = time.perf_counter() - start
+        assert not generator.failed_channels(campaign), campaign
+        print(f"full campaign         first channel {full:5.2f}s   all channels {full:5.2f}s")
+
+        result = generator.generate_channels(PROFILE_ANSWER, OFFERING)
+        assert not result["failed"], result
+        timings = result["timings"]
+        print(f"parallel channels     first channel {timings['first_channel']:5.2f}s   "
+              f"all channels {timings['total']:5.2f}s   (email {timings['email']:.2f}s)")
+
+        broken = dict(campaign, sms="")
+        start = time.perf_counter()
+        generator.regenerate_channels(PROFILE_ANSWER, OFFERING, broken, generator.failed_channels(broken))
+        print(f"regenerate 1 channel  {time.perf_counter() - start:5.2f}s   vs full campaign {full:5.2f}s")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
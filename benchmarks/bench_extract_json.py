@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: linear-time extract_json vs the previous quadratic scanner.
+
+Run from the repo root:
+    python -m benchmarks.bench_extract_json
+"""
+import argparse
+import json
+import time
+
+from logic.json_extract import extract_json
+
+PROFILE = {
+    "name": "Priya Sharma",
+    "company": "Acme Robotics",
+    "role": "Senior Backend Engineer",
+    "education": ["B.Tech, IIT Bombay"],
+    "key_insights": ["Writes about {distributed} systems", "Mentors juniors"],
+}
+
+
+def legacy_extract_json(text):
+    """The pre-linear implementation, kept here only for comparison."""
+    text = text.strip()
+    candidates = []
+
+    i = 0
+    while i < len(text):
+        if text[i] == '{':
+            stack = 1
+            for j in range(i + 1, len(text)):
+                if text[j] == '{':
+                    stack += 1
+                elif text[j] == '}':
+                    stack -= 1
+
+                if stack == 0:
+                    candidate = text[i: j + 1]
+                    try:
+                        obj = json.loads(candidate)
+                        if isinstance(obj, (dict, list)):
+                            candidates.append(obj)
+                            i = j
+                            break
+                    except:
+                        pass
+                    break
+        i += 1
+
+    if candidates:
+        return candidates[-1]
+    return None
+
+
+def make_inputs(size):
+    """Adversarial LLM outputs of roughly `size` bytes, each ending in a valid profile."""
+    answer = json.dumps(PROFILE, indent=2)
+    filler = size - len(answer)
+    return {
+        # Unclosed braces: old scanner walks to end of text for every one
+        "unclosed_braces": ("{ note " * (filler // 7)) + answer,
+        # Prose full of balanced-but-invalid {placeholders}
+        "template_noise": ("Hi {first_name}, about {company} " * (filler // 33)) + answer,
+        # A huge malformed object (missing commas) wrapping nested fragments
+        "malformed_nested": "{" + ('"k": {"a": 1} "b" ' * (filler // 19)) + "}" + answer,
+    }
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated input sizes in bytes")
+    parser.add_argument("--legacy-max-bytes", type=int, default=20000,
+                        help="Skip the quadratic implementation above this size")
+    args = parser.parse_args()
+
+    print(f"{'case':<18} {'bytes':>9} {'linear_ms':>10} {'legacy_ms':>11} {'speedup':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for name, text in make_inputs(size).items():
+            linear_s, linear_res = timed(extract_json, text)
+            assert linear_res == PROFILE, f"{name}: linear extractor returned {linear_res!r}"
+
+            if len(text) <= args.legacy_max_bytes:
+                legacy_s, legacy_res = timed(legacy_extract_json, text)
+                assert legacy_res == PROFILE, f"{name}: legacy extractor returned {legacy_res!r}"
+                legacy_col = f"{legacy_s * 1000:>11.1f}"
+                speedup_col = f"{legacy_s / linear_s:>8.0f}x"
+            else:
+                legacy_col = f"{'skipped':>11}"
+                speedup_col = f"{'-':>9}"
+
+            print(f"{name:<18} {len(text):>9} {linear_s * 1000:>10.1f} {legacy_col} {speedup_col}")
+
+
+if __name__ == "__main__":
+    main()
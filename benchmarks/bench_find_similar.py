@@ -0,0 +1,111 @@
+"""
+KnowledgeBase.find_similar over N prospects: the previous per-prospect
+Python scoring loop vs the inverted-index / NumPy engine (kb_index), on
+queries covering every offering type. Checks that both return the same
+top 3 with the same _match_reasons, and times the one-off index build.
+
+Run from the repo root:
+    python -m benchmarks.bench_find_similar --prospects 100000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_kb_storage import COMPANIES, INDUSTRIES, fake_entries
+from logic.kb_index import SimilarityIndex
+from logic.knowledge_base import KnowledgeBase
+
+ROLES = ["Senior Backend Engineer", "Data Analyst at Acme", "Product Manager", "Student at VIT",
+         "Engineering Manager", "Frontend Developer", "Founder", "Software Engineering Intern",
+         "Graduate Trainee", "Head of the Data Team", "", "Unknown"]
+OFFERINGS = ["Interview prep bootcamp for students", "Pre-vetted engineers to scale your team",
+             "CI/CD platform that automates code review", "", "Coffee subscriptions"]
+
+
+def legacy_find_similar(data, company, industry, role, offering_type):
+    """KnowledgeBase.find_similar's scoring loop before kb_index (returns (id, reasons))."""
+    scored = []
+    for p in data:
+        score = 0
+        reasons = []
+        p_company = (p.get("company") or "").lower()
+        p_role = (p.get("role") or "").lower()
+        p_industry = (p.get("industry") or "").lower()
+        if company and p_company == company.lower():
+            score += 4
+            reasons.append("same_company")
+        if offering_type == "bootcamp":
+            edu_keywords = ["student", "sophomore", "junior", "senior", "freshman",
+                            "intern", "trainee", "graduate", "university", "institute",
+                            "college", "vit", "iit", "nit"]
+            if any(kw in p_role for kw in edu_keywords):
+                score += 2
+                reasons.append("similar_career_stage")
+            if role and p.get("role"):
+                overlap = set(role.lower().split()) & set(p_role.split()) - {"at", "the", "and", "of", "in"}
+                if overlap:
+                    score += 1
+                    reasons.append("similar_skills")
+        elif offering_type in ("talent", "devtool"):
+            points = (3, 2) if offering_type == "talent" else (2, 1)
+            if industry and p_industry == industry.lower():
+                score += points[0]
+                reasons.append("same_industry")
+            if role and p.get("role"):
+                overlap = set(role.lower().split()) & set(p_role.split()) - {"at", "the", "and", "of", "in"}
+                if overlap:
+                    score += points[1]
+                    reasons.append("similar_role")
+        else:
+            if industry and p_industry == industry.lower():
+                score += 2
+                reasons.append("same_industry")
+            if role and p.get("role"):
+                if set(role.lower().split()) & set(p_role.split()):
+                    score += 1
+                    reasons.append("similar_role")
+        if score > 0:
+            scored.append((score, reasons, p.get("id")))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [(pid, reasons) for _, reasons, pid in scored[:3]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prospects", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    entries = fake_entries(args.prospects)
+    for p in entries:
+        p["role"] = rng.choice(ROLES)
+        if rng.random() < 0.05:
+            p["company"] = rng.choice(["Unknown", "", "COMPANY 7"])
+    kb = KnowledgeBase.__new__(KnowledgeBase)  # only for _detect_offering_type
+    queries = []
+    for _ in range(args.queries):
+        queries.append((rng.choice(COMPANIES + ["Unknown", None]), rng.choice(INDUSTRIES + [None]),
+                        rng.choice(ROLES + [None, "the senior engineer"]),
+                        kb._detect_offering_type(rng.choice(OFFERINGS))))
+
+    start = time.perf_counter()
+    index = SimilarityIndex(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    expected = [legacy_find_similar(entries, *q) for q in queries]
+    legacy_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    start = time.perf_counter()
+    got = [index.search(*q) for q in queries]
+    indexed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    got = [[(p["id"], reasons) for p, reasons in matches] for matches in got]
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    print(f"{args.prospects} prospects, {len(queries)} queries, index build {build_ms:.0f} ms")
+    print(f"legacy loop {legacy_ms:8.2f} ms/query   indexed {indexed_ms:6.2f} ms/query   "
+          f"({legacy_ms / indexed_ms:.0f}x), {mismatches} mismatching results")
+
+
+if __name__ == "__main__":
+    main()
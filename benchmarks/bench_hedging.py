@@ -0,0 +1,51 @@
+"""
+Tail latency of sequential generate() calls with and without request
+hedging, against two stub endpoints that occasionally run 10x slower.
+
+Run from the repo root:
+    python -m benchmarks.bench_hedging --calls 200
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from logic.llm_client import KaggleClient
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100.0), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--max-new-tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.001)
+    parser.add_argument("--spike-prob", type=float, default=0.05)
+    parser.add_argument("--budget", type=float, default=0.1, help="Max fraction of extra requests")
+    args = parser.parse_args()
+
+    servers = [StubLLMServer(token_delay=args.token_delay, spike_prob=args.spike_prob).start() for _ in range(2)]
+    try:
+        for hedge in (False, True):
+            client = KaggleClient(base_url=[s.url for s in servers], hedge=hedge, hedge_budget=args.budget)
+            timings = []
+            for i in range(args.calls):
+                start = time.perf_counter()
+                text = client.generate(f"prompt {i}", max_new_tokens=args.max_new_tokens)
+                timings.append(time.perf_counter() - start)
+                assert not text.startswith("Error"), text
+            sent = sum(b["requests"] for b in client.backend_stats())
+            print(f"hedging {'on ' if hedge else 'off'}: p50 {statistics.median(timings) * 1000:6.0f}ms  "
+                  f"p99 {percentile(timings, 99) * 1000:6.0f}ms  max {max(timings) * 1000:6.0f}ms  "
+                  f"extra load {sent / args.calls - 1:5.1%}  {client.hedge_stats() if hedge else ''}")
+            client.close()
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Knowledge base operations on the JSON file, SQLite and append-only log stores, for
+a synthetic knowledge base of N prospects: the calls a Streamlit rerun
+makes (get_stats, load_all, find_similar, served from the shared cached
+view; load_all also uncached), single writes (save_prospect,
+update_status) and a batch auto-save of --batch prospects (save_prospect
+per row vs one save_prospects_bulk), followed by each view's hit
+statistics. Also times the one-shot JSON -> SQLite migration and the
+log store's startup (seed, then rebuilding the view from snapshot + log).
+
+Run from the repo root:
+    python -m benchmarks.bench_kb_storage --prospects 20000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from benchmarks.stub_server import CAMPAIGN_ANSWER, PROFILE_ANSWER
+from logic.knowledge_base import KnowledgeBase
+
+COMPANIES = [f"Company {i}" for i in range(500)]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Education", "Retail", "Robotics / Technology"]
+ROLES = ["Senior Backend Engineer", "Data Analyst", "Product Manager", "Student", "Engineering Manager",
+         "Frontend Developer", "Founder"]
+
+
+def fake_entries(n, seed=3):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        profile = dict(PROFILE_ANSWER, name=f"Prospect {i}", company=rng.choice(COMPANIES),
+                       role=rng.choice(ROLES), industry=rng.choice(INDUSTRIES))
+        entries.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))), "name": profile["name"],
+            "company": profile["company"], "role": profile["role"], "industry": profile["industry"],
+            "seniority": "Senior", "summary": "", "profile": profile, "messages": CAMPAIGN_ANSWER,
+            "url": "", "timestamp": "2026-01-01T00:00:00", "status": "Sent",
+        })
+    return entries
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prospects", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = fake_entries(args.prospects)
+    probe = entries[len(entries) // 2]
+    batch = [{"profile": p["profile"], "messages": CAMPAIGN_ANSWER} for p in entries[:args.batch]]
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "knowledge_base.json")
+        with open(json_path, "w") as f:
+            json.dump(entries, f, indent=2)
+
+        start = time.perf_counter()
+        sqlite_kb = KnowledgeBase(json_path, backend="sqlite")
+        migrate_ms = (time.perf_counter() - start) * 1000
+        json_kb = KnowledgeBase(json_path, backend="json")
+        start = time.perf_counter()
+        log_kb = KnowledgeBase(json_path, backend="log")
+        seed_ms = (time.perf_counter() - start) * 1000
+        print(f"{args.prospects} prospects, sqlite migration {migrate_ms:.0f} ms, log seed {seed_ms:.0f} ms")
+        print(f"{'operation':28s} {'json':>10s} {'sqlite':>10s} {'log':>10s}")
+        backends = (json_kb, sqlite_kb, log_kb)
+
+        operations = [
+            ("get_stats", lambda kb: kb.get_stats()),
+            ("load_all", lambda kb: kb.load_all()),
+            ("load_all (uncached)", lambda kb: kb.storage.load_all()),
+            ("find_similar", lambda kb: kb.find_similar(company="Company 7", industry="Finance",
+                                                         role="Backend Engineer", offering="hiring platform")),
+            ("save_prospect (update)", lambda kb: kb.save_prospect(probe["profile"], CAMPAIGN_ANSWER)),
+            ("update_status", lambda kb: kb.update_status(probe["id"], "Replied")),
+        ]
+        for name, op in operations:
+            results = [op(kb) for kb in backends]
+            assert all(r == results[0] for r in results), name
+            print(f"{name:28s} " + " ".join(f"{timed(lambda: op(kb)):8.1f}ms" for kb in backends))
+
+        def save_loop(kb):
+            for p in batch:
+                kb.save_prospect(p["profile"], p["messages"])
+        for name, op in [(f"auto-save {args.batch} (loop)", save_loop),
+                         (f"auto-save {args.batch} (bulk)", lambda kb: kb.save_prospects_bulk(batch))]:
+            print(f"{name:28s} " + " ".join(f"{timed(lambda: op(kb), repeat=1):8.1f}ms" for kb in backends))
+        assert all(len(kb.load_all()) == args.prospects for kb in backends)
+        for label, kb in zip(("json", "sqlite", "log"), backends):
+            stats = kb.cache_stats()
+            print(f"{label} view: {stats['hits']} hits, {stats['misses']} reloads, "
+                  f"{stats['invalidations']} invalidations ({stats['hit_rate']:.0%} hit rate)")
+        sqlite_kb.storage.close()
+
+        log_kb.storage.close()
+        start = time.perf_counter()
+        KnowledgeBase(json_path, backend="log").storage.close()
+        print(f"log store restart (snapshot + log replay) {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
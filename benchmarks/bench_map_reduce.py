@@ -0,0 +1,58 @@
+"""
+Wall-clock of analyze_profile on a long LinkedIn + resume + notes profile:
+one prompt with the full text vs map-reduce over budget-sized chunks, with
+1 and 3 stub endpoints. The stub charges `--prefill-delay` per prompt token
+and `--token-delay` per generated token; streaming stops at the JSON.
+
+Run from the repo root:
+    python -m benchmarks.bench_map_reduce --endpoints 3
+"""
+import argparse
+import time
+
+from benchmarks.bench_token_budget import profile
+from benchmarks.stub_server import StubLLMServer
+from logic.analyzer import ProspectAnalyzer
+from logic.llm_client import KaggleClient
+from logic.token_budget import DEFAULT_INPUT_TOKENS, chunk_sections, estimate_tokens
+
+
+def run(label, servers, text, **analyzer_args):
+    client = KaggleClient(base_url=[s.url for s in servers], streaming=True, max_concurrency=8)
+    analyzer = ProspectAnalyzer(client=client, **analyzer_args)
+    for server in servers:
+        server.reset()
+    start = time.perf_counter()
+    result = analyzer.analyze_profile(text)
+    elapsed = time.perf_counter() - start
+    assert "error" not in result, result
+    calls = sum(s.snapshot().get("generate_stream", 0) for s in servers)
+    print(f"{label:<40} {elapsed:6.2f}s  ({calls} LLM call(s))")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoints", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=DEFAULT_INPUT_TOKENS)
+    parser.add_argument("--prefill-delay", type=float, default=0.0005)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    text = profile(60, 600, 5)
+    chunks = chunk_sections(text, args.budget)
+    print(f"profile: {estimate_tokens(text)} tokens, {len(chunks)} chunks of <= {args.budget}")
+    servers = [StubLLMServer(token_delay=args.token_delay, prefill_delay=args.prefill_delay).start()
+               for _ in range(args.endpoints)]
+    try:
+        run("single prompt, full text", servers[:1], text, input_token_budget=10 ** 9)
+        run("map-reduce, 1 endpoint", servers[:1], text, input_token_budget=args.budget, map_reduce=True)
+        run(f"map-reduce, {args.endpoints} endpoints", servers, text,
+            input_token_budget=args.budget, map_reduce=True)
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
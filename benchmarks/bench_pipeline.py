@@ -0,0 +1,56 @@
+"""
+Per-prospect latency and token usage of the two pipeline modes against the
+stub endpoint: analyze + generate (two calls) vs fused (one call). Prompt
+tokens are the stub's prompt characters / 4, prefix-cached or not.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline --prospects 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_streaming import SAMPLE_PROFILE_TEXT
+from benchmarks.stub_server import StubLLMServer
+from logic.analyzer import ProspectAnalyzer
+from logic.generator import MessageGenerator
+from logic.knowledge_base import KnowledgeBase
+from logic.llm_client import KaggleClient
+from logic.pipeline import ProspectPipeline
+
+OFFERING = "An AI-driven hiring platform for engineering leaders"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prospects", type=int, default=5)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--prefill-delay", type=float, default=0.0002)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb = KnowledgeBase(os.path.join(tmp, "kb.json"))
+        print(f"{'mode':<10} {'mean':>7} {'max':>7} {'calls':>6} {'prompt tok':>11} {'gen tok':>8}  (per prospect)")
+        for mode in ProspectPipeline.MODES:
+            with StubLLMServer(token_delay=args.token_delay, prefill_delay=args.prefill_delay) as server:
+                client = KaggleClient(base_url=server.url, streaming=True)
+                pipeline = ProspectPipeline(ProspectAnalyzer(client=client), MessageGenerator(client=client), kb, mode)
+                timings = []
+                for i in range(args.prospects):
+                    start = time.perf_counter()
+                    result = pipeline.run(SAMPLE_PROFILE_TEXT + f"\nProspect #{i}", OFFERING)
+                    timings.append(time.perf_counter() - start)
+                    assert result["mode"] == mode and "error" not in result["analysis"], result
+                stats = server.snapshot()
+                n = args.prospects
+                print(f"{mode:<10} {statistics.mean(timings):6.2f}s {max(timings):6.2f}s "
+                      f"{stats.get('generate_stream', 0) / n:6.1f} {stats['prompt_chars'] / 4 / n:11.0f} "
+                      f"{stats['tokens_generated'] / n:8.0f}")
+                client.close()
+        kb.storage.close()
+
+
+if __name__ == "__main__":
+    main()
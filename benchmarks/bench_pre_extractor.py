@@ -0,0 +1,110 @@
+"""
+Rule-based pre-extractor on a synthetic corpus of scraped-profile layouts
+(LinkedIn headline, "Role @ Company | ...", experience entries, plain
+resume text): extraction throughput, per-field accuracy against the known
+answers, how many rows clear the skip-the-LLM confidence bar, and the
+analysis time and prompt size for the corpus on the stub with and without
+that skip, and with the reduced prompt for rows just below it.
+
+Run from the repo root:
+    python -m benchmarks.bench_pre_extractor --profiles 2000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from logic.analyzer import ProspectAnalyzer
+from logic.llm_client import KaggleClient
+from logic.pre_extractor import extract_fields
+
+FIRST = ["Priya", "Arjun", "Maria", "Chen", "Fatima", "Lucas", "Aisha", "Rohan", "Elena", "Kwame"]
+LAST = ["Sharma", "Mehta", "Garcia", "Wei", "Khan", "Silva", "Okafor", "Iyer", "Petrova", "Mensah"]
+ROLES = ["Senior Backend Engineer", "Data Analyst", "Product Manager", "Frontend Developer",
+         "Engineering Manager", "ML Engineer", "Cloud Architect", "Founder"]
+COMPANIES = ["Acme Robotics", "Globex", "Initech Labs", "Umbrella Health", "Stark Industries",
+             "Wayne Fintech", "Hooli", "Pied Piper"]
+SCHOOLS = ["IIT Bombay", "Stanford University", "University of Lagos", "BITS Pilani"]
+
+
+def layout_headline(p):
+    return (f"=== PROFILE HEADER ===\n{p['name']}\n{p['role']} at {p['company']} | Open to work\n"
+            f"Bengaluru, India\n=== ABOUT ===\nI build things that scale.\n"
+            f"=== EDUCATION ===\n{p['school']}\nB.Tech, Computer Science")
+
+
+def layout_at_sign(p):
+    return (f"=== PROFILE HEADER ===\n{p['name']}\n{p['role']} @ {p['company']} | Speaker\n"
+            f"=== RECENT_POSTS ===\nExcited to share our new launch!")
+
+
+def layout_experience(p):
+    return (f"=== EXPERIENCE ===\n{p['role']}\n{p['company']} · Full-time\nJan 2021 - Present · 3 yrs\n"
+            f"=== EDUCATION ===\n{p['school']}")
+
+
+def layout_resume(p):
+    return (f"=== RESUME / CV DATA ===\n{p['name'].upper()}\nEmail: someone@example.com\n"
+            f"Worked on distributed systems and data pipelines.\nEducation: {p['school']}")
+
+
+LAYOUTS = [layout_headline, layout_at_sign, layout_experience, layout_resume]
+
+
+def corpus(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        truth = {"name": f"{first} {last}", "role": rng.choice(ROLES), "company": rng.choice(COMPANIES),
+                 "school": rng.choice(SCHOOLS)}
+        url = f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{i:x}a1b2c" if i % 3 else None
+        rows.append((LAYOUTS[i % len(LAYOUTS)](truth), url, truth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--reduce-threshold", type=float, default=0.6,
+                        help="Confidence for the reduced analysis prompt")
+    parser.add_argument("--llm-profiles", type=int, default=20, help="Corpus size for the stub analysis run")
+    parser.add_argument("--token-delay", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    rows = corpus(args.profiles)
+    start = time.perf_counter()
+    results = [extract_fields(text, url) for text, url, _ in rows]
+    elapsed = time.perf_counter() - start
+    print(f"extract_fields: {len(rows) / elapsed:,.0f} profiles/s ({elapsed / len(rows) * 1e6:.0f} µs each)")
+
+    for field in ("name", "company", "role"):
+        found = [r for r in results if r[field] != "Unknown"]
+        correct = sum(1 for r, (_, _, truth) in zip(results, rows) if r[field] == truth[field])
+        print(f"  {field:8s} found {len(found) / len(rows):4.0%}   correct {correct / len(rows):4.0%}")
+    confident = [r for r in results
+                 if min(r["confidence"][f] for f in ("name", "company", "role")) >= args.threshold]
+    wrong = sum(1 for r, (_, _, truth) in zip(results, rows)
+                if r in confident and any(r[f] != truth[f] for f in ("name", "company", "role")))
+    print(f"  skip-LLM rows at confidence >= {args.threshold}: {len(confident) / len(rows):.0%} "
+          f"({wrong} with a wrong field)")
+
+    sample = rows[:args.llm_profiles]
+    for label, skip, reduce in (("LLM for every row", None, None), ("rules first", args.threshold, None),
+                                ("+ reduced prompt", args.threshold, args.reduce_threshold)):
+        with StubLLMServer(token_delay=args.token_delay) as server:
+            client = KaggleClient(base_url=server.url)
+            analyzer = ProspectAnalyzer(client=client, skip_llm_confidence=skip, reduce_prompt_confidence=reduce)
+            start = time.perf_counter()
+            for text, url, _ in sample:
+                analyzer.analyze_profile(text, url=url)
+            elapsed = time.perf_counter() - start
+            stats = server.snapshot()
+            client.close()
+        print(f"{label:18s} {len(sample)} profiles  {elapsed:5.2f}s  {stats.get('generate', 0)} LLM calls  "
+              f"{stats['prompt_chars'] / 4:8.0f} prompt tokens")
+
+
+if __name__ == "__main__":
+    main()
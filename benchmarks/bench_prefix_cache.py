@@ -0,0 +1,59 @@
+"""
+Prefix-cache hit ratio of campaign prompts on the stub endpoint: the legacy
+layout (offering and per-prospect social proof spliced into the system
+prompt ahead of the few-shot example) vs the prefix-stable layout built by
+MessageGenerator (static rules + examples, then offering, then prospect).
+
+Run from the repo root:
+    python -m benchmarks.bench_prefix_cache --prospects 20
+"""
+import argparse
+
+from benchmarks.stub_server import StubLLMServer
+from logic.generator import MessageGenerator
+from logic.llm_client import KaggleClient
+
+OFFERING = "A 12-week data science bootcamp with placement support"
+
+
+def prospect(i):
+    profile = {"name": f"Prospect {i}", "company": f"Company {i % 5}", "role": "Data Analyst",
+               "psychological_profile": {"pain_points": ["Career growth"]}}
+    context = [{"name": f"Alumnus {i}", "role": "Data Scientist", "company": f"Company {i % 5}",
+                "_match_reasons": ["same_company"]}]
+    return profile, context
+
+
+def legacy_layout(messages):
+    """Move the offering + social proof back into the system prompt, as before."""
+    system, user = messages[0]["content"], messages[1]["content"]
+    static = messages[1]["cacheable_prefix"]
+    campaign, profile = user[len(static):].split("REAL INPUT PROFILE:", 1)
+    return [
+        {"role": "system", "content": system + campaign},
+        {"role": "user", "content": static + "REAL INPUT PROFILE:" + profile},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prospects", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, layout in (("legacy layout", legacy_layout), ("prefix-stable layout", None)):
+        with StubLLMServer() as server:
+            client = KaggleClient(base_url=server.url)
+            generator = MessageGenerator(client=client)
+            for i in range(args.prospects):
+                profile, context = prospect(i)
+                messages = generator._build_messages(profile, OFFERING, context)
+                client.chat(layout(messages) if layout else messages, max_new_tokens=20)
+            stats = server.snapshot()
+            ratio = stats["prefix_cached_chars"] / stats["prompt_chars"]
+            hints = stats.get("prefix_hint_hits", 0), stats.get("prefix_hint_misses", 0)
+            print(f"{label:<22} prefix-hit ratio {ratio:6.1%}   hint hits/misses {hints[0]}/{hints[1]}")
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-call cost of building the analyzer and generator prompts: rebuilding the
+static examples every call (what _build_messages used to do) vs rendering
+the precompiled templates from logic.prompts. Reports CPU time per call and
+bytes allocated per call (tracemalloc).
+
+Run from the repo root:
+    python -m benchmarks.bench_prompts --calls 2000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from logic.prompts import build_analyzer_templates, build_generator_templates, get_templates
+
+PROFILE_TEXT = """Priya Sharma
+Senior Backend Engineer @ Acme Robotics
+Experience:
+- Senior Backend Engineer, Acme Robotics (2021-Present)
+- Software Engineer, Flipkart (2017-2021)
+Education:
+- B.Tech, IIT Bombay
+""" * 20
+
+PROFILE = {"name": "Priya Sharma", "company": "Acme Robotics", "role": "Senior Backend Engineer",
+           "psychological_profile": {"pain_points": ["Hiring senior engineers"]}}
+
+
+def analyzer_per_call(templates):
+    return templates["user"].render(profile_text=PROFILE_TEXT[:8000])
+
+
+def generator_per_call(templates):
+    return templates["user"].render(offering="An AI hiring platform", context="",
+                                    profile_json=json.dumps(PROFILE, indent=2))
+
+
+def measure(fn, calls):
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(calls):
+        fn()
+    cpu = (time.process_time() - start) / calls
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    allocated = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return cpu, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [
+        ("analyzer", build_analyzer_templates, analyzer_per_call),
+        ("generator", build_generator_templates, generator_per_call),
+    ]
+    print(f"{'prompt':<10} {'mode':<12} {'CPU/call':>10} {'peak alloc/call':>16}")
+    for name, build, per_call in cases:
+        rebuilt = measure(lambda: per_call(build()), args.calls)
+        cached = measure(lambda: per_call(get_templates(name)), args.calls)
+        for mode, (cpu, allocated) in (("rebuild", rebuilt), ("precompiled", cached)):
+            print(f"{name:<10} {mode:<12} {cpu * 1e6:8.1f}us {allocated / 1024:13.1f}KiB")
+        print(f"{'':<10} {'speedup':<12} {rebuilt[0] / cached[0]:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Latency of analyze_profile / generate_campaign with and without token
+streaming + early JSON termination, against the local stub endpoint.
+
+Run from the repo root:
+    python -m benchmarks.bench_streaming --runs 3 --token-delay 0.002
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.stub_server import StubLLMServer, PROFILE_ANSWER
+from logic.analyzer import ProspectAnalyzer
+from logic.generator import MessageGenerator
+from logic.llm_client import KaggleClient
+
+SAMPLE_PROFILE_TEXT = """
+=== LINKEDIN PROFILE DATA ===
+Priya Sharma
+Senior Backend Engineer at Acme Robotics
+Experience:
+- Senior Backend Engineer, Acme Robotics (2021-Present)
+Education:
+- B.Tech, IIT Bombay
+"""
+
+
+def run(label, fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+        assert "error" not in result, result
+    print(f"{label:<32} mean {statistics.mean(timings):6.2f}s   max {max(timings):6.2f}s")
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--token-delay", type=float, default=0.002, help="Stub seconds per token")
+    args = parser.parse_args()
+
+    with StubLLMServer(token_delay=args.token_delay) as server:
+        for streaming in (False, True):
+            client = KaggleClient(base_url=server.url, streaming=streaming)
+            analyzer = ProspectAnalyzer(client=client)
+            generator = MessageGenerator(client=client)
+            mode = "streaming" if streaming else "blocking"
+
+            server.reset()
+            run(f"analyze_profile ({mode})", lambda: analyzer.analyze_profile(SAMPLE_PROFILE_TEXT), args.runs)
+            run(f"generate_campaign ({mode})",
+                lambda: generator.generate_campaign(PROFILE_ANSWER, "We help teams hire vetted engineers."),
+                args.runs)
+            stats = server.snapshot()
+            print(f"  tokens generated by backend: {stats.get('tokens_generated', 0)}, "
+                  f"streams cancelled: {stats.get('streams_cancelled', 0)}")
+
+
+if __name__ == "__main__":
+    main()
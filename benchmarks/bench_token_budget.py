@@ -0,0 +1,67 @@
+"""
+Profile text sent to the analyzer: the old `cleaned_text[:8000]` cut vs
+section-ranked packing (logic.token_budget) on synthetic multi-source
+profiles. Reports estimated prompt tokens, which sections survive, and
+the packing cost per call.
+
+Run from the repo root:
+    python -m benchmarks.bench_token_budget --budget 2048
+"""
+import argparse
+import time
+
+from logic.token_budget import DEFAULT_INPUT_TOKENS, estimate_tokens, pack_sections, split_sections
+
+JOB = ("Senior Engineer at Company{i} · Full-time\n"
+       "Jan 2015 - Present · Led the platform team building distributed systems and mentoring engineers\n")
+
+
+def profile(experience_jobs, resume_sentences, posts):
+    linkedin = (
+        "=== LINKEDIN PROFILE DATA ===\n"
+        "=== PROFILE HEADER ===\nPriya Sharma\nSenior Backend Engineer @ Acme Robotics\n"
+        "=== ABOUT ===\nBuilding fleet software for warehouse robots.\n"
+        "=== EXPERIENCE ===\n" + "".join(JOB.format(i=i) for i in range(experience_jobs)) +
+        "=== EDUCATION ===\nB.Tech, IIT Bombay\n"
+        "=== SKILLS ===\n" + "\n".join(["Go", "Python", "Kafka", "Postgres"] * 10) + "\n"
+        "=== RECENT_POSTS ===\n" + "\n---\n".join(["Excited to share our Kafka talk!"] * posts) + "\n"
+    )
+    resume = "=== RESUME / CV DATA ===\nPRIYA SHARMA\n" + "Shipped the fleet scheduler in Go. " * resume_sentences
+    notes = "\n=== ADDITIONAL TEXT / NOTES ===\nMet at PyCon, interested in hiring tools.\n"
+    return linkedin + "\n" + resume + notes
+
+
+CASES = [
+    ("short LinkedIn only", profile(3, 0, 2)),
+    ("long LinkedIn + resume", profile(60, 120, 5)),
+    ("huge resume PDF", profile(8, 600, 5)),
+]
+
+
+def names(text):
+    return {s.name for s in split_sections(text) if s.name}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=int, default=DEFAULT_INPUT_TOKENS)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, text in CASES:
+        legacy = text[:8000]
+        packed = pack_sections(text, args.budget)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            pack_sections(text, args.budget)
+        cost = (time.perf_counter() - start) / args.calls
+        all_sections = names(text)
+        print(f"{label}: {estimate_tokens(text)} tokens in, {len(all_sections)} sections")
+        print(f"  [:8000] cut   {estimate_tokens(legacy):5d} tokens, "
+              f"missing {sorted(all_sections - names(legacy)) or '-'}")
+        print(f"  packed        {estimate_tokens(packed):5d} tokens, "
+              f"missing {sorted(all_sections - names(packed)) or '-'}  ({cost * 1e3:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
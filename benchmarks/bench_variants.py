@@ -0,0 +1,54 @@
+"""
+A/B variants: K generate_campaign round-trips, one after another (the old
+"Generate A/B Variant" button, once per variant), vs one generate_variants
+call whose prompts share the generator prefix and go out as one batch.
+
+Run from the repo root:
+    python -m benchmarks.bench_variants --variants 3
+"""
+import argparse
+import time
+
+from benchmarks.stub_server import PROFILE_ANSWER, StubLLMServer
+from logic.generator import MessageGenerator, VARIANT_ANGLES
+from logic.llm_client import KaggleClient
+
+OFFERING = "An AI-driven hiring platform for engineering leaders"
+
+
+def run(labels, batched, args):
+    with StubLLMServer(token_delay=args.token_delay, prefill_delay=args.prefill_delay) as server:
+        client = KaggleClient(base_url=server.url, cache=None)
+        generator = MessageGenerator(client=client)
+        start = time.perf_counter()
+        if batched:
+            results = generator.generate_variants(PROFILE_ANSWER, OFFERING, variants=labels)
+            campaigns = [r["messages"] for r in results]
+        else:
+            campaigns = [generator.generate_campaign(PROFILE_ANSWER, OFFERING, variant_mode=label != "A")
+                         for label in labels]
+        elapsed = time.perf_counter() - start
+        assert all(not generator.failed_channels(c) for c in campaigns), campaigns
+        stats = server.snapshot()
+        client.close()
+    requests_sent = stats.get("generate", 0) + stats.get("generate_stream", 0) + stats.get("generate_batch", 0)
+    cached = stats.get("prefix_cached_chars", 0) / max(stats.get("prompt_chars", 1), 1)
+    return elapsed, requests_sent, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, default=3, choices=range(2, len(VARIANT_ANGLES) + 1))
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--prefill-delay", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    labels = tuple(VARIANT_ANGLES)[:args.variants]
+    for name, batched in (("sequential campaigns", False), ("generate_variants", True)):
+        elapsed, requests_sent, cached = run(labels, batched, args)
+        print(f"{name:22s} {len(labels)} variants  {elapsed:5.2f}s  "
+              f"{requests_sent} request(s)  prefix cached {cached:4.0%}")
+
+
+if __name__ == "__main__":
+    main()
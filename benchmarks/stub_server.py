@@ -0,0 +1,297 @@
+"""
+Local stand-in for the Kaggle notebook LLM endpoint, used by the benchmarks
+and for manual testing without a GPU.
+
+    python -m benchmarks.stub_server --port 8000 --token-delay 0.01 --capacity 1
+
+Endpoints:
+    POST /generate         {"prompt", "max_new_tokens", "temperature"} -> {"response": "..."}
+    POST /generate_stream  same body; Server-Sent Events `data: {"token": "..."}` ... `data: [DONE]`
+                           (unless stream=False)
+    POST /generate_batch   {"prompts": [...], ...} -> {"responses": [...]} (unless batch=False)
+    GET  /health           liveness probe
+    GET  /stats            request counters
+
+Every completion is a canned JSON answer followed by filler tokens up to
+max_new_tokens, like a model that keeps talking after the object closes.
+Each token costs `token_delay` seconds, and at most `capacity` completions
+run at once (a single notebook GPU serves one prompt at a time). With
+`spike_prob`, that fraction of requests runs `spike_factor` times slower to
+mimic a long latency tail. `prefill_delay` adds a cost per prompt token
+(~4 characters) not already in the prefix cache.
+
+Like a vLLM-style automatic prefix cache, the stub remembers prompts in
+`prefix_block`-character blocks and counts how many leading characters of
+each prompt were already cached (`prefix_cached_chars` / `prompt_chars`),
+plus hits and misses on the optional `cache_prefix_id` hint.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROFILE_ANSWER = {
+    "name": "Priya Sharma",
+    "company": "Acme Robotics",
+    "role": "Senior Backend Engineer",
+    "industry": "Robotics / Technology",
+    "seniority": "Senior",
+    "education": ["B.Tech, IIT Bombay"],
+    "certifications": [],
+    "recent_activity": ["Posted about scaling Kafka consumers"],
+    "psychological_profile": {
+        "decision_authority": "Medium",
+        "pain_points": ["Hiring senior engineers"],
+        "goals": ["Ship the new fleet platform"],
+        "communication_preference": "Technical"
+    },
+    "communication_style": {"formality": "Professional", "tone": "Direct", "vocabulary": "Technical"},
+    "key_insights": ["Hands-on engineer", "Active writer"],
+    "personalization_hooks": ["Mention Kafka post"]
+}
+
+CAMPAIGN_ANSWER = {
+    "email": {"subject": "Your Kafka post", "body": "Hi Priya,\n\nLoved your post on Kafka consumers..."},
+    "linkedin": "Hi Priya, enjoyed your Kafka write-up...",
+    "whatsapp": "Hi Priya, quick note about your Kafka post...",
+    "sms": "Priya, saw your Kafka post...",
+    "instagram": "Hey Priya, great write-up on Kafka...",
+    "analysis": {"personalization_score": "8/10", "reasoning": "stub"}
+}
+
+FILLER = " Let me know if you would like me to adjust the tone or add more detail."
+
+
+def fake_completion(prompt):
+    """Pick a canned answer based on which prompt template was used."""
+    channel = re.search(r'ONLY THE "(\w+)" MESSAGE IS NEEDED', prompt)
+    if channel:
+        answer = {channel.group(1): CAMPAIGN_ANSWER.get(channel.group(1), "")}
+    elif "FUSED JSON OUTPUT" in prompt:
+        answer = {"profile": PROFILE_ANSWER, "messages": CAMPAIGN_ANSWER}
+    elif "REAL JSON OUTPUT" in prompt:
+        answer = CAMPAIGN_ANSWER
+    else:
+        answer = PROFILE_ANSWER
+    return json.dumps(answer, indent=2)
+
+
+def tokenize(text):
+    """Rough whitespace-attached tokens, good enough to pace a stream."""
+    return re.findall(r"\s*\S+", text)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _tokens_for(self, payload):
+        tokens = tokenize(fake_completion(payload.get("prompt", "")))
+        max_new_tokens = int(payload.get("max_new_tokens", 1000))
+        filler = tokenize(FILLER)
+        while len(tokens) < max_new_tokens:
+            tokens.extend(filler)
+        return tokens[:max_new_tokens]
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(self.server.stub.snapshot())
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        stub = self.server.stub
+        payload = self._read_json()
+        prefill = 0.0
+        if self.path == "/generate_batch" and stub.batch:
+            for prompt in payload.get("prompts", []):
+                prefill += stub.prefix_lookup(prompt, payload)
+        elif self.path in ("/generate", "/generate_stream"):
+            prefill = stub.prefix_lookup(payload.get("prompt", ""), payload)
+
+        if self.path == "/generate":
+            stub.count("generate")
+            tokens = self._tokens_for(payload)
+            with stub.slots:
+                time.sleep(prefill + stub.per_token_delay() * len(tokens))
+            stub.count("tokens_generated", len(tokens))
+            self._send_json({"response": "".join(tokens)})
+        elif self.path == "/generate_batch" and stub.batch:
+            # One forward pass for the whole batch: costs about as much as its longest member
+            stub.count("generate_batch")
+            stub.count("batched_prompts", len(payload.get("prompts", [])))
+            batch = [self._tokens_for(dict(payload, prompt=p)) for p in payload.get("prompts", [])]
+            with stub.slots:
+                time.sleep(prefill + stub.per_token_delay() * max((len(t) for t in batch), default=0))
+            stub.count("tokens_generated", sum(len(t) for t in batch))
+            self._send_json({"responses": ["".join(t) for t in batch]})
+        elif self.path == "/generate_stream" and stub.stream:
+            stub.count("generate_stream")
+            with stub.slots:
+                time.sleep(prefill)
+                self._stream(self._tokens_for(payload))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _stream(self, tokens):
+        stub = self.server.stub
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        delay = stub.per_token_delay()
+        try:
+            for token in tokens + [None]:
+                data = "[DONE]" if token is None else json.dumps({"token": token})
+                event = f"data: {data}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+                if token is not None:
+                    sent += 1
+                    time.sleep(delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hung up: a real backend would stop generating here
+            stub.count("streams_cancelled")
+            self.close_connection = True
+        stub.count("tokens_generated", sent)
+
+
+class StubLLMServer:
+    """Threaded stub server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, host="127.0.0.1", port=0, token_delay=0.0, capacity=1,
+                 spike_prob=0.0, spike_factor=10.0, batch=True, stream=True, prefix_block=256,
+                 prefix_cache_blocks=4096, prefill_delay=0.0):
+        self.token_delay = token_delay
+        self.prefill_delay = prefill_delay
+        self.batch = batch
+        self.stream = stream
+        self.prefix_block = prefix_block
+        self.prefix_cache_blocks = prefix_cache_blocks
+        self._blocks = OrderedDict()  # chained block hash -> None, LRU
+        self._prefix_ids = set()
+        self.spike_prob = spike_prob
+        self.spike_factor = spike_factor
+        self.slots = threading.BoundedSemaphore(capacity)
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def per_token_delay(self):
+        """Token delay for one request, occasionally spiking."""
+        if self.spike_prob and random.random() < self.spike_prob:
+            self.count("spikes")
+            return self.token_delay * self.spike_factor
+        return self.token_delay
+
+    def prefix_lookup(self, prompt, payload):
+        """
+        Count how much of `prompt` a prefix cache would already hold, then
+        cache it. Returns the prefill time for the uncached part.
+        """
+        cached = 0
+        missed = False
+        chain = 0
+        with self._lock:
+            for start in range(0, len(prompt) - self.prefix_block + 1, self.prefix_block):
+                chain = hash((chain, prompt[start:start + self.prefix_block]))
+                if not missed and chain in self._blocks:
+                    cached += self.prefix_block
+                    self._blocks.move_to_end(chain)
+                else:
+                    missed = True
+                    self._blocks[chain] = None
+            while len(self._blocks) > self.prefix_cache_blocks:
+                self._blocks.popitem(last=False)
+            prefix_id = payload.get("cache_prefix_id")
+            hint_hit = prefix_id in self._prefix_ids
+            if prefix_id:
+                self._prefix_ids.add(prefix_id)
+        self.count("prompt_chars", len(prompt))
+        self.count("prefix_cached_chars", cached)
+        if prefix_id:
+            self.count("prefix_hint_hits" if hint_hit else "prefix_hint_misses")
+        return (len(prompt) - cached) / 4 * self.prefill_delay
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub LLM endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds per generated token")
+    parser.add_argument("--capacity", type=int, default=1, help="Completions served concurrently")
+    parser.add_argument("--spike-prob", type=float, default=0.0, help="Fraction of slow requests")
+    parser.add_argument("--spike-factor", type=float, default=10.0, help="Slowdown of a slow request")
+    parser.add_argument("--no-batch", action="store_true", help="Disable /generate_batch (404)")
+    parser.add_argument("--prefill-delay", type=float, default=0.0, help="Seconds per uncached prompt token")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, token_delay=args.token_delay, capacity=args.capacity,
+                           spike_prob=args.spike_prob, spike_factor=args.spike_factor,
+                           batch=not args.no_batch, prefill_delay=args.prefill_delay)
+    print(f"Stub LLM endpoint listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
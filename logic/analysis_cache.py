@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Persistent cache of structured profiles from ProspectAnalyzer, keyed by
+    a hash of the cleaned profile text (and analyzer settings), so a prospect
+    seen in an earlier campaign isn't re-analyzed; only generation, which
+    depends on the offering, runs again.
+    Every entry records the analyzer prompt version it was produced with.
+    Entries from another version are never returned and are purged when the
+    cache is opened with a new one; entries also expire after `ttl_seconds`.
+    Pass the analyzer templates' version (logic.prompts.prompt_version("analyzer")).
+    """
+
+    def __init__(self, prompt_version, path="analysis_cache.db", ttl_seconds=30 * 24 * 3600):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "invalidated": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "key TEXT PRIMARY KEY, prompt_version TEXT, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.invalidate(keep_version=self.prompt_version)
+        if ttl_seconds:
+            self._conn.execute("DELETE FROM analyses WHERE created < ?", (time.time() - ttl_seconds,))
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(cleaned_text, settings=None):
+        """Hash of the cleaned profile text plus anything else that shapes the prompt."""
+        raw = json.dumps([cleaned_text, settings], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached profile dict for `key` (a fresh copy), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, prompt_version, created FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if (row is None or row[1] != self.prompt_version
+                    or (self.ttl_seconds and time.time() - row[2] > self.ttl_seconds)):
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return json.loads(row[0])
+
+    def set(self, key, profile):
+        """Store a profile dict under the current prompt version."""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analyses (key, prompt_version, value, created) VALUES (?, ?, ?, ?)",
+                    (key, self.prompt_version, json.dumps(profile, ensure_ascii=False), time.time()),
+                )
+                self._conn.commit()
+                self._stats["writes"] += 1
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Analysis cache write failed: {e}")
+
+    def invalidate(self, key=None, keep_version=None):
+        """
+        Drop one entry (`key`), every entry not made with `keep_version`,
+        or everything if neither is given. Returns the number dropped.
+        """
+        with self._lock:
+            if key is not None:
+                cursor = self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            elif keep_version is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM analyses WHERE prompt_version IS NOT ?", (keep_version,)
+                )
+            else:
+                cursor = self._conn.execute("DELETE FROM analyses")
+            self._conn.commit()
+            self._stats["invalidated"] += cursor.rowcount
+            return cursor.rowcount
+
+    def clear(self):
+        """Drop every cached analysis."""
+        self.invalidate()
+
+    def stats(self):
+        """Hit/miss counters plus the number of stored analyses."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
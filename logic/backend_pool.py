@@ -0,0 +1,226 @@
+import logging
+import re
+import statistics
+import threading
+
+from logic.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """One LLM endpoint, its circuit breaker and its live routing stats."""
+
+    def __init__(self, url, breaker):
+        self.url = url.rstrip('/')
+        self.breaker = breaker
+        self.outstanding = 0
+        self.ewma_latency = None
+        self.class_latency = {}  # request class -> [EWMA latency, samples]
+        self.requests = 0
+        self.failures = 0
+        self.batch_supported = None  # Has a /generate_batch route? Unknown until tried
+        self.stream_supported = None  # Has a /generate_stream route? Unknown until tried
+
+    def is_ejected(self):
+        return not self.breaker.available()
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "batch": self.batch_supported,
+            "stream": self.stream_supported,
+            "circuit": self.breaker.state,
+            "retry_after": round(self.breaker.retry_after(), 1),
+        }
+
+
+class BackendPool:
+    """
+    Routes requests across several LLM endpoints.
+    - strategy "least_outstanding": fewest in-flight requests, ties by latency
+    - strategy "latency": lowest EWMA latency weighted by in-flight requests
+    Each endpoint has a CircuitBreaker: `max_failures` consecutive failures,
+    a failed health check, or latency `slow_factor` times the median of its
+    peers open it for `eject_seconds`, after which one probe request decides
+    whether it closes again. Latency is only compared within a request class
+    (route and max_new_tokens, as passed to release()) and once the endpoint
+    and its peers have `min_samples` requests of that class each, so a single
+    long reduce call or a full-length stream next to early-stopped ones does
+    not look slow. With every circuit open, acquire() returns None
+    so callers can fail fast.
+    """
+
+    def __init__(self, urls, strategy="least_outstanding", max_failures=3, eject_seconds=30,
+                 slow_factor=3.0, ewma_alpha=0.1, min_samples=5, health_path="/health"):
+        self.backends = [
+            Backend(url, CircuitBreaker(failure_threshold=max_failures, recovery_timeout=eject_seconds))
+            for url in self.parse_urls(urls)
+        ]
+        if not self.backends:
+            raise ValueError("BackendPool needs at least one endpoint URL")
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+        self.ewma_alpha = ewma_alpha
+        self.min_samples = min_samples
+        self.health_path = health_path
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stop_health = threading.Event()
+
+    @staticmethod
+    def parse_urls(urls):
+        """Accept a list or a string of URLs separated by newlines, commas or spaces."""
+        if isinstance(urls, str):
+            urls = re.split(r'[\s,]+', urls)
+        seen = []
+        for url in urls:
+            url = (url or "").strip().rstrip('/')
+            if url and url not in seen:
+                seen.append(url)
+        return seen
+
+    @property
+    def key(self):
+        """Stable identity of the pool (used in cache keys)."""
+        return "|".join(sorted(b.url for b in self.backends))
+
+    def _score(self, backend):
+        latency = backend.ewma_latency or 0.0
+        if self.strategy == "latency":
+            return (latency * (backend.outstanding + 1), backend.outstanding)
+        return (backend.outstanding, latency)
+
+    def acquire(self, exclude=()):
+        """
+        Pick a backend whose circuit lets a request through and count it as in
+        flight; release() it when done. Returns None if every circuit is open.
+        """
+        with self._lock:
+            candidates = sorted((b for b in self.backends if b.url not in exclude), key=self._score)
+            for backend in candidates:
+                if backend.breaker.allow_request():
+                    backend.outstanding += 1
+                    backend.requests += 1
+                    return backend
+            return None
+
+    def available(self):
+        """True if at least one endpoint would accept a request now."""
+        return any(b.breaker.available() for b in self.backends)
+
+    def retry_after(self):
+        """Seconds until some endpoint accepts requests again."""
+        return min(b.breaker.retry_after() for b in self.backends)
+
+    def release(self, backend, latency=None, ok=True, request_class=None):
+        """
+        Record the outcome of a request routed to `backend`. `request_class`
+        (e.g. ("generate", max_new_tokens)) groups requests whose latencies
+        are comparable; without it the latency only feeds routing.
+        """
+        with self._lock:
+            backend.outstanding = max(backend.outstanding - 1, 0)
+            if ok:
+                backend.breaker.record_success()
+                if latency is not None:
+                    if backend.ewma_latency is None:
+                        backend.ewma_latency = latency
+                    else:
+                        backend.ewma_latency += self.ewma_alpha * (latency - backend.ewma_latency)
+                    if request_class is not None:
+                        self._record_class_latency(backend, request_class, latency)
+                        self._eject_if_slow(backend, request_class)
+            else:
+                backend.failures += 1
+                was_open = backend.breaker.state == CircuitBreaker.OPEN
+                backend.breaker.record_failure()
+                if not was_open and backend.breaker.state == CircuitBreaker.OPEN:
+                    logger.warning(f"Circuit opened for LLM backend {backend.url} for {self.eject_seconds}s")
+
+    def _eject(self, backend, reason):
+        """Caller holds the lock."""
+        if len(self.backends) == 1:
+            return  # Slow or flaky is still better than nothing
+        backend.breaker.trip(self.eject_seconds)
+        logger.warning(f"Ejecting LLM backend {backend.url} for {self.eject_seconds}s: {reason}")
+
+    def _record_class_latency(self, backend, request_class, latency):
+        """Caller holds the lock."""
+        stats = backend.class_latency.setdefault(request_class, [latency, 0])
+        stats[0] += self.ewma_alpha * (latency - stats[0])
+        stats[1] += 1
+
+    def _eject_if_slow(self, backend, request_class):
+        """Caller holds the lock."""
+        latency, samples = backend.class_latency[request_class]
+        if samples < self.min_samples:
+            return
+        peers = [b.class_latency[request_class][0] for b in self.backends
+                 if b is not backend and not b.is_ejected()
+                 and b.class_latency.get(request_class, (None, 0))[1] >= self.min_samples]
+        if not peers:
+            return
+        median = statistics.median(peers)
+        if median > 0 and latency > self.slow_factor * median:
+            self._eject(backend, f"latency {latency:.1f}s vs median {median:.1f}s "
+                                 f"for {request_class[0]} requests of {request_class[1]} tokens")
+
+    def health_check(self, session, timeout=5):
+        """
+        Probe every endpoint once.
+        - 2xx: alive. An open circuit moves to half-open so the next real
+          request probes it; only that request's success closes it.
+        - 5xx, connection errors and tunnel error pages (ngrok answers an
+          offline tunnel with a 404 carrying an `ngrok-error-code` header):
+          the endpoint is ejected.
+        - Anything else (e.g. 404 because the notebook has no health route)
+          says nothing either way and leaves the circuit as it is.
+        Returns {url: "ok" | "unknown: ..." | error message}.
+        """
+        results = {}
+        for backend in self.backends:
+            try:
+                response = session.get(f"{backend.url}{self.health_path}", timeout=timeout)
+                tunnel_error = response.headers.get("ngrok-error-code")
+                if tunnel_error:
+                    raise RuntimeError(f"tunnel error {tunnel_error} (HTTP {response.status_code})")
+                if response.status_code >= 500:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+                if not 200 <= response.status_code < 300:
+                    results[backend.url] = f"unknown: HTTP {response.status_code} from {self.health_path}"
+                    continue
+                results[backend.url] = "ok"
+                if backend.breaker.half_open():
+                    logger.info(f"LLM backend {backend.url} passed health check, probing it with the next request")
+            except Exception as e:
+                results[backend.url] = f"Error: {e}"
+                # An unreachable endpoint is opened even if it is the only one
+                backend.breaker.trip(self.eject_seconds)
+                logger.warning(f"LLM backend {backend.url} failed health check: {e}")
+        return results
+
+    def start_health_checks(self, session, interval=30):
+        """Run health_check every `interval` seconds on a daemon thread."""
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while not self._stop_health.wait(interval):
+                self.health_check(session)
+
+        self._health_thread = threading.Thread(target=loop, name="llm-health-check", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop_health.set()
+
+    def stats(self):
+        with self._lock:
+            return [b.to_dict() for b in self.backends]
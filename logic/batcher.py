@@ -0,0 +1,140 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces prompts submitted from any thread into micro-batches for the
+    backend's /generate_batch route. A batch is sent once it holds
+    `max_batch_size` prompts or the oldest prompt has waited `max_wait_ms`.
+    Prompts with different generation params are never mixed in one batch.
+    Results are demultiplexed back to each caller's Future. close() stops
+    the loop and fails whatever is still queued.
+    """
+
+    _STOP = object()
+    CLOSED_ERROR = "Error: LLM client closed"
+
+    def __init__(self, client, max_batch_size=8, max_wait_ms=20):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"prompts": 0, "batches": 0, "fallback_prompts": 0}
+
+    def submit(self, prompt, max_new_tokens, temperature):
+        """Queue one prompt; returns a Future resolving to the generated text."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_result(self.CLOSED_ERROR)
+                return future
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="llm-batcher", daemon=True)
+                self._thread.start()
+            self._queue.put((prompt, max_new_tokens, temperature, future))
+        return future
+
+    def close(self, timeout=5):
+        """Stop the batching thread and fail queued prompts with an error."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._queue.put(self._STOP)
+        if thread is not None:
+            thread.join(timeout)
+        self._fail_queued()
+
+    def _fail_queued(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not self._STOP:
+                self._fail([item[3]], self.CLOSED_ERROR)
+
+    @staticmethod
+    def _fail(futures, error):
+        for future in futures:
+            if not future.done():
+                future.set_result(error)
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is self._STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            groups = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            for (max_new_tokens, temperature), items in groups.items():
+                # Dispatch off-thread so the loop keeps collecting the next batch
+                futures = [item[3] for item in items]
+                try:
+                    task = self.client._get_executor().submit(self._dispatch, items, max_new_tokens, temperature)
+                except RuntimeError as e:  # Executor already shut down
+                    logger.warning(f"Micro-batch not sent: {e}")
+                    self._fail(futures, self.CLOSED_ERROR)
+                    continue
+                # Cancelled by the client's shutdown before it ran
+                task.add_done_callback(
+                    lambda task, futures=futures: task.cancelled() and self._fail(futures, self.CLOSED_ERROR))
+            if stopping:
+                return
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def snapshot(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _dispatch(self, items, max_new_tokens, temperature):
+        prompts = [item[0] for item in items]
+        futures = [item[3] for item in items]
+        try:
+            texts = self.client._request_batch(prompts, max_new_tokens, temperature)
+            if texts is None:
+                # No endpoint with a batch route available: parallel single calls instead
+                self._count("fallback_prompts", len(prompts))
+                # (own short-lived pool: waiting on the shared one from inside it could deadlock)
+                with ThreadPoolExecutor(max_workers=len(prompts)) as singles:
+                    texts = list(singles.map(lambda p: self.client._request(p, max_new_tokens, temperature),
+                                             prompts))
+            else:
+                self._count("batches")
+            self._count("prompts", len(prompts))
+            for future, text in zip(futures, texts):
+                future.set_result(text)
+        except Exception as e:
+            logger.error(f"Micro-batch dispatch failed: {e}")
+            self._fail(futures, f"Error: {str(e)}")
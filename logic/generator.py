@@ -1,14 +1,31 @@
 import requests
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
 from logic.llm_client import KaggleClient
+from logic.prompts import get_templates
+from logic.schema import normalize_messages
+
+CHANNELS = ("email", "linkedin", "whatsapp", "sms", "instagram")
+# Completion budget per single-channel call (the full campaign gets 1000)
+CHANNEL_MAX_TOKENS = {"email": 500, "linkedin": 300, "whatsapp": 300, "sms": 250, "instagram": 300}
+# A/B test angles; "A" is the plain campaign
+VARIANT_ANGLES = {
+    "A": "",
+    "B": "IMPORTANT: This is an A/B test variant. Try a DIFFERENT angle than usual (e.g., if you usually lead with value, lead with a question, or be more direct).",
+    "C": "IMPORTANT: This is an A/B test variant. Lead with the strongest personalization hook and keep every message noticeably shorter than usual.",
+    "D": "IMPORTANT: This is an A/B test variant. Lead with social proof or a concrete result, then make a low-effort ask.",
+}
+
 
 class MessageGenerator:
-    def __init__(self, llm_url="https://ununited-laudable-anya.ngrok-free.dev"):
-        self.client = KaggleClient(base_url=llm_url)
+    def __init__(self, llm_url="https://ununited-laudable-anya.ngrok-free.dev", client=None):
+        # Pass a shared KaggleClient to reuse its pooled connections
+        self.client = client or KaggleClient(base_url=llm_url)
 
     def generate_campaign(self, profile_data, my_offering, context_prospects=None, variant_mode=False):
         """
@@ -16,7 +33,152 @@ class MessageGenerator:
         If context_prospects is provided, uses them as "success stories".
         If variant_mode is True, generates an alternative "B" version.
         """
-        
+        messages = self._build_messages(profile_data, my_offering, context_prospects, variant_mode)
+
+        try:
+            response_text = self.client.chat(messages, stop_at_json=True)
+            return self._parse_response(response_text)
+        except Exception as e:
+            logger.error(f"Generation failed: {e}")
+            return {"error": str(e)}
+
+    async def agenerate_campaign(self, profile_data, my_offering, context_prospects=None, variant_mode=False):
+        """Async version of generate_campaign; runs under the client's concurrency limit."""
+        messages = self._build_messages(profile_data, my_offering, context_prospects, variant_mode)
+
+        try:
+            response_text = await self.client.achat(messages, stop_at_json=True)
+            return self._parse_response(response_text)
+        except Exception as e:
+            logger.error(f"Generation failed: {e}")
+            return {"error": str(e)}
+
+    def generate_variants(self, profile_data, my_offering, context_prospects=None, variants=("A", "B")):
+        """
+        Generates one campaign per variant label (see VARIANT_ANGLES) in a
+        single round-trip: the prompts share everything up to the angle
+        instruction and are sent together as one batched call.
+        Returns [{"variant": "A", "messages": {...}}, ...] in label order.
+        """
+        prompts = [self._build_messages(profile_data, my_offering, context_prospects, variant=label)
+                   for label in variants]
+        try:
+            responses = self.client.chat_many(prompts)
+        except Exception as e:
+            logger.error(f"Variant generation failed: {e}")
+            responses = [f"Error: {str(e)}"] * len(prompts)
+        return [{"variant": label, "messages": self._parse_response(text)}
+                for label, text in zip(variants, responses)]
+
+    def generate_channels(self, profile_data, my_offering, context_prospects=None, channels=CHANNELS,
+                          on_channel=None, use_cache=True):
+        """
+        Generates each channel with its own (smaller) LLM call, all in
+        parallel, so the first message is ready long before a full campaign
+        would be. `on_channel(channel, message, seconds)` is called on the
+        caller's thread as each one finishes, e.g. to render the email early.
+        Returns {"messages": {...}, "failed": [channels], "timings":
+        {"first_channel": s, "<channel>": s, "total": s}}.
+        use_cache=False skips the client's response cache (see regenerate_channels).
+        """
+        context_str = self._build_context(profile_data, context_prospects)
+        started = time.time()
+        result = {"messages": {}, "failed": [], "timings": {}}
+        workers = min(len(channels), self.client.max_concurrency) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate-channel") as pool:
+            futures = {
+                pool.submit(self._generate_channel, profile_data, my_offering, context_str, channel,
+                            use_cache): channel
+                for channel in channels
+            }
+            for future in as_completed(futures):
+                channel = futures[future]
+                try:
+                    message = future.result()
+                except Exception as e:
+                    logger.error(f"Generation of {channel} failed: {e}")
+                    message = None
+                elapsed = time.time() - started
+                result["timings"][channel] = elapsed
+                if self._channel_ok(channel, message):
+                    result["messages"][channel] = message
+                    result["timings"].setdefault("first_channel", elapsed)
+                    if on_channel:
+                        on_channel(channel, message, elapsed)
+                else:
+                    result["failed"].append(channel)
+        result["failed"].sort(key=channels.index)
+        result["timings"]["total"] = time.time() - started
+        return result
+
+    def regenerate_channels(self, profile_data, my_offering, messages, channels, context_prospects=None,
+                            on_channel=None):
+        """
+        Regenerates only `channels` (e.g. empty or hallucinated ones) and
+        merges them into a copy of `messages`; everything else is kept.
+        The prompts are usually the ones that just produced the bad answers,
+        so these calls bypass the response cache.
+        Returns the same shape as generate_channels.
+        """
+        regenerated = self.generate_channels(profile_data, my_offering, context_prospects,
+                                             channels=tuple(channels), on_channel=on_channel, use_cache=False)
+        merged = {k: v for k, v in (messages or {}).items() if k not in ("error", "raw_response")}
+        merged.update(regenerated["messages"])
+        regenerated["messages"] = merged
+        return regenerated
+
+    @staticmethod
+    def failed_channels(messages, channels=CHANNELS):
+        """Channels missing or empty in a messages dict (all of them for an error result)."""
+        messages = messages or {}
+        return [c for c in channels if not MessageGenerator._channel_ok(c, messages.get(c))]
+
+    @staticmethod
+    def _channel_ok(channel, message):
+        if channel == "email":
+            return isinstance(message, dict) and bool(str(message.get("body") or "").strip())
+        return isinstance(message, str) and bool(message.strip())
+
+    def _generate_channel(self, profile_data, my_offering, context_str, channel, use_cache=True):
+        """One single-channel call; returns that channel's message or None."""
+        templates = get_templates("channel")
+        system_prompt = templates["system"]
+        user_prompt = templates["user"].render(offering=my_offering, context=context_str,
+                                               profile_json=json.dumps(profile_data, indent=2),
+                                               channel=channel)
+        messages = [
+            {"role": "system", "content": system_prompt, "cacheable_prefix": system_prompt},
+            {"role": "user", "content": user_prompt, "cacheable_prefix": templates["user"].static_prefix}
+        ]
+        response_text = self.client.chat(messages, max_new_tokens=CHANNEL_MAX_TOKENS.get(channel, 300),
+                                         stop_at_json=True, use_cache=use_cache)
+        parsed = self._parse_response(response_text)
+        return parsed.get(channel)
+
+    def _build_messages(self, profile_data, my_offering, context_prospects=None, variant_mode=False, variant=None):
+        """Build the system + user chat messages for campaign generation (one A/B variant if given)."""
+        context_str = self._build_context(profile_data, context_prospects)
+        if variant is None and variant_mode:
+            variant = "B"
+
+        values = {"offering": my_offering, "context": context_str,
+                  "profile_json": json.dumps(profile_data, indent=2)}
+        if VARIANT_ANGLES.get(variant):
+            templates = get_templates("variant")
+            values.update(label=variant, instruction=VARIANT_ANGLES[variant])
+        else:
+            templates = get_templates("generator")
+        system_prompt = templates["system"]
+        user_prompt = templates["user"].render(**values)
+
+        # Everything before the first per-call slot is identical across calls
+        return [
+            {"role": "system", "content": system_prompt, "cacheable_prefix": system_prompt},
+            {"role": "user", "content": user_prompt, "cacheable_prefix": templates["user"].static_prefix}
+        ]
+
+    def _build_context(self, profile_data, context_prospects=None):
+        """Social-proof instructions from similar KB prospects ("" if none apply)."""
         context_str = ""
         if context_prospects:
             company_raw = profile_data.get('company') if isinstance(profile_data, dict) else ''
@@ -82,82 +244,16 @@ class MessageGenerator:
             
             if parts:
                 context_str = "\nSOCIAL PROOF FROM KNOWLEDGE BASE:\n" + "\n".join(parts)
+        return context_str
 
-        variant_instruction = ""
-        if variant_mode:
-            variant_instruction = "IMPORTANT: This is an A/B test variant. Try a DIFFERENT angle than usual (e.g., if you usually lead with value, lead with a question, or be more direct)."
-
-        system_prompt = f"""
-        You are a world-class SDR and Copywriter.
-        Your task is to generate hyper-personalized outreach messages that feel warm and well-researched.
-        
-        OFFERING CONTEXT:
-        "{my_offering}"
-        
-        CRITICAL RULES:
-        1. MESSAGE LENGTH: ALL platform messages (LinkedIn, WhatsApp, SMS, Instagram) MUST be 4-5 lines minimum (not counting greeting/signature).
-           - Each message should be comprehensive and compelling. Do NOT generate 1-liners.
-        2. NO FLUFF: Don't just list facts. Weave them into a narrative. 
-        3. INTEGRATION: You must fluidly bridge the prospect's specific details (pain points, recent activity) with the 'OFFERING CONTEXT'. Do not just paste the offering; explain *why* it matters to *them*.
-        4. TONE: Professional yet conversational.
-        5. CALL TO ACTION: Clear next step.
-        {context_str}
-        """
+    def _parse_response(self, response_text):
+        """Extract the messages JSON from the raw LLM response."""
+        if response_text.startswith("Error:"):
+            return {"error": response_text}
 
-        example_profile = json.dumps({
-            "name": "Sarah Jones",
-            "company": "CloudScale",
-            "role": "VP Marketing",
-            "education": ["MBA, Stanford"],
-            "certifications": ["Google Analytics"],
-            "recent_activity": ["Posted about AI in Marketing"],
-            "psychological_profile": {"pain_points": ["Scaling growth", "Data overload"]},
-            "key_insights": ["Loves hiking"],
-            "personalization_hooks": ["Mention Stanford", "Discuss AI post"]
-        }, indent=2)
-
-        example_output = json.dumps({
-            "email": {
-                "subject": "Thoughts on your AI post + Stanford connection?",
-                "body": "Hi Sarah,\n\nI was just reading your recent post about AI in Marketing - couldn't agree more about the need for automation. It's clear you're forward-thinking.\n\nNoticed you're a Stanford MBA grad as well (impressive program). That rigorous analytical background really shows in your strategic approach.\n\nGiven your focus on scaling growth at CloudScale and handling data overload, our AI-driven talent platform can help you build the right team to execute that vision without the headache.\n\nWould you be open to a quick chat next Tuesday about how we can support your scaling efforts?"
-            },
-            "linkedin": "Hi Sarah, loved your thoughts on AI in Marketing. As a fellow data-nerd (saw your Google Analytics cert!), I wanted to connect.\n\nI see you're tackling growth scaling at CloudScale. It's a tough challenge, but crucial.",
-            "whatsapp": "Hi Sarah, saw your post on AI. We're building something similar for scaling teams...\n\nYour background at Stanford suggests you value high-leverage tools. Our platform aligns perfectly with that philosophy.\n\nWe help leaders like you cut through the noise and find top-tier talent instantly.\n\nWould love to send over a case study if you're interested? Let me know!",
-            "sms": "Sarah, quick question about your AI post. It really resonated with our team's mission.\n\nWe specialize in helping VPs like you scale growth without the burnout.\n\nGiven your focus on efficiency, I think our solution could be a game-changer for CloudScale.\n\nFree for a 5-min call this week to discuss strategies?",
-            "instagram": "Hey Sarah, huge fan of your content on AI - it's spot on!\n\nI noticed you're also into hiking; that's awesome. We believe in work-life balance too.\n\nAt our core, we help marketing leaders automate the heavy lifting so they can focus on strategy (and trails!).\n\nCheck out our link if you need help scaling your team effectively.",
-            "analysis": {
-                "personalization_score": "9.5/10",
-                "reasoning": "weaved in post + education + certs naturally."
-            }
-        }, indent=2)
-
-        user_prompt = f"""
-        EXAMPLE INPUT PROFILE:
-        {example_profile}
-        
-        EXAMPLE JSON OUTPUT:
-        {example_output}
-        
-        REAL INPUT PROFILE:
-        {json.dumps(profile_data, indent=2)}
-        
-        REAL JSON OUTPUT:
-        """
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        json_res = self.client.extract_json(response_text)
+        if json_res:
+            return normalize_messages(json_res)
 
-        try:
-            response_text = self.client.chat(messages)
-            
-            json_res = self.client.extract_json(response_text)
-            if json_res:
-                return json_res
-
-            # Fallback or return raw text if that's what we got (though analyzer expects dict)
-            return {"error": "Failed to parse JSON response", "raw_response": response_text}
-        except Exception as e:
-            logger.error(f"Generation failed: {e}")
-            return {"error": str(e)}
+        # Fallback or return raw text if that's what we got (though analyzer expects dict)
+        return {"error": "Failed to parse JSON response", "raw_response": response_text}
@@ -0,0 +1,138 @@
+import json
+import re
+
+# Characters the scanner has to look at; everything else is skipped by the regex engine
+_SPECIAL_CHARS = re.compile(r'[{}"\\]')
+_BRACES = re.compile(r'[{}]')
+
+_DECODER = json.JSONDecoder()
+
+
+def _balanced_spans(text, string_aware=True):
+    """
+    Single pass over `text` returning every balanced {...} span as (start, end),
+    in the order the spans close. With `string_aware`, braces inside JSON
+    string literals are ignored. Quotes only count inside an open object, so
+    stray apostrophes/quotes in surrounding prose can't swallow the output.
+    """
+    spans = []
+    stack = []
+    in_string = False
+    skip_to = -1
+    pattern = _SPECIAL_CHARS if string_aware else _BRACES
+
+    for match in pattern.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue  # Character escaped by a preceding backslash
+        ch = text[i]
+
+        if in_string:
+            if ch == '\\':
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '{':
+            stack.append(i)
+        elif ch == '}':
+            if stack:
+                start = stack.pop()
+                spans.append((start, i + 1))
+        elif ch == '"' and stack:
+            in_string = True
+
+    return spans
+
+
+def _last_valid_object(text, spans):
+    """
+    Walk spans from the last one to close backwards and return the first that
+    parses, as (obj, end). A span closing later either encloses or follows
+    every earlier one, so this is the last top-level valid object — same
+    answer as the old left-to-right scan that skipped over nested objects.
+    """
+    for start, end in reversed(spans):
+        try:
+            obj, obj_end = _DECODER.raw_decode(text, start)
+        except ValueError:
+            continue
+        if obj_end == end and isinstance(obj, dict):
+            return obj, end
+    return None, -1
+
+
+def extract_json(text):
+    """
+    Extracts the LAST valid JSON object from the text in linear scan time.
+    The parser is only invoked on balanced spans. Two passes are made: one
+    aware of string literals (handles braces inside values) and one plain
+    brace-matching pass (handles stray quotes in malformed output); the
+    object that ends later wins, string-aware on ties.
+    """
+    if not text:
+        return None
+
+    obj, end = _last_valid_object(text, _balanced_spans(text, string_aware=True))
+    plain_obj, plain_end = _last_valid_object(text, _balanced_spans(text, string_aware=False))
+    if plain_end > end:
+        return plain_obj
+    return obj
+
+
+class JsonStreamDetector:
+    """
+    Incremental version of the scanner for streamed completions.
+    feed() each chunk as it arrives; it returns the first complete top-level
+    JSON object as soon as its closing brace is seen, otherwise None.
+    Every character is inspected once, regardless of chunk boundaries.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.result = None
+        self._pos = 0
+        self._depth = 0
+        self._start = -1
+        self._in_string = False
+        self._skip_to = -1
+
+    def feed(self, chunk):
+        if self.result is not None:
+            return self.result
+        self.buffer += chunk
+
+        for match in _SPECIAL_CHARS.finditer(self.buffer, self._pos):
+            i = match.start()
+            if i < self._skip_to:
+                continue
+            ch = self.buffer[i]
+
+            if self._in_string:
+                if ch == '\\':
+                    self._skip_to = i + 2
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == '}' and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj, end = _DECODER.raw_decode(self.buffer, self._start)
+                    except ValueError:
+                        continue  # Balanced but not JSON, keep listening
+                    if end == i + 1 and isinstance(obj, dict):
+                        self.result = obj
+                        self._pos = i + 1
+                        return obj
+            elif ch == '"' and self._depth:
+                self._in_string = True
+
+        self._pos = len(self.buffer)
+        return None
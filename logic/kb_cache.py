@@ -0,0 +1,124 @@
+import os
+import threading
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy it (thaw / dict / list) to modify")
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes, handed out from the shared knowledge base view."""
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """A list that refuses changes, handed out from the shared knowledge base view."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value):
+    """Read-only copy of nested dicts/lists (other values are shared as-is)."""
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Plain, mutable deep copy of a frozen (or any JSON-like) value."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+class KBView:
+    """
+    Cached, read-only snapshot of one store's prospects, shared by every
+    KnowledgeBase on the same store in this process. It is rebuilt only
+    when the store's fingerprint changes (file mtime/size, SQLite data
+    version) or after a write through any KnowledgeBase sharing it
+    (generation counter); otherwise load_all, get_stats and find_similar
+    are served from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._key = None
+        self.entries = FrozenList()
+        self._memo = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def invalidate(self):
+        """Call after writing to the store."""
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def refresh(self, storage):
+        """Make sure the view matches the store; returns self."""
+        with self._lock:
+            key = (self._generation, storage.fingerprint())
+            if key == self._key:
+                self._stats["hits"] += 1
+                return self
+            self._stats["misses"] += 1
+            self.entries = freeze(storage.load_all())
+            self._memo = {}
+            self._key = key
+            return self
+
+    def memo(self, name, compute):
+        """compute(entries), remembered until the view is next rebuilt."""
+        with self._lock:
+            if name not in self._memo:
+                self._memo[name] = compute(self.entries)
+            return self._memo[name]
+
+    def stats(self):
+        """Hits (served from memory), misses (rebuilds), invalidations and the cached size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self.entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_views = {}
+_views_lock = threading.Lock()
+
+
+def shared_view(storage):
+    """The process-wide KBView for `storage`'s backing files."""
+    key = (type(storage).__name__, os.path.abspath(storage.path))
+    with _views_lock:
+        view = _views.get(key)
+        if view is None:
+            view = _views[key] = KBView()
+        return view
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+import numpy as np
+
+# Role substrings that mark students / early-career prospects (bootcamp offerings)
+CAREER_STAGE_KEYWORDS = ["student", "sophomore", "junior", "senior", "freshman",
+                         "intern", "trainee", "graduate", "university", "institute",
+                         "college", "vit", "iit", "nit"]
+ROLE_STOPWORDS = {"at", "the", "and", "of", "in"}
+
+# offering type -> (career stage, same industry, role overlap) points, role reason, drop stopwords
+OFFERING_WEIGHTS = {
+    "bootcamp": (2, 0, 1, "similar_skills", True),
+    "talent": (0, 3, 2, "similar_role", True),
+    "devtool": (0, 2, 1, "similar_role", True),
+    "general": (0, 2, 1, "similar_role", False),
+}
+SAME_COMPANY_POINTS = 4
+
+
+def _postings(index):
+    return {key: np.array(rows, dtype=np.int64) for key, rows in index.items()}
+
+
+class SimilarityIndex:
+    """
+    Inverted indexes over a list of prospects for KnowledgeBase.find_similar:
+    lowercased company -> rows, industry -> rows, role token -> rows, plus
+    the rows whose role contains a career-stage keyword. A query marks the
+    posting lists it hits and adds the offering type's points as NumPy
+    arrays, so no prospect is looked at in Python. Build once per
+    knowledge base version (the KB memoizes it on its cached view).
+    """
+
+    def __init__(self, prospects):
+        self.prospects = prospects
+        companies, industries, tokens = defaultdict(list), defaultdict(list), defaultdict(list)
+        stage = []
+        for i, p in enumerate(prospects):
+            p_role = (p.get("role") or "").lower()
+            companies[(p.get("company") or "").lower()].append(i)
+            industries[(p.get("industry") or "").lower()].append(i)
+            for token in set(p_role.split()):
+                tokens[token].append(i)
+            if any(kw in p_role for kw in CAREER_STAGE_KEYWORDS):
+                stage.append(i)
+        self.size = len(prospects)
+        self.companies = _postings(companies)
+        self.industries = _postings(industries)
+        self.role_tokens = _postings(tokens)
+        self.career_stage = np.zeros(self.size, dtype=bool)
+        self.career_stage[stage] = True
+
+    def _mask(self, rows):
+        mask = np.zeros(self.size, dtype=bool)
+        if rows is not None:
+            mask[rows] = True
+        return mask
+
+    def search(self, company=None, industry=None, role=None, offering_type="general", limit=3):
+        """
+        Up to `limit` (prospect, match reasons) pairs by descending score,
+        ties in stored order, only prospects scoring above zero.
+        """
+        if not self.size:
+            return []
+        stage_points, industry_points, role_points, role_reason, drop_stopwords = OFFERING_WEIGHTS[offering_type]
+
+        same_company = self._mask(self.companies.get(company.lower()) if company else None)
+        same_industry = self._mask(self.industries.get(industry.lower()) if industry and industry_points else None)
+        similar_role = np.zeros(self.size, dtype=bool)
+        if role:
+            words = set(role.lower().split())
+            if drop_stopwords:
+                words -= ROLE_STOPWORDS
+            hits = [self.role_tokens[w] for w in words if w in self.role_tokens]
+            if hits:
+                similar_role[np.concatenate(hits)] = True
+        career_stage = self.career_stage if stage_points else self._mask(None)
+
+        scores = (SAME_COMPANY_POINTS * same_company.astype(np.int16) + stage_points * career_stage
+                  + industry_points * same_industry + role_points * similar_role)
+
+        # Highest scores first; flatnonzero keeps stored order within a score (a stable sort)
+        top = []
+        for score in np.unique(scores[scores > 0])[::-1]:
+            top.extend(np.flatnonzero(scores == score)[:limit - len(top)].tolist())
+            if len(top) >= limit:
+                break
+
+        results = []
+        for i in top:
+            reasons = []
+            if same_company[i]:
+                reasons.append("same_company")
+            if career_stage[i]:
+                reasons.append("similar_career_stage")
+            if same_industry[i]:
+                reasons.append("same_industry")
+            if similar_role[i]:
+                reasons.append(role_reason)
+            results.append((self.prospects[i], reasons))
+        return results
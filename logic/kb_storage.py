@@ -0,0 +1,562 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Columns find_similar and get_stats need, kept outside the JSON blob so they can be read without parsing it
+MATCH_FIELDS = ("id", "name", "company", "role", "industry")
+
+
+def _key(entry):
+    return (str(entry.get("name") or "").lower(), str(entry.get("company") or "").lower())
+
+
+def _name_key(entry):
+    """_key as one string, for SQLite's name_key column."""
+    return "\x1f".join(_key(entry))
+
+
+def _adopt(entry, existing):
+    """A re-saved prospect keeps the stored prospect's id and outreach status."""
+    if existing is not None:
+        entry["id"] = existing.get("id", entry["id"])
+        entry["status"] = existing.get("status", "Sent")
+    return entry
+
+
+def _write_json_atomic(path, data, indent=None):
+    """Write to a temp file, fsync and rename over `path`, so a crash leaves the old or the new file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonStorage:
+    """
+    The original storage: one JSON list in a file, re-read on every call
+    and rewritten whole on every change. Fine for a few hundred prospects.
+    """
+
+    def __init__(self, path="knowledge_base.json"):
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'w') as f:
+                json.dump([], f)
+
+    def load_all(self):
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def fingerprint(self):
+        """Changes whenever the file is rewritten (by this or another process)."""
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def save_all(self, data):
+        _write_json_atomic(self.path, data, indent=2)
+
+    def upsert_many(self, entries):
+        """
+        Insert `entries`, each replacing the stored prospect with the same
+        (name, company), which keeps its id and status (see _adopt).
+        One read and one rewrite of the file for the whole batch.
+        """
+        data = self.load_all()
+        by_key = {}
+        for i, p in enumerate(data):
+            by_key.setdefault(_key(p), i)
+        for entry in entries:
+            i = by_key.get(_key(entry))
+            if i is None:
+                by_key[_key(entry)] = len(data)
+                data.append(entry)
+            else:
+                data[i] = _adopt(entry, data[i])
+        self.save_all(data)
+        return entries
+
+    def update_status(self, prospect_id, new_status):
+        data = self.load_all()
+        for p in data:
+            if p.get("id") == prospect_id:
+                p["status"] = new_status
+                break
+        self.save_all(data)
+
+    def delete(self, prospect_id):
+        self.save_all([p for p in self.load_all() if p.get("id") != prospect_id])
+
+    def match_rows(self):
+        return self.load_all()
+
+    def get_many(self, ids):
+        wanted = set(ids)
+        found = {p.get("id"): p for p in self.load_all() if p.get("id") in wanted}
+        return [found[i] for i in ids if i in found]
+
+    def stats(self):
+        data = self.load_all()
+        companies = set(p.get("company", "") for p in data if p.get("company") and p.get("company") != "Unknown")
+        industries = set(p.get("industry", "") for p in data if p.get("industry") and p.get("industry") != "Unknown")
+        return {"total": len(data), "companies": len(companies), "industries": len(industries)}
+
+
+class SqliteStorage:
+    """
+    Prospects in a SQLite file (WAL mode), one row each: the full entry as
+    JSON plus indexed columns for lookups, so status updates, deletes and
+    single upserts touch one row, and similarity search scans a few short
+    columns instead of parsing every profile. `name_key` holds the
+    lowercased (name, company) that upserts match on.
+    """
+
+    COLUMNS = "id, name, company, role, industry, status, timestamp, data, name_key"
+
+    def __init__(self, path="knowledge_base.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS prospects ("
+            " id TEXT PRIMARY KEY, name TEXT, company TEXT, role TEXT, industry TEXT,"
+            " status TEXT, timestamp TEXT, data TEXT NOT NULL, name_key TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_prospects_company ON prospects(company);"
+            "CREATE INDEX IF NOT EXISTS idx_prospects_industry ON prospects(industry);"
+            "CREATE INDEX IF NOT EXISTS idx_prospects_status ON prospects(status);"
+            "CREATE INDEX IF NOT EXISTS idx_prospects_timestamp ON prospects(timestamp);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._conn.commit()
+        self._add_name_key()
+        self._writes = 0
+
+    def _add_name_key(self):
+        """Add and backfill name_key in databases created before it existed."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(prospects)")]
+        with self._conn:
+            if "name_key" not in columns:
+                self._conn.execute("ALTER TABLE prospects ADD COLUMN name_key TEXT")
+                self._conn.execute("DROP INDEX IF EXISTS idx_prospects_name_company")
+            rows = self._conn.execute("SELECT id, name, company FROM prospects WHERE name_key IS NULL").fetchall()
+            self._conn.executemany("UPDATE prospects SET name_key = ? WHERE id = ?",
+                                   [(_name_key({"name": name, "company": company}), pid)
+                                    for pid, name, company in rows])
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_prospects_name_key ON prospects(name_key)")
+
+    @staticmethod
+    def _row(entry):
+        return (entry.get("id"), entry.get("name"), entry.get("company"), entry.get("role"),
+                entry.get("industry"), entry.get("status"), entry.get("timestamp"),
+                json.dumps(entry, ensure_ascii=False), _name_key(entry))
+
+    def load_all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM prospects ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def fingerprint(self):
+        """Changes when another connection commits; this connection's writes bump _writes."""
+        with self._lock:
+            return (self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def save_all(self, data):
+        with self._lock, self._conn:
+            self._writes += 1
+            self._conn.execute("DELETE FROM prospects")
+            self._conn.executemany(f"INSERT OR REPLACE INTO prospects ({self.COLUMNS}) "
+                                   f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [self._row(p) for p in data])
+
+    def _find_by_key(self, entry):
+        row = self._conn.execute(
+            "SELECT data FROM prospects WHERE name_key = ? ORDER BY rowid LIMIT 1", (_name_key(entry),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def import_rows(self, entries):
+        """Insert `entries` in one transaction, skipping ids already stored."""
+        with self._lock, self._conn:
+            self._writes += 1
+            self._conn.executemany(f"INSERT OR IGNORE INTO prospects ({self.COLUMNS}) "
+                                   f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [self._row(p) for p in entries])
+
+    _UPSERT = (f"INSERT INTO prospects ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+               "ON CONFLICT(id) DO UPDATE SET "
+               "name = excluded.name, company = excluded.company, role = excluded.role, "
+               "industry = excluded.industry, status = excluded.status, "
+               "timestamp = excluded.timestamp, data = excluded.data, name_key = excluded.name_key")
+
+    def upsert_many(self, entries):
+        """
+        Insert `entries`, each replacing the stored prospect with the same
+        (name, company), which keeps its id and status (see _adopt).
+        One transaction, with an indexed lookup per entry.
+        """
+        with self._lock, self._conn:
+            self._writes += 1
+            for entry in entries:
+                self._conn.execute(self._UPSERT, self._row(_adopt(entry, self._find_by_key(entry))))
+        return entries
+
+    def update_status(self, prospect_id, new_status):
+        with self._lock, self._conn:
+            self._writes += 1
+            row = self._conn.execute("SELECT data FROM prospects WHERE id = ?", (prospect_id,)).fetchone()
+            if row is None:
+                return
+            entry = json.loads(row[0])
+            entry["status"] = new_status
+            self._conn.execute("UPDATE prospects SET status = ?, data = ? WHERE id = ?",
+                               (new_status, json.dumps(entry, ensure_ascii=False), prospect_id))
+
+    def delete(self, prospect_id):
+        with self._lock, self._conn:
+            self._writes += 1
+            self._conn.execute("DELETE FROM prospects WHERE id = ?", (prospect_id,))
+
+    def match_rows(self):
+        """id, name, company, role and industry of every prospect, without parsing profiles."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, company, role, industry FROM prospects ORDER BY rowid"
+            ).fetchall()
+        return [dict(zip(MATCH_FIELDS, row)) for row in rows]
+
+    def get_many(self, ids):
+        if not ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM prospects WHERE id IN ({', '.join('?' * len(ids))})", list(ids)
+            ).fetchall()
+        found = {row[0]: json.loads(row[1]) for row in rows}
+        return [found[i] for i in ids if i in found]
+
+    def stats(self):
+        with self._lock:
+            total, companies, industries = self._conn.execute(
+                "SELECT COUNT(*),"
+                " COUNT(DISTINCT CASE WHEN company NOT IN ('', 'Unknown') THEN company END),"
+                " COUNT(DISTINCT CASE WHEN industry NOT IN ('', 'Unknown') THEN industry END)"
+                " FROM prospects"
+            ).fetchone()
+        return {"total": total, "companies": companies, "industries": industries}
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def close(self):
+        self._conn.close()
+
+
+class LogStorage:
+    """
+    Prospects as a JSON snapshot plus an append-only JSON-lines log of
+    changes ({"op": "put" | "delete" | "status", ...}), served from an
+    in-memory view rebuilt from both on startup.
+    - A change costs one appended line, not a rewrite of every prospect.
+    - Writes are durable when they return: concurrent writers share one
+      fsync (group commit) instead of paying one each.
+    - A torn last line from a crash mid-append is dropped on startup;
+      other unreadable lines are skipped with a warning.
+    - Once the log grows past `compact_ratio` times the snapshot (and
+      `compact_min_bytes`), a background thread folds it into a new
+      snapshot. Writes continue into a fresh log meanwhile.
+    On first start with neither file present, the view is seeded from
+    `seed_path` (the old knowledge_base.json), which is left untouched.
+    """
+
+    def __init__(self, path="knowledge_base.jsonl", snapshot_path=None, seed_path=None,
+                 compact_ratio=1.0, compact_min_bytes=256 * 1024, fsync=True):
+        self.path = path
+        self.snapshot_path = snapshot_path or os.path.splitext(path)[0] + ".snapshot.json"
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()        # view + appends
+        self._sync_lock = threading.Lock()   # one fsync at a time
+        self._snapshot_lock = threading.Lock()  # one snapshot rewrite at a time (taken before _lock)
+        self._snapshot_gen = 0               # bumped by save_all; a compaction from before it is stale
+        self._view = OrderedDict()           # id -> entry (replaced, never mutated)
+        self._by_key = {}                    # (lower name, lower company) -> id
+        self._appended = 0                   # sequence of the last appended line
+        self._synced = 0                     # sequence covered by the last fsync
+        self._compacting = False
+        self._version = 0                    # bumped by every change, see fingerprint()
+        self._snapshot_bytes = 0
+        self._stats = {"appends": 0, "fsyncs": 0, "compactions": 0, "torn_lines": 0, "bad_lines": 0}
+        self._recover(seed_path)
+        self._log = open(self.path, 'a')
+
+    # --- startup -----------------------------------------------------------
+
+    def _recover(self, seed_path):
+        old_log = self.path + ".old"
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                self._load_entries(json.load(f))
+            self._snapshot_bytes = os.path.getsize(self.snapshot_path)
+        elif not os.path.exists(self.path) and seed_path and os.path.exists(seed_path):
+            with open(seed_path, 'r') as f:
+                self._load_entries(json.load(f))
+            _write_json_atomic(self.snapshot_path, list(self._view.values()))
+            self._snapshot_bytes = os.path.getsize(self.snapshot_path)
+            logger.info(f"Seeded {len(self._view)} prospects from {seed_path} into {self.snapshot_path}")
+        # A compaction interrupted before it finished leaves the rotated log behind;
+        # replaying it again is harmless because every op sets a final value
+        for log_path in (old_log, self.path):
+            if os.path.exists(log_path):
+                self._replay(log_path)
+
+    def _load_entries(self, data):
+        for p in data:
+            if isinstance(p, dict):
+                p.setdefault("id", str(uuid.uuid4()))
+                self._set(p)
+
+    def _replay(self, log_path):
+        good_bytes = 0
+        with open(log_path, 'rb') as f:
+            for number, raw in enumerate(f, 1):
+                if not raw.endswith(b"\n"):
+                    # Torn write from a crash: the last line never finished, so it was never acknowledged
+                    self._stats["torn_lines"] += 1
+                    break
+                good_bytes += len(raw)
+                try:
+                    event = json.loads(raw)
+                    if not isinstance(event, dict):
+                        raise ValueError(f"expected an object, got {type(event).__name__}")
+                    self._apply(event)
+                except (ValueError, KeyError, TypeError) as e:
+                    self._stats["bad_lines"] += 1
+                    logger.warning(f"Skipping unreadable line {number} of {log_path}: {e}")
+        if good_bytes < os.path.getsize(log_path):
+            with open(log_path, 'r+b') as f:
+                f.truncate(good_bytes)
+
+    # --- view --------------------------------------------------------------
+
+    def _set(self, entry):
+        old = self._view.get(entry["id"])
+        if old is not None:
+            self._by_key.pop(_key(old), None)
+        self._view[entry["id"]] = entry
+        self._by_key[_key(entry)] = entry["id"]
+
+    def _apply(self, event):
+        op = event.get("op")
+        if op == "put":
+            self._set(event["entry"])
+        elif op == "delete":
+            old = self._view.pop(event["id"], None)
+            if old is not None:
+                self._by_key.pop(_key(old), None)
+        elif op == "status" and event["id"] in self._view:
+            self._view[event["id"]] = dict(self._view[event["id"]], status=event["status"])
+
+    # --- writes ------------------------------------------------------------
+
+    def _commit(self, event):
+        """Apply and append one event, then return once it is on disk."""
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._apply(event)
+            seq = self._append(line)
+        self._sync(seq)
+        self._maybe_compact()
+
+    def _append(self, text):
+        """Write already-applied events (lock held); returns the sequence to _sync."""
+        self._version += 1
+        self._log.write(text)
+        self._log.flush()
+        self._appended += 1
+        self._stats["appends"] += 1
+        return self._appended
+
+    def _sync(self, seq):
+        if not self.fsync:
+            return
+        with self._sync_lock:
+            if self._synced >= seq:
+                return  # Another writer's fsync already covered this line
+            with self._lock:
+                log, upto = self._log, self._appended
+            try:
+                os.fsync(log.fileno())
+                self._stats["fsyncs"] += 1
+            except (OSError, ValueError):
+                with self._lock:
+                    rotated = log is not self._log
+                if not rotated:
+                    raise  # A real I/O error: these lines are not known to be on disk
+                # Closed by a compaction (which fsyncs the log before rotating it) or by
+                # save_all (whose snapshot holds every applied change): already durable
+            self._synced = upto
+
+    def update_status(self, prospect_id, new_status):
+        self._commit({"op": "status", "id": prospect_id, "status": new_status})
+
+    def delete(self, prospect_id):
+        self._commit({"op": "delete", "id": prospect_id})
+
+    def upsert_many(self, entries):
+        """
+        Insert `entries`, each replacing the stored prospect with the same
+        (name, company), which keeps its id and status (see _adopt).
+        Resolved through the in-memory key index; one append and one fsync.
+        """
+        lines = []
+        with self._lock:
+            for entry in entries:
+                pid = self._by_key.get(_key(entry))
+                event = {"op": "put", "entry": _adopt(entry, self._view.get(pid) if pid is not None else None)}
+                self._apply(event)
+                lines.append(json.dumps(event, ensure_ascii=False) + "\n")
+            seq = self._append("".join(lines))
+        self._sync(seq)
+        self._maybe_compact()
+        return entries
+
+    def save_all(self, data):
+        """Replace everything: a new snapshot and an empty log."""
+        with self._snapshot_lock, self._lock:
+            self._version += 1
+            self._snapshot_gen += 1
+            self._view.clear()
+            self._by_key.clear()
+            self._load_entries(data)
+            entries = list(self._view.values())
+            _write_json_atomic(self.snapshot_path, entries)
+            self._snapshot_bytes = os.path.getsize(self.snapshot_path)
+            self._log.close()
+            self._log = open(self.path, 'w')
+            # A compaction's rotated log predates this snapshot; replaying it would resurrect old entries
+            if os.path.exists(self.path + ".old"):
+                os.remove(self.path + ".old")
+
+    # --- compaction --------------------------------------------------------
+
+    def _maybe_compact(self):
+        with self._lock:
+            log_bytes = self._log.tell()
+            if (self._compacting or log_bytes < self.compact_min_bytes
+                    or log_bytes < self.compact_ratio * self._snapshot_bytes):
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name="kb-compaction", daemon=True).start()
+
+    def compact(self):
+        """
+        Fold the log into a new snapshot; writes go to a fresh log meanwhile.
+        Skipped if save_all replaced the snapshot since the view was copied.
+        """
+        old_log = self.path + ".old"
+        try:
+            with self._lock:
+                entries = list(self._view.values())
+                generation = self._snapshot_gen
+                self._log.flush()
+                if self.fsync:
+                    os.fsync(self._log.fileno())
+                self._log.close()
+                os.replace(self.path, old_log)
+                self._log = open(self.path, 'a')
+            with self._snapshot_lock:
+                if self._snapshot_gen != generation:
+                    logger.info("Knowledge base compaction skipped, the snapshot was replaced meanwhile")
+                    return
+                _write_json_atomic(self.snapshot_path, entries)
+                os.remove(old_log)
+                with self._lock:
+                    self._snapshot_bytes = os.path.getsize(self.snapshot_path)
+                    self._stats["compactions"] += 1
+        except OSError as e:
+            logger.error(f"Knowledge base compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    # --- reads -------------------------------------------------------------
+
+    def load_all(self):
+        with self._lock:
+            return [dict(p) for p in self._view.values()]
+
+    def fingerprint(self):
+        """The in-memory view is the source of truth; it changes only through this object."""
+        with self._lock:
+            return self._version
+
+    def match_rows(self):
+        with self._lock:
+            return [{field: p.get(field) for field in MATCH_FIELDS} for p in self._view.values()]
+
+    def get_many(self, ids):
+        with self._lock:
+            return [dict(self._view[i]) for i in ids if i in self._view]
+
+    def stats(self):
+        with self._lock:
+            data = list(self._view.values())
+        companies = set(p.get("company", "") for p in data if p.get("company") and p.get("company") != "Unknown")
+        industries = set(p.get("industry", "") for p in data if p.get("industry") and p.get("industry") != "Unknown")
+        return {"total": len(data), "companies": len(companies), "industries": len(industries)}
+
+    def log_stats(self):
+        """Appends, fsyncs (fewer than appends under concurrent writes), compactions and log size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["log_bytes"] = self._log.tell()
+            stats["snapshot_bytes"] = self._snapshot_bytes
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+
+
+def migrate_json_to_sqlite(json_path, storage):
+    """
+    One-shot import of a knowledge_base.json list into a SqliteStorage.
+    Runs once per JSON file (recorded in the database); the JSON file is
+    left untouched. Returns the number of prospects imported.
+    """
+    marker = f"migrated:{os.path.abspath(json_path)}"
+    if not os.path.exists(json_path) or storage.get_meta(marker):
+        return 0
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Knowledge base migration skipped, can't read {json_path}: {e}")
+        return 0
+    existing = {p.get("id") for p in storage.match_rows()}
+    imported = []
+    for p in data:
+        if not isinstance(p, dict):
+            continue
+        p.setdefault("id", str(uuid.uuid4()))
+        if p["id"] not in existing:
+            imported.append(p)
+    if imported:
+        storage.import_rows(imported)
+    storage.set_meta(marker, str(len(imported)))
+    logger.info(f"Migrated {len(imported)} prospects from {json_path} to {storage.path}")
+    return len(imported)
@@ -1,30 +1,75 @@
-import json
 import os
 import uuid
 from datetime import datetime
 
+from logic.kb_cache import shared_view
+from logic.kb_index import SimilarityIndex
+from logic.kb_storage import JsonStorage, LogStorage, SqliteStorage, migrate_json_to_sqlite
+
 class KnowledgeBase:
-    def __init__(self, file_path="knowledge_base.json"):
-        self.file_path = file_path
-        self._ensure_file()
+    """
+    Saved prospects with their profiles, messages and outreach status.
+    backend="sqlite" (default) keeps them in an indexed SQLite file next to
+    `file_path` and imports an existing knowledge_base.json on first use;
+    backend="log" keeps an in-memory view over a snapshot plus an
+    append-only change log (seeded from knowledge_base.json);
+    backend="json" keeps the original single-file JSON store. Any object
+    with the kb_storage interface can be passed as `storage` instead.
+    With `cache` (default), reads come from a process-wide read-only view
+    (see kb_cache.KBView): load_all hands out FrozenDict/FrozenList
+    entries, so copy before modifying (kb_cache.thaw).
+    """
 
-    def _ensure_file(self):
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as f:
-                json.dump([], f)
+    def __init__(self, file_path="knowledge_base.json", backend="sqlite", db_path=None, storage=None,
+                 cache=True):
+        self.file_path = file_path
+        if storage is not None:
+            self.storage = storage
+        elif backend == "log":
+            self.storage = LogStorage(os.path.splitext(file_path)[0] + ".jsonl", seed_path=file_path)
+        elif backend == "json":
+            self.storage = JsonStorage(file_path)
+        elif backend == "sqlite":
+            self.storage = SqliteStorage(db_path or os.path.splitext(file_path)[0] + ".db")
+            migrate_json_to_sqlite(file_path, self.storage)
+        else:
+            raise ValueError(f"Unknown knowledge base backend: {backend}")
+        self.view = shared_view(self.storage) if cache else None
 
     def load_all(self):
-        with open(self.file_path, 'r') as f:
-            return json.load(f)
+        if self.view is None:
+            return self.storage.load_all()
+        return self.view.refresh(self.storage).entries
+
+    def cache_stats(self):
+        """Hit statistics of the shared view (None without cache)."""
+        return self.view.stats() if self.view is not None else None
+
+    def _changed(self):
+        if self.view is not None:
+            self.view.invalidate()
 
     def save_prospect(self, profile_data, messages=None, url=""):
         """
         Save a prospect with full profile, generated messages, URL, and timestamp.
         Updates existing entry if same name+company found, otherwise appends.
         """
-        data = self.load_all()
-        
-        entry = {
+        self.save_prospects_bulk([{"profile": profile_data, "messages": messages, "url": url}])
+
+    def save_prospects_bulk(self, prospects):
+        """
+        save_prospect for a whole batch: `prospects` is a list of
+        {"profile", "messages", "url"} dicts, upserted by name+company in one
+        transaction / one write. Returns the number saved.
+        """
+        entries = [self._make_entry(p["profile"], p.get("messages"), p.get("url", "")) for p in prospects]
+        if entries:
+            self.storage.upsert_many(entries)
+            self._changed()
+        return len(entries)
+
+    def _make_entry(self, profile_data, messages=None, url=""):
+        return {
             "id": str(uuid.uuid4()),
             "name": profile_data.get("name", "Unknown"),
             "company": profile_data.get("company", "Unknown"),
@@ -38,40 +83,21 @@ class KnowledgeBase:
             "timestamp": datetime.now().isoformat(),
             "status": "Sent"  # Default status
         }
-        
-        # Check if exists (by name + company)
-        for i, p in enumerate(data):
-            if (p.get("name", "").lower() == entry["name"].lower() and 
-                p.get("company", "").lower() == entry["company"].lower()):
-                entry["id"] = p.get("id", entry["id"])  # Keep original ID
-                entry["status"] = p.get("status", "Sent") # Keep existing status
-                data[i] = entry
-                break
-        else:
-            data.append(entry)
             
     def save_all(self, data):
-        """Save the entire list of prospects to file."""
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Save the entire list of prospects."""
+        self.storage.save_all(data)
+        self._changed()
 
     def update_status(self, prospect_id, new_status):
         """Update the status of a prospect (e.g., Replied, Opened)."""
-        data = self.load_all()
-        for p in data:
-            if p.get("id") == prospect_id:
-                p["status"] = new_status
-                break
-        
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.storage.update_status(prospect_id, new_status)
+        self._changed()
 
     def delete_prospect(self, prospect_id):
         """Delete a prospect by ID."""
-        data = self.load_all()
-        data = [p for p in data if p.get("id") != prospect_id]
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.storage.delete(prospect_id)
+        self._changed()
 
     def find_similar(self, company=None, industry=None, role=None, offering=""):
         """
@@ -81,95 +107,22 @@ class KnowledgeBase:
         - Dev tool: prioritize company, tech stack
         Returns up to 3 matches with match_reason attached.
         """
-        data = self.load_all()
-        if not data:
-            return []
-        
         offering_type = self._detect_offering_type(offering)
-        
-        scored = []
-        for p in data:
-            score = 0
-            reasons = []
-            
-            p_company = p.get("company", "").lower()
-            p_role = p.get("role", "").lower()
-            p_industry = p.get("industry", "").lower()
-            
-            # === UNIVERSAL: Exact company match is always valuable ===
-            if company and p_company == company.lower():
-                score += 4
-                reasons.append("same_company")
-            
-            # === OFFERING-SPECIFIC SCORING ===
-            if offering_type == "bootcamp":
-                # Students/early-career at same college = strong match
-                edu_keywords = ["student", "sophomore", "junior", "senior", "freshman", 
-                                "intern", "trainee", "graduate", "university", "institute", 
-                                "college", "vit", "iit", "nit"]
-                if any(kw in p_role for kw in edu_keywords):
-                    score += 2
-                    reasons.append("similar_career_stage")
-                
-                # Role keyword overlap (e.g., both are "developers" or "engineers")
-                if role and p.get("role"):
-                    role_words = set(role.lower().split())
-                    p_role_words = set(p_role.split())
-                    overlap = role_words & p_role_words - {"at", "the", "and", "of", "in"}
-                    if overlap:
-                        score += 1
-                        reasons.append("similar_skills")
-            
-            elif offering_type == "talent":
-                # Same industry = strong match for hiring
-                if industry and p_industry == industry.lower():
-                    score += 3
-                    reasons.append("same_industry")
-                
-                # Similar role level
-                if role and p.get("role"):
-                    role_words = set(role.lower().split())
-                    p_role_words = set(p_role.split())
-                    overlap = role_words & p_role_words - {"at", "the", "and", "of", "in"}
-                    if overlap:
-                        score += 2
-                        reasons.append("similar_role")
-            
-            elif offering_type == "devtool":
-                # Same industry
-                if industry and p_industry == industry.lower():
-                    score += 2
-                    reasons.append("same_industry")
-                
-                # Role overlap (same type of engineer)
-                if role and p.get("role"):
-                    role_words = set(role.lower().split())
-                    p_role_words = set(p_role.split())
-                    overlap = role_words & p_role_words - {"at", "the", "and", "of", "in"}
-                    if overlap:
-                        score += 1
-                        reasons.append("similar_role")
-            
-            else:
-                # Fallback: original scoring
-                if industry and p_industry == industry.lower():
-                    score += 2
-                    reasons.append("same_industry")
-                if role and p.get("role"):
-                    role_words = set(role.lower().split())
-                    p_role_words = set(p_role.split())
-                    if role_words & p_role_words:
-                        score += 1
-                        reasons.append("similar_role")
-            
-            if score > 0:
-                p_with_reason = dict(p)
-                p_with_reason["_match_reasons"] = reasons
-                scored.append((score, reasons, p_with_reason))
-        
-        # Sort by score descending
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [item[2] for item in scored[:3]]
+        if self.view is not None:
+            # Indexes are rebuilt only when the cached view is reloaded after a change
+            index = self.view.refresh(self.storage).memo("similarity_index", SimilarityIndex)
+            matches = index.search(company, industry, role, offering_type)
+            entries = [entry for entry, _ in matches]
+        else:
+            # Index the few match columns; only the top 3 full entries are loaded
+            matches = SimilarityIndex(self.storage.match_rows()).search(company, industry, role, offering_type)
+            entries = self.storage.get_many([row.get("id") for row, _ in matches])
+        results = []
+        for (_, reasons), entry in zip(matches, entries):
+            p_with_reason = dict(entry)
+            p_with_reason["_match_reasons"] = reasons
+            results.append(p_with_reason)
+        return results
 
     def _detect_offering_type(self, offering):
         """
@@ -252,11 +205,13 @@ class KnowledgeBase:
 
     def get_stats(self):
         """Return basic stats about the knowledge base."""
-        data = self.load_all()
-        companies = set(p.get("company", "") for p in data if p.get("company") and p.get("company") != "Unknown")
-        industries = set(p.get("industry", "") for p in data if p.get("industry") and p.get("industry") != "Unknown")
-        return {
-            "total": len(data),
-            "companies": len(companies),
-            "industries": len(industries)
-        }
+        if self.view is None:
+            return self.storage.stats()
+        self.view.refresh(self.storage)
+        return dict(self.view.memo("stats", _count_stats))
+
+
+def _count_stats(data):
+    companies = set(p.get("company", "") for p in data if p.get("company") and p.get("company") != "Unknown")
+    industries = set(p.get("industry", "") for p in data if p.get("industry") and p.get("industry") != "Unknown")
+    return {"total": len(data), "companies": len(companies), "industries": len(industries)}
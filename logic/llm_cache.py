@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM responses.
+    Tier 1 is an in-memory LRU; tier 2 is a SQLite file that survives restarts,
+    so re-running a batch after a crash reuses every prompt already answered.
+    Entries expire after `ttl_seconds`; the disk tier is trimmed to
+    `max_disk_entries` by least-recent access.
+    """
+
+    def __init__(self, path="llm_cache.db", max_memory_entries=256, max_disk_entries=10000,
+                 ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._conn = None
+        self._disk_count = 0
+        if path:
+            self._open_disk()
+
+    def _open_disk(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+        self._conn.commit()
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(prompt, max_new_tokens, temperature, endpoint, stop_at_json=False):
+        """Hash of everything that changes the completion (an early-stopped one is a different answer)."""
+        parts = [prompt, max_new_tokens, temperature, endpoint]
+        if stop_at_json:
+            parts.append("stop_at_json")
+        raw = json.dumps(parts, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at, now):
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        """Return the cached response for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                value, created_at = hit
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[1], now):
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self._remember(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store a response in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            if self._conn is None:
+                return
+            try:
+                existed = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                if not existed:
+                    self._disk_count += 1
+                if self.max_disk_entries and self._disk_count > self.max_disk_entries:
+                    excess = self._disk_count - self.max_disk_entries
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                        (excess,),
+                    )
+                    self._disk_count -= excess
+                    self._stats["evictions"] += excess
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def _remember(self, key, value, created_at):
+        """Insert into the memory LRU (caller holds the lock)."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+                self._disk_count = 0
+
+    def stats(self):
+        """Hit/miss counters plus current tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._disk_count
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller
+    (the leader) does the work, callers that arrive while it is in flight
+    wait for and share its result. Nothing is kept once the call finishes;
+    that is ResponseCache's job.
+    """
+
+    def __init__(self):
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "collapsed": 0}
+
+    def claim(self, key):
+        """Returns (future, is_leader). The leader must resolve() the key."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["collapsed"] += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            self._stats["leaders"] += 1
+            return future, True
+
+    def resolve(self, key, value=None, error=None):
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def do(self, key, fn):
+        """Run fn() unless an identical call is already in flight; returns (value, collapsed)."""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result(), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, value)
+        return value, False
+
+    def stats(self):
+        """Leader calls sent, calls collapsed onto them, and calls in flight now."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._inflight)
+        return stats
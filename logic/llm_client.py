@@ -1,55 +1,650 @@
 import requests
 import json
 import logging
+import threading
+import asyncio
+import hashlib
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+
+from logic.json_extract import extract_json, JsonStreamDetector
+from logic.backend_pool import BackendPool
+from logic.batcher import MicroBatcher
+from logic.llm_cache import ResponseCache, SingleFlight
+from logic.resilience import Backoff, CircuitOpenError, HedgeBudget, LatencyTracker
 
 logger = logging.getLogger(__name__)
 
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that remembers the urllib3 pools it has sent through, so we can
+    report how many requests reused a kept-alive connection vs opened a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._seen_pools = {}
+        self._pools_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        pool = getattr(response.raw, "_pool", None)
+        if pool is not None:
+            with self._pools_lock:
+                self._seen_pools[id(pool)] = pool
+        return response
+
+    def connection_stats(self):
+        """Aggregate urllib3 pool counters: requests sent vs connections opened."""
+        with self._pools_lock:
+            pools = list(self._seen_pools.values())
+        total_requests = sum(getattr(p, "num_requests", 0) for p in pools)
+        new_connections = sum(getattr(p, "num_connections", 0) for p in pools)
+        return {
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "reused_connections": max(total_requests - new_connections, 0),
+        }
+
+
+def build_session(pool_connections=4, pool_maxsize=10, keep_alive=True, pool_block=False):
+    """
+    Create a requests.Session backed by a PooledAdapter.
+    - pool_connections: number of per-host pools to cache
+    - pool_maxsize: max kept-alive connections per host
+    - pool_block: if True, wait for a free connection instead of opening extras
+    """
+    session = requests.Session()
+    adapter = PooledAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=0,  # Retries are handled in KaggleClient.generate
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+    return session
+
+
 class KaggleClient:
-    def __init__(self, base_url="https://ununited-laudable-anya.ngrok-free.dev"):
-        # Ensure no trailing slash
-        self.base_url = base_url.rstrip('/')
+    def __init__(self, base_url="https://ununited-laudable-anya.ngrok-free.dev",
+                 session=None, pool_connections=4, pool_maxsize=10, keep_alive=True, pool_block=False,
+                 max_concurrency=4, cache=None, streaming=False,
+                 routing="least_outstanding", health_check_interval=0,
+                 max_attempts=2, connect_timeout=10, read_timeout=120, backoff=None,
+                 hedge=False, hedge_percentile=95, hedge_budget=0.1,
+                 batch_max_size=8, batch_max_wait_ms=20):
+        # base_url may list several endpoints (list, or newline/comma separated)
+        self.pool = BackendPool(base_url, strategy=routing)
+        self.base_url = self.pool.backends[0].url
         self.generate_endpoint = f"{self.base_url}/generate"
+        # One pooled session per client; pass `session` to share it across clients
+        self.session = session or build_session(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive,
+            pool_block=pool_block,
+        )
+        # Max prompts in flight through agenerate/achat (keep <= pool_maxsize)
+        self.max_concurrency = max_concurrency
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        # Optional logic.llm_cache.ResponseCache (opt-in)
+        self.cache = cache
+        # Stream tokens from /generate_stream so JSON calls can stop early
+        self.streaming = streaming
+        if health_check_interval:
+            self.pool.start_health_checks(self.session, interval=health_check_interval)
+        # Short connect timeout so a dead tunnel fails in seconds, not minutes
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_attempts = max_attempts
+        self.backoff = backoff or Backoff()
+        self._calls = threading.local()  # per-thread report for last_call_stats()
+        # Request hedging: duplicate a call once it runs past the p-th percentile
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = HedgeBudget(ratio=hedge_budget)
+        self.latencies = LatencyTracker()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # generate_many() coalesces prompts into /generate_batch calls
+        self.batcher = MicroBatcher(self, max_batch_size=batch_max_size, max_wait_ms=batch_max_wait_ms)
+        # Identical prompts already in flight share one request (single-flight)
+        self.inflight = SingleFlight()
+        # Static prompt prefixes seen by chat(): text -> id sent as a KV-cache hint
+        self._prefixes = {}
+        self._prefixes_lock = threading.Lock()
+
+    def connection_stats(self):
+        """Return connection reuse counters for this client's session."""
+        adapter = self.session.get_adapter(self.generate_endpoint)
+        if isinstance(adapter, PooledAdapter):
+            return adapter.connection_stats()
+        return {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+    def health_check(self):
+        """Probe every endpoint now; returns {url: "ok" | error}."""
+        return self.pool.health_check(self.session)
 
-    def generate(self, prompt, max_new_tokens=1000, temperature=0.7):
+    def backend_stats(self):
+        """Per-endpoint routing stats (in flight, latency, failures, ejected)."""
+        return self.pool.stats()
+
+    def hedge_stats(self):
+        """Requests seen, hedges sent, hedges that won, hedges denied by the budget."""
+        return self.hedge_budget.snapshot()
+
+    def batch_stats(self):
+        """Prompts sent via generate_many, batches sent, prompts that fell back to single calls."""
+        return self.batcher.snapshot()
+
+    def inflight_stats(self):
+        """Requests actually sent vs duplicate calls collapsed onto an in-flight one."""
+        return self.inflight.stats()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.stop_health_checks()
+        self.batcher.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def generate(self, prompt, max_new_tokens=1000, temperature=0.7, stop_at_json=False, use_cache=True):
         """
         Sends a prompt to the Kaggle endpoint and returns the generated text.
+        Served from the response cache when one is attached and the same
+        prompt/params/endpoint was answered before.
+        If `stop_at_json` is set and streaming is enabled, generation is
+        cancelled as soon as a complete top-level JSON object has arrived.
+        With `use_cache=False` the request always reaches the endpoint (no
+        cache lookup, no sharing an identical in-flight call); a good answer
+        still replaces the cached one.
+        """
+        report = self._new_call_report()
+        self._calls.report = report
+
+        # A stopped-early answer differs from a full one, so they don't share a key
+        cache_key = ResponseCache.make_key(prompt, max_new_tokens, temperature, self.pool.key, stop_at_json)
+        generate = lambda: self._generate_uncached(prompt, max_new_tokens, temperature, stop_at_json, cache_key)
+        if not use_cache:
+            return generate()
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                report["cached"] = True
+                return cached
+
+        text, collapsed = self.inflight.do(cache_key, generate)
+        report["collapsed"] = collapsed
+        return text
+
+    def _generate_uncached(self, prompt, max_new_tokens, temperature, stop_at_json, cache_key):
+        report = self._current_call()
+        started = time.time()
+        if stop_at_json and self.streaming:
+            send = self._request_stream
+        else:
+            send = self._request
+        if self.hedge:
+            text = self._request_hedged(send, prompt, max_new_tokens, temperature)
+        else:
+            text = send(prompt, max_new_tokens, temperature)
+        report["elapsed"] = time.time() - started
+        if not text.startswith("Error:"):
+            self.latencies.record((send.__name__, max_new_tokens), report["elapsed"])
+        # Never cache failures, so a retry after an outage hits the endpoint again
+        if self.cache is not None and not text.startswith("Error:"):
+            self.cache.set(cache_key, text)
+        return text
+
+    def _request_hedged(self, send, prompt, max_new_tokens, temperature):
+        """
+        Run `send` on a worker; if it hasn't answered within the recent
+        `hedge_percentile` latency and the hedge budget allows, fire a
+        duplicate (on another backend when there is one). The first good
+        answer wins and the loser is cancelled: a queued attempt is dropped,
+        a streaming one is closed, a blocking one is abandoned.
+        """
+        report = self._current_call()
+        self.hedge_budget.on_request()
+        delay = self.latencies.percentile((send.__name__, max_new_tokens), self.hedge_percentile)
+        if delay is None:
+            return send(prompt, max_new_tokens, temperature)  # Not enough history yet
+
+        executor = self._get_executor()
+        primary_report, primary_cancel = self._new_call_report(), threading.Event()
+        primary = executor.submit(self._run_attempt, primary_report, send,
+                                  prompt, max_new_tokens, temperature, (), primary_cancel)
+        attempts = {primary: (primary_report, primary_cancel)}
+
+        done, _ = wait([primary], timeout=delay)
+        if not done and self.hedge_budget.try_spend():
+            exclude = (primary_report["backend"],) if primary_report.get("backend") else ()
+            logger.info(f"LLM call exceeded p{self.hedge_percentile} ({delay:.1f}s), sending hedge request")
+            hedge_report, hedge_cancel = self._new_call_report(), threading.Event()
+            hedge = executor.submit(self._run_attempt, hedge_report, send,
+                                    prompt, max_new_tokens, temperature, exclude, hedge_cancel)
+            attempts[hedge] = (hedge_report, hedge_cancel)
+            report["hedged"] = True
+
+        text, winner, pending = None, None, set(attempts)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Attempts can finish together: any good answer beats an error in the
+            # same batch, and an error only wins if nothing else is still running
+            finished = sorted(done, key=lambda f: f is not primary)
+            good = [f for f in finished if not f.result().startswith("Error:")]
+            if good or not pending:
+                winner = (good or finished)[0]
+                text = winner.result()
+
+        for future in pending:
+            attempts[future][1].set()
+            future.cancel()
+        if winner is not primary:
+            self.hedge_budget.record_win()
+            report["hedge_won"] = True
+        for attempt_report, _ in attempts.values():
+            for field in ("attempts", "retries", "wait_seconds"):
+                report[field] += attempt_report[field]
+            report["fail_fast"] = report["fail_fast"] or attempt_report["fail_fast"]
+        report["error"] = attempts[winner][0]["error"]
+        return text
+
+    def _run_attempt(self, report, send, prompt, max_new_tokens, temperature, exclude, cancel):
+        """Worker-thread entry point: run `send` with its own call report."""
+        self._calls.report = report
+        return send(prompt, max_new_tokens, temperature, exclude=exclude, cancel=cancel)
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(2 * self.max_concurrency, 4),
+                                                    thread_name_prefix="llm-worker")
+            return self._executor
+
+    def _acquire(self, exclude=()):
+        """Prefer a backend outside `exclude`, but fall back to any open one."""
+        backend = self.pool.acquire(exclude)
+        if backend is None and exclude:
+            backend = self.pool.acquire()
+        return backend
+
+    def _request(self, prompt, max_new_tokens, temperature, exclude=(), cancel=None):
+        """
+        POST a single prompt to /generate. Timeouts, connection errors and 5xx
+        are retried with jittered exponential backoff; if every endpoint's
+        circuit is open the call fails fast instead of waiting on a timeout.
         """
         payload = {
             "prompt": prompt,
             "max_new_tokens": max_new_tokens,
             "temperature": temperature
         }
+        payload.update(self._prefix_hint(prompt))
+        # The Kaggle endpoint expects:
+        # POST /generate
+        # Body: {"prompt": "...", "max_new_tokens": 100, "temperature": 0.7}
+        #       optionally "cache_prefix_id"/"cache_prefix_len" (see _prefix_hint)
+        # Response: {"response": "generated text"}
+
+        report = self._current_call()
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = self.backoff.delay(attempt - 1)
+                report["retries"] += 1
+                report["wait_seconds"] += delay
+                if cancel is not None and cancel.wait(delay):
+                    return "Error: cancelled"
+                elif cancel is None:
+                    time.sleep(delay)
+
+            # Each attempt is routed separately, so a retry can land on another backend
+            backend = self._acquire(exclude)
+            if backend is None:
+                return self._fail_fast(report)
+
+            report["attempts"] += 1
+            report["backend"] = backend.url
+            started = time.time()
+            ok = False
+            try:
+                response = self.session.post(f"{backend.url}/generate", json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                result = response.json()
+                ok = True
+                return result.get("response", "")
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                logger.warning(f"LLM request to {backend.url} failed (attempt {attempt+1}/{self.max_attempts}): {e}")
+                last_error = e
+            except requests.exceptions.HTTPError as e:
+                last_error = e
+                status = e.response.status_code if e.response is not None else 500
+                if status < 500 and status != 429:
+                    break  # Retrying a bad request won't help
+                logger.warning(f"LLM request to {backend.url} got HTTP {status} (attempt {attempt+1}/{self.max_attempts})")
+            except Exception as e:
+                last_error = e
+                break
+            finally:
+                self.pool.release(backend, time.time() - started, ok, ("generate", max_new_tokens))
+
+        logger.error(f"Kaggle LLM request failed after {report['attempts']} attempt(s): {last_error}")
+        report["error"] = str(last_error)
+        return f"Error: Request failed after {report['attempts']} attempt(s): {last_error}"
+
+    def _fail_fast(self, report):
+        """Every circuit is open: report it and return immediately."""
+        retry_after = self.pool.retry_after()
+        report["fail_fast"] = True
+        report["retry_after"] = retry_after
+        report["error"] = "circuit open"
+        logger.warning(f"All LLM endpoints unavailable, failing fast (retry in {retry_after:.0f}s)")
+        return f"Error: LLM endpoint unavailable (circuit open, retry in {retry_after:.0f}s)"
+
+    def _current_call(self):
+        """Stats dict for the call running on this thread."""
+        report = getattr(self._calls, "report", None)
+        if report is None:
+            report = self._new_call_report()
+            self._calls.report = report
+        return report
+
+    @staticmethod
+    def _new_call_report():
+        return {"attempts": 0, "retries": 0, "wait_seconds": 0.0, "elapsed": 0.0,
+                "cached": False, "fail_fast": False, "retry_after": 0.0, "error": None,
+                "backend": None, "hedged": False, "hedge_won": False, "collapsed": False}
+
+    def last_call_stats(self):
+        """
+        Retry/wait report for the most recent generate() on this thread:
+        attempts, retries, wait_seconds (backoff sleeps), elapsed, cached,
+        fail_fast, retry_after, error, backend, hedged, hedge_won and
+        collapsed (answered by an identical call already in flight).
+        """
+        return dict(getattr(self._calls, "report", None) or self._new_call_report())
+
+    def is_available(self):
+        """False while every endpoint's circuit is open."""
+        return self.pool.available()
+
+    def retry_after(self):
+        """Seconds until an endpoint accepts requests again (0 if one does now)."""
+        return self.pool.retry_after()
 
+    def generate_many(self, prompts, max_new_tokens=1000, temperature=0.7):
+        """
+        Generate completions for several prompts, returned in input order.
+        Cache hits are answered locally; the rest go through the micro-batcher,
+        which coalesces them (and prompts from concurrent callers) into
+        /generate_batch requests, or parallel single calls if the backend
+        has no batch route.
+        """
+        results = [None] * len(prompts)
+        pending = []
+        for i, prompt in enumerate(prompts):
+            cache_key = ResponseCache.make_key(prompt, max_new_tokens, temperature, self.pool.key)
+            if self.cache is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            # Duplicates (in this list or from other callers) ride on the first one
+            future, leader = self.inflight.claim(cache_key)
+            if leader:
+                batched = self.batcher.submit(prompt, max_new_tokens, temperature)
+                batched.add_done_callback(
+                    lambda done, key=cache_key: self.inflight.resolve(key, done.result()))
+            pending.append((i, cache_key, leader, future))
+
+        for i, cache_key, leader, future in pending:
+            text = future.result()
+            if leader and self.cache is not None and not text.startswith("Error:"):
+                self.cache.set(cache_key, text)
+            results[i] = text
+        return results
+
+    def _request_batch(self, prompts, max_new_tokens, temperature):
+        """
+        POST several prompts to /generate_batch in one request.
+        Body: {"prompts": [...], "max_new_tokens": N, "temperature": T}
+        Response: {"responses": ["...", ...]} in the same order.
+        Routed only to endpoints not known to lack the route (tracked per
+        backend). Returns None when no such endpoint can take it, or the one
+        tried has no batch route, so the caller falls back to single calls.
+        """
+        no_batch = tuple(b.url for b in self.pool.backends if b.batch_supported is False)
+        if len(no_batch) == len(self.pool.backends):
+            return None
+        backend = self.pool.acquire(no_batch)
+        if backend is None:
+            if no_batch:
+                return None  # Only endpoints without a batch route are up
+            return [f"Error: LLM endpoint unavailable (circuit open, retry in {self.pool.retry_after():.0f}s)"] * len(prompts)
+
+        payload = {"prompts": prompts, "max_new_tokens": max_new_tokens, "temperature": temperature}
+        hint = self._prefix_hint(prompts[0])
+        if hint and all(p.startswith(prompts[0][:hint["cache_prefix_len"]]) for p in prompts):
+            payload.update(hint)
+        started = time.time()
+        ok = False
         try:
-            # The Kaggle endpoint expects:
-            # POST /generate
-            # Body: {"prompt": "...", "max_new_tokens": 100, "temperature": 0.7}
-            # Response: {"response": "generated text"}
-            
-            # Retry up to 2 times on timeout
-            last_error = None
-            for attempt in range(2):
-                try:
-                    response = requests.post(self.generate_endpoint, json=payload, timeout=120)
-                    response.raise_for_status()
-                    result = response.json()
-                    return result.get("response", "")
-                except requests.exceptions.Timeout as e:
-                    logger.warning(f"LLM request timed out (attempt {attempt+1}/2): {e}")
-                    last_error = e
+            response = self.session.post(f"{backend.url}/generate_batch", json=payload, timeout=self.timeout)
+            if response.status_code in (404, 405, 501):
+                logger.warning(f"{backend.url} has no /generate_batch route, using single calls there")
+                backend.batch_supported = False
+                ok = True  # The endpoint itself is healthy
+                return None
+            response.raise_for_status()
+            texts = response.json().get("responses", [])
+            if len(texts) != len(prompts):
+                raise ValueError(f"expected {len(prompts)} responses, got {len(texts)}")
+            backend.batch_supported = True
+            ok = True
+            return texts
+        except Exception as e:
+            logger.error(f"Kaggle LLM batch request failed: {e}")
+            return [f"Error: {str(e)}"] * len(prompts)
+        finally:
+            self.pool.release(backend, time.time() - started if ok else None, ok, ("batch", max_new_tokens))
+
+    def stream(self, prompt, max_new_tokens=1000, temperature=0.7, exclude=()):
+        """
+        Yields generated text chunks from /generate_stream as they arrive.
+        Accepts Server-Sent Events (`data: {"token": "..."}` ... `data: [DONE]`)
+        or a plain chunked text body. Closing the generator closes the
+        connection, which tells the backend to stop generating.
+        Endpoints known to lack the route are skipped; one answering
+        404/405/501 is marked so (it still counts as healthy) and the
+        HTTPError is raised for the caller to fall back to /generate.
+        """
+        payload = {
+            "prompt": prompt,
+            "max_new_tokens": max_new_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        payload.update(self._prefix_hint(prompt))
+        no_stream = tuple(b.url for b in self.pool.backends if b.stream_supported is False)
+        backend = self.pool.acquire(tuple(exclude) + no_stream)
+        if backend is None and exclude:
+            backend = self.pool.acquire(no_stream)
+        if backend is None:
+            raise CircuitOpenError(f"LLM endpoint unavailable (circuit open, retry in {self.pool.retry_after():.0f}s)")
+        report = self._current_call()
+        report["attempts"] += 1
+        report["backend"] = backend.url
+        started = time.time()
+        ok = False
+        finished = False
+        try:
+            with self.session.post(f"{backend.url}/generate_stream", json=payload,
+                                   stream=True, timeout=self.timeout) as response:
+                if response.status_code in (404, 405, 501):
+                    logger.warning(f"{backend.url} has no streaming support, using /generate there")
+                    backend.stream_supported = False
+                    ok = True  # The endpoint itself is healthy
+                response.raise_for_status()
+                backend.stream_supported = True
+                ok = True
+                yield from self._iter_stream(response)
+                finished = True
+        finally:
+            # Early close still counts as success; latency is time-to-cancel,
+            # so it is only compared with other early-closed streams
+            route = "stream" if finished else "stream_closed_early"
+            self.pool.release(backend, time.time() - started, ok, (route, max_new_tokens))
+
+    @staticmethod
+    def _iter_stream(response):
+        """Decode an SSE or plain chunked response body into text chunks."""
+        response.encoding = response.encoding or "utf-8"
+        if "text/event-stream" in response.headers.get("Content-Type", ""):
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
                     continue
-            
-            logger.error(f"LLM request failed after 2 attempts: {last_error}")
-            return f"Error: Request timed out after 2 attempts"
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    yield json.loads(data).get("token", "")
+                except (ValueError, AttributeError):
+                    yield data
+        else:
+            for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                if chunk:
+                    yield chunk
+
+    def _request_stream(self, prompt, max_new_tokens, temperature, exclude=(), cancel=None):
+        """Stream a completion, cutting it off once a full JSON object is in."""
+        detector = JsonStreamDetector()
+        chunks = self.stream(prompt, max_new_tokens, temperature, exclude=exclude)
+        try:
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    return "Error: cancelled"
+                if detector.feed(chunk) is not None:
+                    logger.info(f"Complete JSON after {len(detector.buffer)} chars, cancelling generation")
+                    break
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in (404, 405, 501):
+                # That backend has no stream route (now marked); this call goes to /generate
+                return self._request(prompt, max_new_tokens, temperature, exclude=exclude, cancel=cancel)
+            logger.error(f"Kaggle LLM stream failed: {e}")
+            return f"Error: {str(e)}"
+        except CircuitOpenError:
+            if any(b.stream_supported is False for b in self.pool.backends):
+                # Only endpoints without a stream route may be up
+                return self._request(prompt, max_new_tokens, temperature, exclude=exclude, cancel=cancel)
+            return self._fail_fast(self._current_call())
         except Exception as e:
-            logger.error(f"Kaggle LLM request failed: {e}")
+            logger.error(f"Kaggle LLM stream failed: {e}")
+            self._current_call()["error"] = str(e)
             return f"Error: {str(e)}"
+        finally:
+            chunks.close()
+        return detector.buffer
 
-    def chat(self, messages, max_new_tokens=1000, temperature=0.7):
+    def chat(self, messages, max_new_tokens=1000, temperature=0.7, stop_at_json=False, use_cache=True):
         """
         Formats a chat history (list of dicts with 'role' and 'content') 
         into a Llama-3 prompt structure and sends it to the endpoint.
+        Messages may mark their static leading text with 'cacheable_prefix'
+        (see cacheable_prefix()); the request then carries a prefix hint.
+        """
+        self._register_prefix(self.cacheable_prefix(messages))
+        return self.generate(self.format_chat(messages), max_new_tokens, temperature, stop_at_json, use_cache)
+
+    def _register_prefix(self, prefix):
+        if not prefix:
+            return
+        with self._prefixes_lock:
+            if prefix not in self._prefixes:
+                if len(self._prefixes) >= 32:
+                    self._prefixes.clear()  # Prompt templates changed; start over
+                self._prefixes[prefix] = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+    def _prefix_hint(self, prompt):
+        """
+        Payload fields telling a compatible backend that the first
+        `cache_prefix_len` characters of the prompt are a static prefix it has
+        likely seen before under `cache_prefix_id` (so its KV cache can be
+        reused). Backends that don't know the fields ignore them.
+        """
+        with self._prefixes_lock:
+            prefixes = list(self._prefixes.items())
+        for prefix, prefix_id in prefixes:
+            if prompt.startswith(prefix):
+                return {"cache_prefix_id": prefix_id, "cache_prefix_len": len(prefix)}
+        return {}
+
+    def _get_semaphore(self):
+        """Semaphores are bound to an event loop, so keep one per running loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def agenerate(self, prompt, max_new_tokens=1000, temperature=0.7, stop_at_json=False, use_cache=True):
+        """
+        Async version of generate. At most `max_concurrency` prompts are in
+        flight at once; each runs on a worker thread over the pooled session.
+        """
+        async with self._get_semaphore():
+            return await asyncio.to_thread(self.generate, prompt, max_new_tokens, temperature, stop_at_json,
+                                           use_cache)
+
+    def chat_many(self, messages_list, max_new_tokens=1000, temperature=0.7):
+        """
+        chat() for several conversations at once, returned in input order.
+        They go out together through generate_many, so prompts sharing a
+        cacheable prefix (e.g. A/B variants) land in one batched request.
         """
+        for messages in messages_list:
+            self._register_prefix(self.cacheable_prefix(messages))
+        return self.generate_many([self.format_chat(m) for m in messages_list], max_new_tokens, temperature)
+
+    async def achat(self, messages, max_new_tokens=1000, temperature=0.7, stop_at_json=False, use_cache=True):
+        """Async version of chat."""
+        self._register_prefix(self.cacheable_prefix(messages))
+        return await self.agenerate(self.format_chat(messages), max_new_tokens, temperature, stop_at_json,
+                                    use_cache)
+
+    @staticmethod
+    def cacheable_prefix(messages):
+        """
+        The leading part of format_chat(messages) that repeats across calls.
+        Walks the messages in order: one whose 'cacheable_prefix' equals its
+        whole content is included entirely; the first one where it covers
+        only the start (or is missing) ends the prefix there.
+        Returns None if no message is marked.
+        """
+        prefix = "<|begin_of_text|>"
+        marked = False
+        for msg in messages:
+            static = msg.get("cacheable_prefix")
+            content = msg.get("content")
+            if not static or not content.startswith(static):
+                break
+            marked = True
+            prefix += f"<|start_header_id|>{msg.get('role')}<|end_header_id|>\n\n{static}"
+            if static != content:
+                break
+            prefix += "<|eot_id|>"
+        return prefix if marked else None
+
+    @staticmethod
+    def format_chat(messages):
+        """Render a list of chat messages into a Llama-3 prompt string."""
         # Simple Llama-3 formatting
         # <|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n...<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n...<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n
         
@@ -60,8 +655,7 @@ class KaggleClient:
             formatted_prompt += f"<|start_header_id|>{role}<|end_header_id|>\n\n{content}<|eot_id|>"
         
         formatted_prompt += "<|start_header_id|>assistant<|end_header_id|>\n\n"
-        
-        return self.generate(formatted_prompt, max_new_tokens, temperature)
+        return formatted_prompt
 
     @staticmethod
     def extract_json(text):
@@ -69,41 +663,4 @@ class KaggleClient:
         Extracts the LAST valid JSON object from the text.
         Skips nested JSONs to ensure we get the top-level object.
         """
-        text = text.strip()
-        candidates = []
-        
-        i = 0
-        while i < len(text):
-            if text[i] == '{':
-                # Attempt to find the matching brace
-                stack = 1
-                for j in range(i + 1, len(text)):
-                    if text[j] == '{':
-                        stack += 1
-                    elif text[j] == '}':
-                        stack -= 1
-                    
-                    if stack == 0:
-                        # Found a balanced block [i : j+1]
-                        candidate = text[i : j+1]
-                        try:
-                            obj = json.loads(candidate)
-                            if isinstance(obj, (dict, list)):
-                                candidates.append(obj)
-                                # SUCCESS: We found a valid JSON.
-                                # Advance i to j+1 to skip this block's content 
-                                # (and thus ignore any nested JSONs inside it)
-                                i = j
-                                break
-                        except:
-                            # Not valid JSON, keep scanning from i+1
-                            pass
-                        # If stack==0 but invalid, we break the inner loop 
-                        # and let the outer loop increment i
-                        break
-            i += 1
-            
-        if candidates:
-            return candidates[-1]
-            
-        return None
+        return extract_json(text)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+from logic.pre_extractor import extract_fields
+from logic.prompts import get_templates
+from logic.schema import normalize_messages, normalize_profile
+from logic.token_budget import pack_sections
+
+logger = logging.getLogger(__name__)
+
+
+class ProspectPipeline:
+    """
+    Profile text -> structured profile, similar KB prospects and messages.
+    - mode "two_step": analyze_profile, find_similar on the extracted
+      company/role/industry, then generate_campaign (two LLM round-trips)
+    - mode "fused": find_similar on a cheap local pre-extraction, then one
+      LLM call that answers {"profile": ..., "messages": ...}; falls back
+      to two_step if that answer can't be parsed
+    In both modes a profile found in the analyzer's cache is reused and
+    only the messages are generated; a fused profile is stored there under
+    the same key as an analyzed one. With `parallel_channels`, two_step
+    generates each channel as its own call (generator.generate_channels).
+    `url` (the LinkedIn profile URL, if known) goes to the analyzer's
+    rule-based pass. Results are dicts with analysis, messages,
+    similar_prospects and mode.
+    """
+
+    MODES = ("two_step", "fused")
+
+    def __init__(self, analyzer, generator, kb, mode="two_step", parallel_channels=False):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}")
+        self.analyzer = analyzer
+        self.generator = generator
+        self.kb = kb
+        self.mode = mode
+        self.parallel_channels = parallel_channels
+        self.client = analyzer.client
+
+    def run(self, raw_text, my_offering, url=None):
+        if self.mode == "fused":
+            cached = self.analyzer.cached_analysis(raw_text)
+            if cached is not None:
+                return self._run_two_step(raw_text, my_offering, analysis=cached)
+            return self._run_fused(raw_text, my_offering, url)
+        return self._run_two_step(raw_text, my_offering, url=url)
+
+    async def arun(self, raw_text, my_offering, url=None):
+        """Async version of run; LLM calls go through the client's concurrency limit."""
+        analysis = self.analyzer.cached_analysis(raw_text) if self.mode == "fused" else None
+        if self.mode == "fused" and analysis is None:
+            cleaned_text, similar, messages = self._prepare_fused(raw_text, my_offering)
+            response_text = await self.client.achat(messages, max_new_tokens=2500, stop_at_json=True)
+            result = self._parse_fused(response_text, similar, cleaned_text)
+            if result is not None:
+                return result
+        if analysis is None:
+            analysis = await self.analyzer.aanalyze_profile(raw_text, url=url)
+        if "error" in analysis:
+            return self._result(analysis, None, [], "two_step")
+        similar = self._find_similar(analysis, my_offering)
+        if self.parallel_channels:
+            messages = (await asyncio.to_thread(self.generator.generate_channels, analysis, my_offering,
+                                                similar))["messages"]
+        else:
+            messages = await self.generator.agenerate_campaign(analysis, my_offering, context_prospects=similar)
+        return self._result(analysis, messages, similar, "two_step")
+
+    def _run_two_step(self, raw_text, my_offering, analysis=None, url=None):
+        if analysis is None:
+            analysis = self.analyzer.analyze_profile(raw_text, url=url)
+        if "error" in analysis:
+            return self._result(analysis, None, [], "two_step")
+        similar = self._find_similar(analysis, my_offering)
+        if self.parallel_channels:
+            messages = self.generator.generate_channels(analysis, my_offering, context_prospects=similar)["messages"]
+        else:
+            messages = self.generator.generate_campaign(analysis, my_offering, context_prospects=similar)
+        return self._result(analysis, messages, similar, "two_step")
+
+    def _run_fused(self, raw_text, my_offering, url=None):
+        cleaned_text, similar, messages = self._prepare_fused(raw_text, my_offering)
+        response_text = self.client.chat(messages, max_new_tokens=2500, stop_at_json=True)
+        result = self._parse_fused(response_text, similar, cleaned_text)
+        if result is not None:
+            return result
+        return self._run_two_step(raw_text, my_offering, url=url)
+
+    def _find_similar(self, profile, my_offering):
+        def known(value):
+            return value if value and value != "Unknown" else None
+
+        return self.kb.find_similar(
+            company=known(profile.get("company")),
+            industry=known(profile.get("industry")),
+            role=known(profile.get("role")),
+            offering=my_offering,
+        )
+
+    def _prepare_fused(self, raw_text, my_offering):
+        """Clean the text, query the KB from a local pre-extraction and build the fused prompt.
+        Returns (cleaned text, similar prospects, chat messages)."""
+        cleaned_text = self.analyzer._clean_scraped_text(raw_text)
+        hints = extract_fields(cleaned_text)
+        similar = self._find_similar(hints, my_offering)
+
+        templates = get_templates("fused")
+        system_prompt = templates["system"]
+        user_prompt = templates["user"].render(
+            offering=my_offering,
+            context=self.generator._build_context(hints, similar),
+            profile_text=pack_sections(cleaned_text, self.analyzer.input_token_budget),
+        )
+        messages = [
+            {"role": "system", "content": system_prompt, "cacheable_prefix": system_prompt},
+            {"role": "user", "content": user_prompt, "cacheable_prefix": templates["user"].static_prefix}
+        ]
+        return cleaned_text, similar, messages
+
+    def _parse_fused(self, response_text, similar, cleaned_text):
+        """The fused result, an error result, or None to fall back to two calls."""
+        if response_text.startswith("Error:"):
+            return self._result({"error": response_text}, None, similar, "fused")
+        parsed = self.client.extract_json(response_text)
+        if not parsed or not isinstance(parsed.get("profile"), dict) or not isinstance(parsed.get("messages"), dict):
+            logger.warning("Fused answer missing profile/messages, falling back to two calls")
+            return None
+        analysis = self.analyzer._cache_put(cleaned_text, normalize_profile(parsed["profile"]))
+        return self._result(analysis, normalize_messages(parsed["messages"]), similar, "fused")
+
+    @staticmethod
+    def _result(analysis, messages, similar, mode):
+        return {"analysis": analysis, "messages": messages, "similar_prospects": similar, "mode": mode}
@@ -0,0 +1,374 @@
+import re
+
+_HEADLINE = re.compile(r"^(?P<role>[^@\n]{3,100}?)\s+(?:@|at)\s+(?P<company>[^|\n]{2,80}?)\s*(?:\||$)",
+                       re.IGNORECASE | re.MULTILINE)
+_EMPLOYMENT_TYPES = ("Full-time", "Part-time", "Internship", "Contract", "Freelance", "Apprenticeship")
+_EMPLOYMENT = re.compile(r"^(?P<company>[A-Za-z0-9][A-Za-z0-9 &.,'\-]+?) *· *"
+                         r"(?:Full-time|Part-time|Internship|Contract|Freelance|Apprenticeship)",
+                         re.MULTILINE)
+# First words of prose ("I have worked at Google"), never of a headline
+_PROSE_STARTS = {"i", "i'm", "i've", "we", "we're", "he", "she", "they", "my", "our", "currently", "previously"}
+_NAME = re.compile(r"^[A-Z][a-zA-Z'.\-]+(?: [A-Z][a-zA-Z'.\-]+){1,3}$")
+# Sections that start with a job/school title rather than the person's name
+_DETAIL_SECTION = re.compile(r"^\s*=== (?:EXPERIENCE|EDUCATION|SKILLS|CERTIFICATIONS) ===")
+_LINKEDIN_SLUG = re.compile(r"linkedin\.com/in/([^/]+)")
+_SCHOOL = re.compile(r"\b(?:University|College|Institute|School|Academy|Polytechnic|IIT|NIT|IIIT|BITS)\b")
+
+# Fallback patterns for the first ~1000 characters, loosest last
+_ROLE_AT_COMPANY = re.compile(
+    r'([A-Za-z\s\-/]+(?:Developer|Engineer|Manager|Designer|Analyst|Consultant|Architect|Intern|Student|Lead|Director|VP|Founder))\s+at\s+([A-Za-z0-9\s\-&.]+)'
+)
+_ROLE_PIPE_COMPANY = re.compile(r'([A-Za-z0-9\s\-]+)\s*\|\s*([A-Za-z0-9\s\-&.]+)')
+_TECH_ROLE = re.compile(
+    r'((?:Senior\s+|Junior\s+|Lead\s+|Full[\s-]?Stack\s+)?'
+    r'(?:Software|Java|Python|Backend|Frontend|Web|Data|Cloud|DevOps|ML|AI|System|Network|QA|Test|Mobile|iOS|Android)\s+'
+    r'(?:Developer|Engineer|Architect|Analyst|Scientist|Designer))',
+    re.IGNORECASE
+)
+_EXPERIENCE_COMPANY = re.compile(r'(?:EXPERIENCE|Experience).*?(?:at|·|-)\s*([A-Z][A-Za-z0-9\s&.]+?)(?:\n|$)')
+
+# Hallucination markers from the example prompts
+EXAMPLE_MARKERS = ["sarah jones", "sarah", "cloudscale"]
+
+# Role keywords for field validation
+ROLE_KEYWORDS = [
+    "developer", "engineer", "manager", "designer", "analyst",
+    "architect", "lead", "director", "vp", "intern", "student",
+    "consultant", "founder", "cto", "ceo", "scientist",
+    "specialist", "coordinator", "administrator", "associate",
+    "officer", "joiner", "trainee", "executive"
+]
+
+# Confidence of each rule's answer, roughly its precision on scraped LinkedIn text
+CONFIDENCE = {
+    "header_name_url_match": 0.95,
+    "header_name": 0.8,
+    "url_name": 0.6,
+    "headline": 0.85,
+    "headline_loose": 0.5,
+    "employment_company": 0.75,
+    "employment_role": 0.7,
+    "role_at_company": 0.6,
+    "role_pipe_company": 0.4,
+    "tech_role": 0.5,
+    "experience_company": 0.4,
+    "education": 0.7,
+}
+
+
+def is_garbage(val):
+    """Return True if value looks like scraping artifact, not real data."""
+    if not val or val == "Unknown":
+        return True
+    v = val.strip()
+    if "===" in v:
+        return True
+    if v.isdigit():
+        return True
+    if len(v) < 2:
+        return True
+    return False
+
+
+def sanitize_field(value):
+    """Clean a field value: take only meaningful content."""
+    if not value or value == "Unknown":
+        return "Unknown"
+    val = str(value)
+    # Always normalize: replace literal 2-char \n with real newline
+    val = val.replace(chr(92) + 'n', chr(10))
+    lines = [l.strip() for l in val.split(chr(10)) if l.strip()]
+    if not lines:
+        return "Unknown"
+    # Filter out garbage lines
+    clean_lines = [l for l in lines if not is_garbage(l)]
+    if not clean_lines:
+        return lines[-1] if lines else "Unknown"
+    if len(clean_lines) == 1:
+        return clean_lines[0]
+    return clean_lines[-1]
+
+
+def clean_text_field(value, default="Unknown", reject_examples=True):
+    """Sanitize one free-text field (name, company, role); junk and example leaks become `default`."""
+    value = sanitize_field(value)
+    if is_garbage(value) or (reject_examples and value.lower() in EXAMPLE_MARKERS):
+        return default
+    return value
+
+
+def looks_like_role(text):
+    """Returns True if text contains role-like keywords."""
+    return any(kw in text.lower() for kw in ROLE_KEYWORDS)
+
+
+def looks_like_name(text):
+    """Returns True if text looks like a person name (2-3 capitalized words, no role keywords)."""
+    words = text.strip().split()
+    if len(words) < 1 or len(words) > 5:
+        return False
+    if looks_like_role(text):
+        return False
+    # Most words should be capitalized
+    cap_count = sum(1 for w in words if w[0].isupper())
+    return cap_count >= len(words) * 0.5
+
+
+def extract_name_from_url(url):
+    """Extract a name from the LinkedIn URL slug."""
+    url_match = _LINKEDIN_SLUG.search(url or "")
+    if url_match:
+        slug = url_match.group(1)
+        # Remove trailing hash/ID (e.g., '-40842a1a2')
+        slug = re.sub(r'-[a-f0-9]{5,}$', '', slug)
+        slug = slug.replace('-', ' ').replace('/', '').strip()
+        # Remove any remaining trailing digits
+        slug = re.sub(r'\d+$', '', slug).strip()
+        if slug and len(slug) > 2:
+            return slug.title()
+    return "Unknown"
+
+
+def extract_from_experience(cleaned_text):
+    """Extract name, role, company directly from Experience section text."""
+    hdr_name = "Unknown"
+    hdr_role = "Unknown"
+    hdr_company = "Unknown"
+
+    # Name: first line after any section marker
+    for marker in ["=== EXPERIENCE ===", "=== EDUCATION ===", "=== SKILLS ==="]:
+        match = re.search(re.escape(marker) + r'\s*\n\s*(.+)', cleaned_text)
+        if match:
+            candidate = match.group(1).strip()
+            if candidate and not is_garbage(candidate) and candidate not in ("Experience", "Education", "Skills", "Licenses & certifications"):
+                hdr_name = candidate
+                break
+
+    # Company and Role: look for "Company · Full-time/Part-time/Internship" pattern
+    exp_start = cleaned_text.find("=== EXPERIENCE ===")
+    if exp_start >= 0:
+        exp_text = cleaned_text[exp_start:exp_start+1500]
+        company_match = re.search(
+            r'([A-Za-z0-9][A-Za-z0-9\s&.,\'\-]+?)\s*·\s*(?:Full-time|Part-time|Internship|Contract|Freelance|Apprenticeship)',
+            exp_text
+        )
+        if company_match:
+            hdr_company = company_match.group(1).strip()
+
+        # Role: line immediately before the company line
+        exp_lines = exp_text.split('\n')
+        for i, eline in enumerate(exp_lines):
+            if '·' in eline and any(t in eline for t in _EMPLOYMENT_TYPES):
+                if i > 0:
+                    role_candidate = exp_lines[i-1].strip()
+                    if role_candidate and not is_garbage(role_candidate) and role_candidate != "Experience":
+                        hdr_role = role_candidate
+                break
+
+    return hdr_name, hdr_role, hdr_company
+
+
+def regex_fallbacks(cleaned_text, role="Unknown", company="Unknown"):
+    """
+    Fill an Unknown role/company from headline-style patterns in the text.
+    Returns (role, company, {field: rule name}) for the fields it filled.
+    """
+    rules = {}
+    head = cleaned_text[:1000]
+    # Pattern 1: "Role at Company"
+    match = _ROLE_AT_COMPANY.search(head)
+    if match:
+        if role == "Unknown":
+            role = match.group(1).strip()
+            rules["role"] = "role_at_company"
+        if company == "Unknown":
+            company = match.group(2).strip().split('\n')[0]
+            rules["company"] = "role_at_company"
+
+    # Pattern 2: "Role | Company"
+    if company == "Unknown":
+        match2 = _ROLE_PIPE_COMPANY.search(head)
+        if match2:
+            if role == "Unknown":
+                role = match2.group(1).strip()
+                rules["role"] = "role_pipe_company"
+            company = match2.group(2).strip().split('\n')[0]
+            rules["company"] = "role_pipe_company"
+
+    # Pattern 3: Role keywords
+    if role == "Unknown":
+        role_match = _TECH_ROLE.search(head)
+        if role_match:
+            role = role_match.group(1).strip()
+            rules["role"] = "tech_role"
+
+    # Pattern 4: Company from Experience section
+    if company == "Unknown":
+        exp_match = _EXPERIENCE_COMPANY.search(cleaned_text[:1500])
+        if exp_match:
+            company = exp_match.group(1).strip()
+            rules["company"] = "experience_company"
+    return role, company, rules
+
+
+def reconcile_fields(analysis, cleaned_text, url=None):
+    """
+    Clean up name/company/role from an LLM profile: drop scraping junk and
+    example-prompt leaks, cross-check the name against the LinkedIn URL,
+    un-swap role/company/name mix-ups and fill gaps with the rule-based
+    patterns. Returns (name, company, role).
+    """
+    # Drop scraping junk and hallucinated example values (same rules as logic.schema)
+    name = clean_text_field(analysis.get("name") or "Unknown")
+    company = clean_text_field(analysis.get("company") or "Unknown")
+    role = clean_text_field(analysis.get("role") or "Unknown", reject_examples=False)
+
+    # URL-BASED NAME CROSS-VALIDATION
+    # If LLM name doesn't match URL slug at all, it came from sidebar
+    url_name = extract_name_from_url(url)
+    if name != "Unknown" and url_name != "Unknown":
+        url_parts = set(url_name.lower().split())
+        name_parts = set(name.lower().split())
+        if not url_parts.intersection(name_parts):
+            # Name is wrong - override from section header or URL
+            hdr_name, hdr_role, hdr_company = extract_from_experience(cleaned_text)
+            name = hdr_name if hdr_name != "Unknown" else url_name
+            # Company/role also likely wrong - override if we found better
+            if hdr_company != "Unknown":
+                company = hdr_company
+            if hdr_role != "Unknown":
+                role = hdr_role
+
+    # FIELD CROSS-VALIDATION
+    # If company looks like a role title
+    if company != "Unknown" and looks_like_role(company):
+        if role == "Unknown":
+            role = company
+            company = "Unknown"
+        elif not looks_like_role(role):
+            role = company
+            company = "Unknown"
+        elif looks_like_name(role):
+            # role is actually a name (e.g., "Nitish Chintakindi")
+            if name == "Unknown":
+                name = role
+            role = company
+            company = "Unknown"
+
+    # If role looks like a person name, move to name
+    if role != "Unknown" and name == "Unknown" and looks_like_name(role):
+        name = role
+        role = "Unknown"
+
+    # REGEX FALLBACKS
+    if company == "Unknown" or role == "Unknown":
+        role, company, _ = regex_fallbacks(cleaned_text, role, company)
+
+    # Name fallback
+    if name == "Unknown":
+        header_match = re.search(r'=== PROFILE HEADER ===\s*(.+)', cleaned_text)
+        if header_match:
+            candidate = header_match.group(1).strip().split('\n')[0]
+            if not is_garbage(candidate) and candidate.lower() not in EXAMPLE_MARKERS:
+                name = candidate
+
+    if name == "Unknown":
+        name = extract_name_from_url(url)
+
+    return name, company, role
+
+
+def _education(text):
+    """School lines from the EDUCATION section (or anywhere, for plain resumes)."""
+    start = text.find("=== EDUCATION ===")
+    if start >= 0:
+        end = text.find("===", start + len("=== EDUCATION ==="))
+        text = text[start:end if end >= 0 else len(text)]
+    schools = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if _SCHOOL.search(line) and len(line) <= 120 and line not in schools:
+            schools.append(line)
+    return schools[:3]
+
+
+def _headline(lines):
+    """
+    The first "Role @ Company" / "Role at Company" line among the header
+    lines, and its rule: "headline" when the role part has a role keyword,
+    "headline_loose" (low confidence, so the LLM still checks) for other
+    short non-prose titles like "Partner @ Sequoia". (None, None) if none.
+    """
+    loose = None
+    for match in _HEADLINE.finditer("\n".join(lines[:15])):
+        role = match.group("role").strip()
+        if role.split()[0].lower() in _PROSE_STARTS:
+            continue
+        if looks_like_role(role):
+            return match, "headline"
+        if loose is None and len(role.split()) <= 6:
+            loose = match
+    return (loose, "headline_loose") if loose else (None, None)
+
+
+def extract_fields(text, url=None):
+    """
+    Rule-based name, company, role and education from cleaned profile text,
+    each with a confidence in [0, 1] (0 for "Unknown"). Costs microseconds,
+    so it can run before (or instead of) the LLM extraction call.
+    Returns {"name", "company", "role", "education": [...],
+    "confidence": {field: score}, "rules": {field: rule name}}.
+    """
+    rules = {}
+    name = company = role = "Unknown"
+    lines = [line.strip() for line in text.split("\n") if line.strip() and not line.startswith("===")]
+
+    # The name leads the profile header; later lines are headlines and section titles
+    for line in ([] if _DETAIL_SECTION.match(text) else lines[:2]):
+        if _NAME.match(line) and not looks_like_role(line) and line.lower() not in EXAMPLE_MARKERS:
+            # Resumes often set the name in capitals
+            name = line.title() if line.isupper() else line
+            rules["name"] = "header_name"
+            break
+    url_name = extract_name_from_url(url)
+    if url_name != "Unknown":
+        if name == "Unknown":
+            name, rules["name"] = url_name, "url_name"
+        elif set(url_name.lower().split()) & set(name.lower().split()):
+            rules["name"] = "header_name_url_match"
+        else:
+            # The header line belongs to someone else (e.g. a sidebar); trust the URL
+            name, rules["name"] = url_name, "url_name"
+
+    headline, headline_rule = _headline(lines)
+    employment = _EMPLOYMENT.search(text)
+    if headline:
+        role = headline.group("role").strip()
+        company = headline.group("company").strip()
+        rules["role"] = rules["company"] = headline_rule
+    elif employment:
+        company = employment.group("company").strip()
+        rules["company"] = "employment_company"
+        before = text[:employment.start()].rstrip().split("\n")
+        if before and before[-1].strip() and not before[-1].startswith("==="):
+            role = before[-1].strip()
+            rules["role"] = "employment_role"
+
+    if role == "Unknown" or company == "Unknown":
+        role, company, fallback_rules = regex_fallbacks(text, role, company)
+        rules.update(fallback_rules)
+    if company.lower() in EXAMPLE_MARKERS:
+        company = "Unknown"
+        rules.pop("company", None)
+
+    education = _education(text)
+    if education:
+        rules["education"] = "education"
+
+    result = {"name": name, "company": company, "role": role, "education": education}
+    result["confidence"] = {
+        field: CONFIDENCE[rules[field]] if field in rules else 0.0
+        for field in ("name", "company", "role", "education")
+    }
+    result["rules"] = rules
+    return result
@@ -0,0 +1,441 @@
+import hashlib
+import json
+import re
+import threading
+
+_SLOT = re.compile(r"\{\{(\w+)\}\}")
+
+
+class PromptTemplate:
+    """
+    A prompt with `{{name}}` slots, split once into literal segments so that
+    rendering is a single join instead of re-running a large f-string.
+    Everything before the first slot is the static prefix, byte-identical
+    on every call.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        parts = _SLOT.split(text)
+        # Even indexes are literals, odd indexes are slot names
+        self._literals = parts[0::2]
+        self.slots = parts[1::2]
+
+    @property
+    def static_prefix(self):
+        return self._literals[0]
+
+    def partial(self, **values):
+        """Fill some slots now (e.g. static examples) and return the smaller template."""
+        text = _SLOT.sub(lambda m: values.get(m.group(1), m.group(0)), self.text)
+        return PromptTemplate(text)
+
+    def render(self, **values):
+        """Fill every slot; a missing value raises KeyError."""
+        out = [self._literals[0]]
+        for name, literal in zip(self.slots, self._literals[1:]):
+            out.append(values[name])
+            out.append(literal)
+        return "".join(out)
+
+
+_built = {}
+_build_lock = threading.Lock()
+
+
+def get_templates(name):
+    """Build a template set on first use and reuse it for every later call."""
+    templates = _built.get(name)
+    if templates is None:
+        with _build_lock:
+            templates = _built.get(name)
+            if templates is None:
+                templates = _built[name] = _BUILDERS[name]()
+    return templates
+
+
+def prompt_version(name):
+    """Short hash of a template set's text; changes whenever its prompts are edited."""
+    templates = get_templates(name)
+    texts = [t.text if isinstance(t, PromptTemplate) else t for _, t in sorted(templates.items())]
+    return hashlib.sha256("\0".join(texts).encode("utf-8")).hexdigest()[:12]
+
+
+ANALYZER_SYSTEM = """You are an expert sales researcher. Extract structured data from profiles into JSON. 
+
+CRITICAL RULES:
+1. Return ONLY valid JSON, no other text
+2. COMBINE ALL DATA: The input may contain multiple sections (LinkedIn, Resume, Text). MERGE all information about the SAME PERSON
+3. ONLY extract data for the profile owner (the FIRST person mentioned)
+4. IGNORE any other names appearing later (those are LinkedIn sidebar suggestions)
+5. For students: use their university as "company" and their year/major as "role"
+6. NEVER use null - if a field is unknown, use "Unknown" string
+7. Always fill in all fields with reasonable values based on ALL provided data sources"""
+
+
+# Shared few-shot example (Sarah Jones): analyzer input/output and generator output
+EXAMPLE_PROFILE_TEXT = """
+        Name: Sarah Jones
+        Role: VP Marketing at CloudScale
+        Bio: 10 years driving growth for SaaS startups. Loves data-driven marketing and hiking.
+        Experience:
+        - VP Marketing, CloudScale (2020-Present)
+        - Director of Demand Gen, TechStart (2015-2020)
+        Education:
+        - MBA, Stanford University
+        - B.A. Communications, UCLA
+        """
+
+
+EXAMPLE_PROFILE = {
+    "name": "Sarah Jones",
+    "company": "CloudScale",
+    "role": "VP Marketing",
+    "industry": "SaaS / Technology",
+    "seniority": "Executive",
+    "education": ["MBA, Stanford University", "B.A. Communications, UCLA"],
+    "certifications": [],
+    "recent_activity": [],
+    "psychological_profile": {
+        "decision_authority": "High",
+        "pain_points": ["Scaling growth", "Data analytics"],
+        "goals": ["Drive revenue", "Brand awareness"],
+        "communication_preference": "Data-driven"
+    },
+    "communication_style": {
+        "formality": "Professional",
+        "tone": "Enthusiastic",
+        "vocabulary": "Business-oriented"
+    },
+    "key_insights": ["Experienced in SaaS growth", "Outdoor enthusiast"],
+    "personalization_hooks": ["Mention Stanford MBA", "Ask about hiking"]
+}
+
+
+EXAMPLE_CAMPAIGN = {
+    "email": {
+        "subject": "Thoughts on your AI post + Stanford connection?",
+        "body": "Hi Sarah,\n\nI was just reading your recent post about AI in Marketing - couldn't agree more about the need for automation. It's clear you're forward-thinking.\n\nNoticed you're a Stanford MBA grad as well (impressive program). That rigorous analytical background really shows in your strategic approach.\n\nGiven your focus on scaling growth at CloudScale and handling data overload, our AI-driven talent platform can help you build the right team to execute that vision without the headache.\n\nWould you be open to a quick chat next Tuesday about how we can support your scaling efforts?"
+    },
+    "linkedin": "Hi Sarah, loved your thoughts on AI in Marketing. As a fellow data-nerd (saw your Google Analytics cert!), I wanted to connect.\n\nI see you're tackling growth scaling at CloudScale. It's a tough challenge, but crucial.",
+    "whatsapp": "Hi Sarah, saw your post on AI. We're building something similar for scaling teams...\n\nYour background at Stanford suggests you value high-leverage tools. Our platform aligns perfectly with that philosophy.\n\nWe help leaders like you cut through the noise and find top-tier talent instantly.\n\nWould love to send over a case study if you're interested? Let me know!",
+    "sms": "Sarah, quick question about your AI post. It really resonated with our team's mission.\n\nWe specialize in helping VPs like you scale growth without the burnout.\n\nGiven your focus on efficiency, I think our solution could be a game-changer for CloudScale.\n\nFree for a 5-min call this week to discuss strategies?",
+    "instagram": "Hey Sarah, huge fan of your content on AI - it's spot on!\n\nI noticed you're also into hiking; that's awesome. We believe in work-life balance too.\n\nAt our core, we help marketing leaders automate the heavy lifting so they can focus on strategy (and trails!).\n\nCheck out our link if you need help scaling your team effectively.",
+    "analysis": {
+        "personalization_score": "9.5/10",
+        "reasoning": "weaved in post + education + certs naturally."
+    }
+}
+
+
+def build_analyzer_templates():
+    """System prompt and few-shot user template for ProspectAnalyzer."""
+    example_input = EXAMPLE_PROFILE_TEXT
+
+    example_output = json.dumps(EXAMPLE_PROFILE, indent=2)
+    
+    student_example_input = """
+        Sanskar Nalegaonkar
+        Sophomore @ VIT Pune | Explorer of Tech & Ideas | Passionate About Data Science
+        Experience:
+        - Outreach Council Member, I2IOC - Training and Placement Cell, VIT Pune
+        - Finance Coordinator, EPEC VIT PUNE
+        Education:
+        - Information Technology, Vishwakarma Institute Of Technology
+        """
+    
+    student_example_output = json.dumps({
+        "name": "Sanskar Nalegaonkar",
+        "company": "VIT Pune",
+        "role": "Sophomore - Information Technology Student",
+        "industry": "Education / Technology",
+        "seniority": "Student",
+        "education": ["Information Technology, Vishwakarma Institute Of Technology"],
+        "certifications": [],
+        "recent_activity": [],
+        "psychological_profile": {
+            "decision_authority": "Low",
+            "pain_points": ["Learning new skills", "Building experience", "Career preparation"],
+            "goals": ["Gain practical experience", "Build portfolio", "Network with professionals"],
+            "communication_preference": "Enthusiastic"
+        },
+        "communication_style": {
+            "formality": "Casual",
+            "tone": "Eager",
+            "vocabulary": "Simple"
+        },
+        "key_insights": ["Active in college clubs", "Interested in Data Science"],
+        "personalization_hooks": ["Mention club activities", "Discuss tech interests"]
+    }, indent=2)
+    
+    # Add example showing combination of multiple sources
+    combined_example_input = """
+=== LINKEDIN PROFILE DATA ===
+Sarah Jones
+VP Marketing at CloudScale
+Experience:
+- VP Marketing, CloudScale (2020-Present)
+
+=== RESUME / CV DATA ===
+SARAH JONES
+Education:
+- MBA, Stanford University (2015)
+- B.A. Communications, UCLA (2010)
+Skills: Marketing Strategy, Data Analytics, Team Leadership
+Certifications: Google Analytics Certified
+"""
+    
+    combined_example_output = json.dumps({
+        "name": "Sarah Jones",
+        "company": "CloudScale",
+        "role": "VP Marketing",
+        "industry": "SaaS / Technology",
+        "seniority": "Executive",
+        "education": ["MBA, Stanford University (2015)", "B.A. Communications, UCLA (2010)"],
+        "certifications": ["Google Analytics Certified"],
+        "recent_activity": [],
+        "psychological_profile": {
+            "decision_authority": "High",
+            "pain_points": ["Scaling growth", "Data-driven decisions"],
+            "goals": ["Drive revenue", "Build high-performing teams"],
+            "communication_preference": "Data-driven"
+        },
+        "communication_style": {
+            "formality": "Professional",
+            "tone": "Confident",
+            "vocabulary": "Business-focused"
+        },
+        "key_insights": ["Strong educational background", "Experienced executive", "Analytics-focused"],
+        "personalization_hooks": ["Mention Stanford MBA", "Discuss marketing analytics", "Reference leadership experience"]
+    }, indent=2)
+
+    user_template = PromptTemplate("""
+EXAMPLE 1 - PROFESSIONAL:
+Input:
+{{example_input}}
+
+Output:
+{{example_output}}
+
+EXAMPLE 2 - STUDENT:
+Input:
+{{student_example_input}}
+
+Output:
+{{student_example_output}}
+
+EXAMPLE 3 - COMBINED SOURCES (LinkedIn + Resume):
+Input:
+{{combined_example_input}}
+
+Output:
+{{combined_example_output}}
+
+NOW ANALYZE THIS PROFILE:
+The following data may contain MULTIPLE SECTIONS (LinkedIn, Resume, Text Notes).
+COMBINE all information about the SAME person into ONE comprehensive profile.
+
+{{profile_text}}
+
+CRITICAL INSTRUCTIONS:
+- MERGE information from ALL sections above
+- If LinkedIn says "VP Marketing" and Resume adds "MBA Stanford", include BOTH
+- Return ONLY valid JSON
+- NEVER use null, use "Unknown" or empty array [] instead
+- For students, use university as company
+- Extract data only for the FIRST person mentioned (ignore sidebar suggestions)
+- Fill all fields with information gathered from ALL provided sources
+
+JSON OUTPUT:
+""")
+
+    # Reduced prompt for profiles whose name/company/role the rule-based
+    # extractor already found with high confidence: one example instead of
+    # three, and those fields handed over instead of asked for
+    known_template = PromptTemplate("""
+EXAMPLE - COMBINED SOURCES (LinkedIn + Resume):
+Input:
+{{combined_example_input}}
+
+Output:
+{{combined_example_output}}
+
+NOW ANALYZE THIS PROFILE:
+These fields were already read from the profile, copy them unchanged:
+{{known_fields}}
+
+The following data may contain MULTIPLE SECTIONS (LinkedIn, Resume, Text Notes).
+COMBINE all information about this person into ONE comprehensive profile.
+
+{{profile_text}}
+
+CRITICAL INSTRUCTIONS:
+- Use the name, company and role given above
+- MERGE information from ALL sections above
+- Return ONLY valid JSON
+- NEVER use null, use "Unknown" or empty array [] instead
+
+JSON OUTPUT:
+""")
+
+    return {
+        "system": ANALYZER_SYSTEM,
+        "user": user_template.partial(
+            example_input=example_input, example_output=example_output,
+            student_example_input=student_example_input, student_example_output=student_example_output,
+            combined_example_input=combined_example_input, combined_example_output=combined_example_output,
+        ),
+        "user_known_fields": known_template.partial(
+            combined_example_input=combined_example_input, combined_example_output=combined_example_output,
+        ),
+    }
+
+
+def build_generator_templates():
+    """
+    System prompt and few-shot user template for MessageGenerator. Laid out
+    static-first so the backend can reuse its KV cache: rules and examples,
+    then the per-campaign offering, then the per-prospect social proof and
+    profile.
+    """
+    system_prompt = """
+        You are a world-class SDR and Copywriter.
+        Your task is to generate hyper-personalized outreach messages that feel warm and well-researched.
+        
+        CRITICAL RULES:
+        1. MESSAGE LENGTH: ALL platform messages (LinkedIn, WhatsApp, SMS, Instagram) MUST be 4-5 lines minimum (not counting greeting/signature).
+           - Each message should be comprehensive and compelling. Do NOT generate 1-liners.
+        2. NO FLUFF: Don't just list facts. Weave them into a narrative. 
+        3. INTEGRATION: You must fluidly bridge the prospect's specific details (pain points, recent activity) with the 'OFFERING CONTEXT'. Do not just paste the offering; explain *why* it matters to *them*.
+        4. TONE: Professional yet conversational.
+        5. CALL TO ACTION: Clear next step.
+        """
+
+    example_profile = json.dumps({
+        "name": "Sarah Jones",
+        "company": "CloudScale",
+        "role": "VP Marketing",
+        "education": ["MBA, Stanford"],
+        "certifications": ["Google Analytics"],
+        "recent_activity": ["Posted about AI in Marketing"],
+        "psychological_profile": {"pain_points": ["Scaling growth", "Data overload"]},
+        "key_insights": ["Loves hiking"],
+        "personalization_hooks": ["Mention Stanford", "Discuss AI post"]
+    }, indent=2)
+
+    example_output = json.dumps(EXAMPLE_CAMPAIGN, indent=2)
+
+    user_template = PromptTemplate("""
+        EXAMPLE INPUT PROFILE:
+        {{example_profile}}
+        
+        EXAMPLE JSON OUTPUT:
+        {{example_output}}
+        
+        OFFERING CONTEXT:
+        "{{offering}}"
+        {{context}}
+        
+        REAL INPUT PROFILE:
+        {{profile_json}}
+        
+        REAL JSON OUTPUT:
+        """)
+
+    return {
+        "system": system_prompt,
+        "user": user_template.partial(example_profile=example_profile, example_output=example_output),
+    }
+
+
+FUSED_SYSTEM = """You are an expert sales researcher and a world-class SDR and Copywriter.
+In ONE answer you extract a structured profile of the prospect AND write hyper-personalized outreach messages for them.
+
+CRITICAL RULES:
+1. Return ONLY valid JSON with two keys: "profile" and "messages", no other text
+2. PROFILE: merge all sections (LinkedIn, Resume, Text) about the FIRST person mentioned; ignore sidebar names
+3. PROFILE: for students use their university as "company" and their year/major as "role"
+4. PROFILE: NEVER use null - if a field is unknown, use "Unknown" string or []
+5. MESSAGES: email, linkedin, whatsapp, sms and instagram; platform messages MUST be 4-5 lines minimum
+6. MESSAGES: weave the prospect's specific details into a narrative and bridge them with the OFFERING CONTEXT
+7. MESSAGES: professional yet conversational, with a clear call to action"""
+
+
+def build_fused_templates():
+    """
+    One-call analyze + generate prompt for logic.pipeline: the analyzer
+    example input with its profile and campaign as a single JSON answer.
+    Static rules and example first, then offering, then prospect.
+    """
+    example_output = json.dumps({"profile": EXAMPLE_PROFILE, "messages": EXAMPLE_CAMPAIGN}, indent=2)
+
+    user_template = PromptTemplate("""
+EXAMPLE INPUT:
+{{example_input}}
+
+EXAMPLE JSON OUTPUT:
+{{example_output}}
+
+OFFERING CONTEXT:
+"{{offering}}"
+{{context}}
+
+NOW ANALYZE THIS PROFILE AND WRITE THE MESSAGES:
+The following data may contain MULTIPLE SECTIONS (LinkedIn, Resume, Text Notes).
+
+{{profile_text}}
+
+FUSED JSON OUTPUT:
+""")
+
+    return {
+        "system": FUSED_SYSTEM,
+        "user": user_template.partial(example_input=EXAMPLE_PROFILE_TEXT, example_output=example_output),
+    }
+
+
+def build_channel_templates():
+    """
+    Single-channel variant of the generator prompt for
+    MessageGenerator.generate_channels. Identical to it up to the final
+    instruction, so all channel calls share the generator's cached prefix.
+    """
+    generator = build_generator_templates()
+    marker = "        REAL JSON OUTPUT:\n"
+    text = generator["user"].text
+    cut = text.rindex(marker)
+    user_template = PromptTemplate(
+        text[:cut]
+        + '        ONLY THE "{{channel}}" MESSAGE IS NEEDED: return JSON with just the "{{channel}}" key.\n'
+        + "        \n"
+        + text[cut:]
+    )
+    return {"system": generator["system"], "user": user_template}
+
+
+def build_variant_templates():
+    """
+    A/B variant of the generator prompt for MessageGenerator.generate_variants:
+    the generator prompt plus one angle instruction before the final line,
+    so every variant shares the generator's cached prefix.
+    """
+    generator = build_generator_templates()
+    marker = "        REAL JSON OUTPUT:\n"
+    text = generator["user"].text
+    cut = text.rindex(marker)
+    user_template = PromptTemplate(
+        text[:cut]
+        + "        VARIANT {{label}}: {{instruction}}\n"
+        + "        \n"
+        + text[cut:]
+    )
+    return {"system": generator["system"], "user": user_template}
+
+
+_BUILDERS = {
+    "analyzer": build_analyzer_templates,
+    "generator": build_generator_templates,
+    "fused": build_fused_templates,
+    "channel": build_channel_templates,
+    "variant": build_variant_templates,
+}
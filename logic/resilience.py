@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised when every endpoint's circuit is open and a call fails fast."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker for one LLM endpoint.
+    - closed: requests flow; `failure_threshold` consecutive failures open it
+    - open: requests fail fast until `recovery_timeout` seconds have passed
+    - half_open: up to `half_open_max_calls` probe requests are let through;
+      a success closes the circuit, a failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, recovery_timeout=30, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_for = recovery_timeout
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        """Caller holds the lock. Moves open -> half_open once the timeout expires."""
+        if self._state == self.OPEN and time.time() - self._opened_at >= self._open_for:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def available(self):
+        """True if a request would be let through right now (does not reserve a probe)."""
+        with self._lock:
+            state = self._current_state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and self._probes < self.half_open_max_calls)
+
+    def allow_request(self):
+        """Reserve the right to send one request; False means fail fast."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._current_state() == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(self.recovery_timeout)
+
+    def trip(self, duration=None):
+        """Force the circuit open (e.g. failed health check, far too slow)."""
+        with self._lock:
+            self._open(duration or self.recovery_timeout)
+
+    def reset(self):
+        self.record_success()
+
+    def half_open(self):
+        """
+        Let the next request through as a probe before the timeout is up
+        (e.g. a passed health check). Only that request's success closes
+        the circuit. Returns True if the circuit was open.
+        """
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return False
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            return True
+
+    def _open(self, duration):
+        """Caller holds the lock."""
+        self._state = self.OPEN
+        self._opened_at = time.time()
+        self._open_for = duration
+        self._probes = 0
+
+    def retry_after(self):
+        """Seconds until the circuit lets a probe through (0 if it already does)."""
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(self._open_for - (time.time() - self._opened_at), 0.0)
+
+
+class Backoff:
+    """
+    Exponential backoff with "full jitter": attempt n waits a random time in
+    [0, min(cap, base * 2**n)], which spreads out retries from parallel callers.
+    """
+
+    def __init__(self, base=0.5, cap=30.0, jitter=True):
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        ceiling = min(self.cap, self.base * (2 ** attempt))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies, bucketed by request size."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, bucket, seconds):
+        with self._lock:
+            samples = self._samples.get(bucket)
+            if samples is None:
+                samples = self._samples[bucket] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, bucket, pct):
+        """The pct-th percentile latency, or None until `min_samples` are in."""
+        with self._lock:
+            samples = sorted(self._samples.get(bucket, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(len(samples) * pct / 100.0), len(samples) - 1)
+        return samples[index]
+
+
+class HedgeBudget:
+    """
+    Token bucket that caps duplicate requests: every primary request earns
+    `ratio` tokens (up to `burst`), every hedge spends one. With ratio=0.1,
+    hedging adds at most ~10% extra load on the backends.
+    """
+
+    def __init__(self, ratio=0.1, burst=5):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "denied": 0}
+
+    def on_request(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.stats["hedged"] += 1
+                return True
+            self.stats["denied"] += 1
+            return False
+
+    def record_win(self):
+        with self._lock:
+            self.stats["hedge_wins"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,198 @@
+from logic.pre_extractor import EXAMPLE_MARKERS, clean_text_field
+
+
+
+class _Always:
+    """Value class no value has: steps with it as their skip class always run."""
+
+
+class Field:
+    """
+    One schema entry. `kind` is "str", "list" (of strings) or "dict" (with
+    `fields`, a nested schema). `default` replaces null/missing/wrong-typed
+    values. For strings, `sanitize` keeps one clean line of multi-line
+    scraping junk (and treats junk as missing), and `reject_examples`
+    treats values copied from the prompt's example profile as missing.
+    """
+
+    def __init__(self, kind="str", default=None, sanitize=False, reject_examples=False, fields=None):
+        self.kind = kind
+        self.default = default
+        self.sanitize = sanitize
+        self.reject_examples = reject_examples
+        self.fields = fields
+
+
+def _fill_nulls(value, default):
+    """Replace None anywhere inside `value` (fields outside the schema), without recursion."""
+    if value is None:
+        return default
+    stack = [value] if isinstance(value, (dict, list)) else []
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, item in items:
+            if item is None:
+                node[key] = default
+            elif isinstance(item, (dict, list)):
+                stack.append(item)
+    return value
+
+
+class Normalizer:
+    """
+    A schema compiled once into one small function per field, so that
+    normalizing a dict is a single pass: nulls replaced, types coerced,
+    text fields sanitized and example values rejected. Dicts are fixed up
+    in place and returned; keys outside the schema keep their values with
+    nulls replaced by `extra_default`. Each step also names the value class
+    that is already valid as is (str for plain text fields), so the common
+    case costs one class check and neither a call nor a write.
+    """
+
+    def __init__(self, schema, extra_default="Unknown"):
+        self.schema = schema
+        self.extra_default = extra_default
+        self._steps = [(key,) + self._compile(field) for key, field in schema.items()]
+        self._keys = frozenset(schema)
+
+    def normalize(self, data):
+        if not isinstance(data, dict):
+            return _fill_nulls(data, self.extra_default)
+        return self._fix_dict(data)
+
+    def _fix_dict(self, data):
+        """normalize for a dict, and the step for nested dict fields (anything else becomes {})."""
+        if data.__class__ is not dict and not isinstance(data, dict):
+            data = {}
+        get = data.get
+        for key, valid_class, fix in self._steps:
+            value = get(key)
+            if value.__class__ is not valid_class:
+                data[key] = fix(value)
+        if len(data) > len(self._keys):
+            for key, value in data.items():
+                if key not in self._keys and (value is None or isinstance(value, (dict, list))):
+                    data[key] = _fill_nulls(value, self.extra_default)
+        return data
+
+    def _compile(self, field):
+        """(valid class, fix function) for one field."""
+        if field.kind == "dict":
+            return _Always, Normalizer(field.fields, self.extra_default)._fix_dict
+        if field.kind == "list":
+            return _Always, self._compile_list(field)
+        if field.sanitize:
+            return _Always, self._compile_str(field)
+        return str, self._compile_str(field)
+
+    @staticmethod
+    def _compile_str(field):
+        default = field.default if field.default is not None else "Unknown"
+        if field.sanitize:
+            reject = field.reject_examples
+
+            def fix(value):
+                if value.__class__ is str and "\n" not in value and "\\" not in value:
+                    # Single line: skip the multi-line sanitize
+                    value = value.strip()
+                    if (len(value) < 2 or value == "Unknown" or "===" in value or value.isdigit()
+                            or (reject and value.lower() in EXAMPLE_MARKERS)):
+                        return default
+                    return value
+                if value is None or isinstance(value, (dict, list)):
+                    return default
+                return clean_text_field(value, default, reject)
+            return fix
+
+        def fix(value):
+            if value.__class__ is str:
+                return value
+            if value is None or isinstance(value, (dict, list)):
+                return default
+            return str(value)
+        return fix
+
+    @staticmethod
+    def _compile_list(field):
+        def fix(value):
+            if value is None:
+                return []
+            if isinstance(value, str):
+                return [value] if value.strip() else []
+            if not isinstance(value, list):
+                return [str(value)] if not isinstance(value, dict) else []
+            for item in value:
+                if item.__class__ is not str:
+                    break
+            else:
+                return value
+            for i, item in enumerate(value):
+                if item is None:
+                    value[i] = "Unknown"
+                elif isinstance(item, (dict, list)):
+                    _fill_nulls(item, "Unknown")
+            return value
+        return fix
+
+
+
+PROFILE_SCHEMA = {
+    "name": Field(sanitize=True, reject_examples=True),
+    "company": Field(sanitize=True, reject_examples=True),
+    "role": Field(sanitize=True),
+    "industry": Field(),
+    "seniority": Field(),
+    "education": Field("list"),
+    "certifications": Field("list"),
+    "recent_activity": Field("list"),
+    "psychological_profile": Field("dict", fields={
+        "decision_authority": Field(),
+        "pain_points": Field("list"),
+        "goals": Field("list"),
+        "communication_preference": Field(),
+    }),
+    "communication_style": Field("dict", fields={
+        "formality": Field(),
+        "tone": Field(),
+        "vocabulary": Field(),
+    }),
+    "key_insights": Field("list"),
+    "personalization_hooks": Field("list"),
+}
+
+MESSAGE_SCHEMA = {
+    "email": Field("dict", fields={
+        "subject": Field(default=""),
+        "body": Field(default=""),
+    }),
+    "linkedin": Field(default=""),
+    "whatsapp": Field(default=""),
+    "sms": Field(default=""),
+    "instagram": Field(default=""),
+    "analysis": Field("dict", fields={
+        "personalization_score": Field(default="N/A"),
+        "reasoning": Field(default=""),
+    }),
+}
+
+_PROFILE = Normalizer(PROFILE_SCHEMA)
+_MESSAGES = Normalizer(MESSAGE_SCHEMA, extra_default="")
+
+
+def normalize_profile(data):
+    """Normalize an analyzer profile dict in place (see PROFILE_SCHEMA) and return it."""
+    return _PROFILE.normalize(data)
+
+
+def normalize_messages(data):
+    """
+    Normalize a generated campaign in place (see MESSAGE_SCHEMA) and return
+    it. An email that came back as a plain string becomes its body.
+    """
+    if data.__class__ is not dict and not isinstance(data, dict):
+        return _MESSAGES.normalize(data)
+    email = data.get("email")
+    if isinstance(email, str):
+        data["email"] = {"subject": "", "body": email}
+    return _MESSAGES._fix_dict(data)
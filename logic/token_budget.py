@@ -0,0 +1,174 @@
+import re
+
+_HEADER = re.compile(r"^=== (.+?) ===[ \t]*$", re.MULTILINE)
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Lower rank = more useful for profile extraction; packed first
+SECTION_RANKS = {
+    "PROFILE HEADER": 0,
+    "ABOUT": 1,
+    "EXPERIENCE": 1,
+    "RESUME / CV DATA": 2,
+    "ADDITIONAL TEXT / NOTES": 2,
+    "EDUCATION": 3,
+    "RECENT_POSTS": 4,
+    "CERTIFICATIONS": 5,
+    "SKILLS": 5,
+}
+DEFAULT_RANK = 3
+
+TRUNCATED = "[...]"
+
+# About what the old `cleaned_text[:8000]` cut sent (1900-2050 estimated
+# tokens on typical profiles), so packing never gives the model less text
+DEFAULT_INPUT_TOKENS = 2048
+
+
+def estimate_tokens(text):
+    """
+    Rough local token count for Llama-3 style BPE: one token per punctuation
+    mark, one per short word and one more per ~7 characters of longer words.
+    Close enough (~10%) for budgeting without loading a tokenizer.
+    """
+    return sum(1 + len(piece) // 7 for piece in _PIECES.findall(text))
+
+
+class Section:
+    """One `=== NAME ===` block of the combined profile text."""
+
+    def __init__(self, name, header, body, index):
+        self.name = name
+        self.header = header
+        self.body = body
+        self.index = index
+        self.rank = SECTION_RANKS.get(name, DEFAULT_RANK)
+        self.lines = [line for line in body.split("\n") if line.strip()]
+        self.line_tokens = [estimate_tokens(line) + 1 for line in self.lines]
+        self.header_tokens = estimate_tokens(header) + 1 if header else 0
+        self.tokens = self.header_tokens + sum(self.line_tokens)
+
+
+def split_sections(text):
+    """Split on `=== NAME ===` header lines; text before the first header is a nameless section."""
+    sections = []
+    matches = list(_HEADER.finditer(text))
+    preamble = text[:matches[0].start()] if matches else text
+    if preamble.strip():
+        sections.append(Section("", "", preamble, 0))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end():end]
+        sections.append(Section(match.group(1).strip().upper(), match.group(0).strip(), body, len(sections)))
+    return sections
+
+
+def pack_sections(text, max_tokens=DEFAULT_INPUT_TOKENS, min_section_tokens=120):
+    """
+    Fit profile text into `max_tokens` estimated tokens. Text that already
+    fits is returned unchanged. Otherwise every section first gets up to
+    `min_section_tokens` (so a long LinkedIn scrape can't push the resume
+    out entirely), then the rest of the budget goes to sections by rank.
+    Sections are cut at line boundaries and kept in their original order.
+    """
+    sections = split_sections(text)
+    if sum(s.tokens for s in sections) <= max_tokens:
+        return text
+
+    by_rank = sorted(sections, key=lambda s: (s.rank, s.index))
+    grants = {s.index: 0 for s in sections}
+    remaining = max_tokens
+    for floor_pass in (True, False):
+        for section in by_rank:
+            want = section.tokens - grants[section.index]
+            if floor_pass:
+                want = min(want, max(min_section_tokens - grants[section.index], 0))
+            give = min(want, remaining)
+            grants[section.index] += give
+            remaining -= give
+
+    parts = []
+    for section in sections:
+        budget = grants[section.index] - section.header_tokens
+        kept = []
+        truncated = False
+        for line, tokens in zip(section.lines, section.line_tokens):
+            if tokens > budget:
+                truncated = True
+                # Long paragraph (PDF resumes often have no line breaks): keep its start
+                if budget >= 20:
+                    cut = line[:int(len(line) * budget / tokens)].rsplit(" ", 1)[0]
+                    kept.append(cut)
+                break
+            kept.append(line)
+            budget -= tokens
+        if section.lines and not kept:
+            continue  # Nothing of the body fits; the bare header is just noise
+        if truncated:
+            kept.append(TRUNCATED)
+        parts.append("\n".join(([section.header] if section.header else []) + kept))
+    return "\n".join(parts)
+
+
+
+def _pieces(section, max_tokens):
+    """Yield (tokens, line) for a section, splitting lines too big for one chunk."""
+    budget = max_tokens - section.header_tokens
+    for line, tokens in zip(section.lines, section.line_tokens):
+        if tokens <= budget:
+            yield tokens, line
+            continue
+        # A single oversized line (PDF paragraph): split it by characters
+        step = max(int(len(line) * budget / tokens), 1)
+        for start in range(0, len(line), step):
+            part = line[start:start + step]
+            yield estimate_tokens(part) + 1, part
+
+
+def chunk_sections(text, max_tokens=DEFAULT_INPUT_TOKENS, anchor_tokens=150, max_chunks=8):
+    """
+    Split profile text into chunks of at most ~`max_tokens` for map-reduce
+    analysis. Lines are filled into chunks in order; a section continued in
+    the next chunk gets its header repeated. The top-ranked section (the
+    profile header) is also prepended to every chunk that lacks it, cut to
+    `anchor_tokens`, so each chunk knows whose data it is reading.
+    At most `max_chunks` chunks are returned, dropping the lowest-ranked.
+    """
+    sections = split_sections(text)
+    anchor = ""
+    top = min(sections, key=lambda s: (s.rank, s.index)) if sections else None
+    if top is not None and top.rank == 0 and top.header:
+        anchor = pack_sections("\n".join([top.header] + top.lines), anchor_tokens)
+        # Leave room for the anchor in chunks that don't start with it
+        max_tokens = max(max_tokens - estimate_tokens(anchor) - 1, anchor_tokens)
+
+    chunks = []  # {"rank", "tokens", "lines"}
+    current = None
+    for section in sections:
+        header_placed = False
+        pieces = list(_pieces(section, max_tokens)) or [(0, None)]
+        for tokens, line in pieces:
+            cost = tokens + (0 if header_placed else section.header_tokens)
+            if current is None or (current["lines"] and current["tokens"] + cost > max_tokens):
+                current = {"rank": section.rank, "tokens": 0, "lines": []}
+                chunks.append(current)
+                header_placed = False
+                cost = tokens + section.header_tokens
+            if not header_placed and section.header:
+                current["lines"].append(section.header)
+            header_placed = True
+            if line is not None:
+                current["lines"].append(line)
+            current["tokens"] += cost
+            current["rank"] = min(current["rank"], section.rank)
+
+    if len(chunks) > max_chunks:
+        keep = sorted(range(len(chunks)), key=lambda i: (chunks[i]["rank"], i))[:max_chunks]
+        chunks = [chunks[i] for i in sorted(keep)]
+
+    texts = []
+    for chunk in chunks:
+        body = "\n".join(chunk["lines"])
+        if anchor and top.header not in chunk["lines"]:
+            body = anchor + "\n" + body
+        texts.append(body)
+    return texts
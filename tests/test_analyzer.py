@@ -0,0 +1,43 @@
+import unittest
+
+from benchmarks.stub_server import StubLLMServer
+from logic.analyzer import ProspectAnalyzer
+from logic.llm_client import KaggleClient
+
+CLEAR_PROFILE = """Maria Lopez
+Data Engineer at Fjord Analytics
+About
+Building streaming pipelines for retail analytics.
+"""
+
+
+class ReducedPromptTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubLLMServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = KaggleClient(self.server.url)
+        self.addCleanup(self.client.close)
+
+    def analyze(self, **analyzer_args):
+        self.server.reset()
+        result = ProspectAnalyzer(client=self.client, **analyzer_args).analyze_profile(CLEAR_PROFILE)
+        return result, self.server.snapshot()
+
+    def test_confident_fields_shrink_the_prompt_and_are_kept(self):
+        full, full_stats = self.analyze()
+        reduced, reduced_stats = self.analyze(reduce_prompt_confidence=0.6)
+        self.assertEqual(reduced_stats["generate"], 1)
+        self.assertLess(reduced_stats["prompt_chars"], full_stats["prompt_chars"])
+        self.assertEqual((reduced["name"], reduced["company"], reduced["role"]),
+                         ("Maria Lopez", "Fjord Analytics", "Data Engineer"))
+        self.assertEqual(reduced["extraction"], "rules+llm")
+        self.assertNotIn("extraction", full)
+
+    def test_skip_wins_over_reduced_prompt(self):
+        result, stats = self.analyze(skip_llm_confidence=0.6, reduce_prompt_confidence=0.5)
+        self.assertEqual(result["extraction"], "rules")
+        self.assertNotIn("generate", stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
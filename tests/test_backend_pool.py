@@ -0,0 +1,41 @@
+import unittest
+
+from logic.backend_pool import BackendPool
+
+
+class SlowEjectionTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = BackendPool(["http://a", "http://b", "http://c"], min_samples=3)
+
+    def record(self, backend, latency, request_class, times):
+        for _ in range(times):
+            self.pool.acquire()
+            self.pool.release(backend, latency, True, request_class)
+
+    def test_slow_endpoint_ejected_once_it_has_enough_samples(self):
+        a, b, c = self.pool.backends
+        self.record(b, 0.5, ("generate", 100), 3)
+        self.record(c, 0.5, ("generate", 100), 3)
+        self.record(a, 2.0, ("generate", 100), 2)
+        self.assertFalse(a.is_ejected())
+        self.record(a, 2.0, ("generate", 100), 1)
+        self.assertTrue(a.is_ejected())
+
+    def test_latency_compared_only_within_a_request_class(self):
+        a, b, c = self.pool.backends
+        self.record(b, 0.5, ("stream_closed_early", 800), 5)
+        self.record(c, 0.5, ("stream_closed_early", 800), 5)
+        self.record(a, 2.0, ("stream", 800), 5)
+        self.assertFalse(a.is_ejected())
+
+    def test_single_long_request_does_not_eject(self):
+        a, b, c = self.pool.backends
+        self.record(b, 0.5, ("generate", 100), 5)
+        self.record(c, 0.5, ("generate", 100), 5)
+        self.record(a, 0.5, ("generate", 100), 2)
+        self.record(a, 5.0, ("generate", 100), 1)
+        self.assertFalse(a.is_ejected())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from logic.batcher import MicroBatcher
+from logic.llm_client import KaggleClient
+
+
+class ShutDownClient:
+    """Client whose executor has already been shut down."""
+
+    def _get_executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.shutdown()
+        return executor
+
+
+class MicroBatcherCloseTest(unittest.TestCase):
+    def test_batch_on_closed_executor_fails_instead_of_hanging(self):
+        batcher = MicroBatcher(ShutDownClient(), max_wait_ms=1)
+        futures = [batcher.submit(f"prompt {i}", 10, 0.7) for i in range(3)]
+        for future in futures:
+            self.assertEqual(future.result(timeout=5), MicroBatcher.CLOSED_ERROR)
+        batcher.close()
+
+    def test_submit_after_client_close_fails_immediately(self):
+        client = KaggleClient("http://127.0.0.1:9")
+        client.close()
+        future = client.batcher.submit("prompt", 10, 0.7)
+        self.assertEqual(future.result(timeout=1), MicroBatcher.CLOSED_ERROR)
+
+    def test_close_fails_queued_prompts(self):
+        batcher = MicroBatcher(ShutDownClient())
+        future = Future()
+        batcher._queue.put(("prompt", 10, 0.7, future))  # Queued, never picked up by a loop
+        batcher.close()
+        self.assertEqual(future.result(timeout=1), MicroBatcher.CLOSED_ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
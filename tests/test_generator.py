@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.stub_server import PROFILE_ANSWER, StubLLMServer
+from logic.generator import MessageGenerator
+from logic.llm_cache import ResponseCache
+from logic.llm_client import KaggleClient
+
+
+class RegenerateChannelsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubLLMServer().start()
+        self.addCleanup(self.server.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.client = KaggleClient(self.server.url, cache=ResponseCache(path=os.path.join(tmp.name, "cache.db")))
+        self.addCleanup(self.client.close)
+        self.generator = MessageGenerator(client=self.client)
+
+    def test_regenerated_channel_reaches_the_backend_despite_the_cache(self):
+        first = self.generator.generate_channels(PROFILE_ANSWER, "Hiring platform", channels=("linkedin",))
+        self.assertEqual(self.server.snapshot()["generate"], 1)
+
+        # The same prompt again is a cache hit...
+        self.generator.generate_channels(PROFILE_ANSWER, "Hiring platform", channels=("linkedin",))
+        self.assertEqual(self.server.snapshot()["generate"], 1)
+
+        # ...but regenerating it must ask the model again
+        result = self.generator.regenerate_channels(PROFILE_ANSWER, "Hiring platform", first["messages"],
+                                                    ["linkedin"])
+        self.assertEqual(self.server.snapshot()["generate"], 2)
+        self.assertEqual(result["failed"], [])
+        self.assertTrue(result["messages"]["linkedin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from benchmarks.bench_extract_json import PROFILE, legacy_extract_json, make_inputs
+from logic.json_extract import JsonStreamDetector, extract_json
+
+ANSWER = json.dumps(PROFILE, indent=2)
+
+CASES = {
+    "bare": ANSWER,
+    "fenced": f"Here is the profile:\n```json\n{ANSWER}\n```\nLet me know if you need more.",
+    "prose_with_placeholders": f"Hi {{first_name}}, about {{company}}: {ANSWER} Thanks!",
+    "example_then_answer": f'Example: {{"name": "Sarah Jones"}}\nOutput: {ANSWER}',
+    "nested": '{"profile": {"name": "Priya"}, "messages": {"email": {"subject": "Hi"}}}',
+    "unclosed_then_answer": "{ note { note " + ANSWER,
+    "no_json": "Sorry, I can't help with that.",
+    "empty": "",
+}
+
+
+class ExtractJsonParityTest(unittest.TestCase):
+    def test_matches_legacy_scanner(self):
+        for name, text in CASES.items():
+            with self.subTest(name):
+                self.assertEqual(extract_json(text), legacy_extract_json(text))
+
+    def test_matches_legacy_on_adversarial_inputs(self):
+        for name, text in make_inputs(3000).items():
+            with self.subTest(name):
+                self.assertEqual(extract_json(text), PROFILE)
+                self.assertEqual(legacy_extract_json(text), PROFILE)
+
+    def test_braces_and_quotes_inside_strings(self):
+        text = 'Answer: {"note": "use {braces} and \\"quotes\\" freely", "n": 1}'
+        self.assertEqual(extract_json(text), {"note": 'use {braces} and "quotes" freely', "n": 1})
+
+    def test_stray_quote_in_prose_does_not_hide_the_answer(self):
+        self.assertEqual(extract_json('He said "hi. ' + ANSWER), PROFILE)
+
+
+class JsonStreamDetectorTest(unittest.TestCase):
+    def test_first_object_found_across_chunk_boundaries(self):
+        detector = JsonStreamDetector()
+        text = "Sure! " + ANSWER + "\nAnd some trailing text {"
+        results = [detector.feed(text[i:i + 7]) for i in range(0, len(text), 7)]
+        found = [i for i, r in enumerate(results) if r is not None]
+        self.assertEqual(results[found[0]], PROFILE)
+        self.assertEqual(found[0], (len("Sure! ") + len(ANSWER) - 1) // 7)
+
+    def test_placeholders_are_skipped(self):
+        detector = JsonStreamDetector()
+        self.assertIsNone(detector.feed("Hi {first_name}, "))
+        self.assertEqual(detector.feed(ANSWER), PROFILE)
+
+
+if __name__ == "__main__":
+    unittest.main()
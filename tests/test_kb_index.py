@@ -0,0 +1,41 @@
+import random
+import unittest
+
+from benchmarks.bench_find_similar import OFFERINGS, ROLES, legacy_find_similar
+from benchmarks.bench_kb_storage import COMPANIES, INDUSTRIES, fake_entries
+from logic.kb_index import SimilarityIndex
+from logic.knowledge_base import KnowledgeBase
+
+
+class SimilarityIndexParityTest(unittest.TestCase):
+    def test_matches_legacy_scoring_loop(self):
+        rng = random.Random(7)
+        entries = fake_entries(500)
+        for p in entries:
+            p["role"] = rng.choice(ROLES)
+            if rng.random() < 0.1:
+                p["company"] = rng.choice(["Unknown", "", None, "COMPANY 7"])
+        index = SimilarityIndex(entries)
+        kb = KnowledgeBase.__new__(KnowledgeBase)  # only for _detect_offering_type
+        for _ in range(300):
+            query = (rng.choice(COMPANIES + ["Unknown", None]), rng.choice(INDUSTRIES + [None]),
+                     rng.choice(ROLES + [None, "the senior engineer"]),
+                     kb._detect_offering_type(rng.choice(OFFERINGS)))
+            with self.subTest(query=query):
+                got = [(p["id"], reasons) for p, reasons in index.search(*query)]
+                self.assertEqual(got, legacy_find_similar(entries, *query))
+
+    def test_ties_keep_stored_order(self):
+        entries = [{"id": str(i), "company": "Acme", "role": "Engineer", "industry": "Robotics"} for i in range(5)]
+        matches = SimilarityIndex(entries).search("acme", None, None, "general")
+        self.assertEqual([p["id"] for p, _ in matches], ["0", "1", "2"])
+        self.assertEqual(matches[0][1], ["same_company"])
+
+    def test_empty_index_and_no_match(self):
+        self.assertEqual(SimilarityIndex([]).search("Acme", "Robotics", "Engineer", "talent"), [])
+        entries = [{"id": "1", "company": "Acme", "role": "Chef", "industry": "Food"}]
+        self.assertEqual(SimilarityIndex(entries).search("Fjord", "Robotics", "Engineer", "talent"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
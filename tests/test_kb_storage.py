@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from logic.kb_storage import LogStorage, SqliteStorage, migrate_json_to_sqlite
+from logic.knowledge_base import KnowledgeBase
+
+
+def entry(pid, name, company, status="Sent", role="Engineer"):
+    return {"id": pid, "name": name, "company": company, "role": role, "industry": "Robotics",
+            "status": status, "timestamp": "2024-01-01T00:00:00", "profile": {"name": name}}
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def write_json(self, name, data):
+        with open(self.path(name), "w") as f:
+            json.dump(data, f)
+        return self.path(name)
+
+
+class SqliteStorageTest(StorageTestCase):
+    def open(self):
+        storage = SqliteStorage(self.path("kb.db"))
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_round_trip(self):
+        storage = self.open()
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme"), entry("b", "Li Wei", "Fjord")])
+        storage.update_status("a", "Replied")
+        storage.delete("b")
+        self.assertEqual(storage.load_all(), [entry("a", "Priya Sharma", "Acme", status="Replied")])
+        self.assertEqual(storage.get_many(["a", "b"]), storage.load_all())
+        self.assertEqual(storage.match_rows(), [{"id": "a", "name": "Priya Sharma", "company": "Acme",
+                                                 "role": "Engineer", "industry": "Robotics"}])
+        self.assertEqual(storage.stats(), {"total": 1, "companies": 1, "industries": 1})
+
+    def test_upsert_matches_name_and_company_case_insensitively(self):
+        storage = self.open()
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        storage.update_status("a", "Replied")
+        storage.upsert_many([entry("new-id", "priya sharma", "ACME", role="Lead")])
+        self.assertEqual(storage.load_all(), [entry("a", "priya sharma", "ACME", status="Replied", role="Lead")])
+
+    def test_data_survives_reopening(self):
+        storage = SqliteStorage(self.path("kb.db"))
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        storage.close()
+        self.assertEqual(self.open().load_all(), [entry("a", "Priya Sharma", "Acme")])
+
+
+class MigrationTest(StorageTestCase):
+    def test_json_is_imported_once_and_left_untouched(self):
+        data = [entry("a", "Priya Sharma", "Acme"), entry("b", "Li Wei", "Fjord")]
+        json_path = self.write_json("knowledge_base.json", data)
+        storage = SqliteStorage(self.path("kb.db"))
+        self.addCleanup(storage.close)
+        self.assertEqual(migrate_json_to_sqlite(json_path, storage), 2)
+        storage.delete("a")
+        self.assertEqual(migrate_json_to_sqlite(json_path, storage), 0)
+        self.assertEqual(storage.load_all(), [data[1]])
+        with open(json_path) as f:
+            self.assertEqual(json.load(f), data)
+
+    def test_existing_ids_are_kept_and_missing_ids_assigned(self):
+        json_path = self.write_json("knowledge_base.json", [entry("a", "Priya Sharma", "Old Co"),
+                                                            {"name": "Li Wei", "company": "Fjord"}, "junk"])
+        storage = SqliteStorage(self.path("kb.db"))
+        self.addCleanup(storage.close)
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        self.assertEqual(migrate_json_to_sqlite(json_path, storage), 1)
+        stored = storage.load_all()
+        self.assertEqual(stored[0]["company"], "Acme")
+        self.assertEqual(stored[1]["name"], "Li Wei")
+        self.assertTrue(stored[1]["id"])
+
+    def test_knowledge_base_migrates_on_first_use(self):
+        json_path = self.write_json("knowledge_base.json", [entry("a", "Priya Sharma", "Acme")])
+        kb = KnowledgeBase(json_path)
+        self.addCleanup(kb.storage.close)
+        self.assertEqual(kb.load_all(), [entry("a", "Priya Sharma", "Acme")])
+        self.assertTrue(os.path.exists(self.path("knowledge_base.db")))
+
+
+class LogStorageTest(StorageTestCase):
+    def open(self, **kwargs):
+        storage = LogStorage(self.path("kb.jsonl"), **kwargs)
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_changes_replay_after_restart(self):
+        storage = LogStorage(self.path("kb.jsonl"))
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme"), entry("b", "Li Wei", "Fjord")])
+        storage.upsert_many([entry("new-id", "PRIYA SHARMA", "acme", role="Lead")])
+        storage.update_status("a", "Replied")
+        storage.delete("b")
+        expected = storage.load_all()
+        storage.close()
+        self.assertEqual(expected, [entry("a", "PRIYA SHARMA", "acme", status="Replied", role="Lead")])
+        self.assertEqual(self.open().load_all(), expected)
+
+    def test_seeded_from_json_on_first_start(self):
+        seed = self.write_json("knowledge_base.json", [entry("a", "Priya Sharma", "Acme")])
+        self.assertEqual(self.open(seed_path=seed).load_all(), [entry("a", "Priya Sharma", "Acme")])
+        self.assertTrue(os.path.exists(self.path("kb.snapshot.json")))
+
+    def test_torn_last_line_is_dropped_and_bad_lines_skipped(self):
+        storage = LogStorage(self.path("kb.jsonl"))
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        storage.close()
+        with open(self.path("kb.jsonl"), "a") as f:
+            f.write("not json\n[1, 2]\n")
+            f.write(json.dumps({"op": "put", "entry": entry("b", "Li Wei", "Fjord")}) + "\n")
+            f.write('{"op": "put", "entry": {"id": "c"')
+        storage = self.open()
+        self.assertEqual([p["id"] for p in storage.load_all()], ["a", "b"])
+        self.assertEqual((storage.log_stats()["bad_lines"], storage.log_stats()["torn_lines"]), (2, 1))
+        with open(self.path("kb.jsonl"), "rb") as f:
+            self.assertTrue(f.read().endswith(b"\n"))
+
+    def test_compaction_folds_the_log_into_the_snapshot(self):
+        storage = LogStorage(self.path("kb.jsonl"), compact_min_bytes=10 ** 9)
+        storage.upsert_many([entry(str(i), f"Person {i}", "Acme") for i in range(20)])
+        storage.delete("3")
+        storage.compact()
+        storage.update_status("4", "Replied")
+        stats = storage.log_stats()
+        expected = storage.load_all()
+        storage.close()
+        self.assertEqual(stats["compactions"], 1)
+        self.assertFalse(os.path.exists(self.path("kb.jsonl.old")))
+        with open(self.path("kb.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(self.open().load_all(), expected)
+
+    def test_interrupted_compaction_log_is_replayed(self):
+        storage = LogStorage(self.path("kb.jsonl"))
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        storage.close()
+        os.replace(self.path("kb.jsonl"), self.path("kb.jsonl.old"))  # Crashed before the new snapshot
+        self.assertEqual(self.open().load_all(), [entry("a", "Priya Sharma", "Acme")])
+
+    def test_save_all_replaces_everything(self):
+        storage = LogStorage(self.path("kb.jsonl"))
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        storage.save_all([entry("b", "Li Wei", "Fjord")])
+        storage.close()
+        self.assertEqual(self.open().load_all(), [entry("b", "Li Wei", "Fjord")])
+
+    def test_failed_fsync_is_raised_and_retried(self):
+        storage = self.open()
+        with mock.patch("logic.kb_storage.os.fsync", side_effect=OSError(5, "I/O error")):
+            with self.assertRaises(OSError):
+                storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        self.assertEqual((storage.log_stats()["fsyncs"], storage._synced), (0, 0))
+        storage.update_status("a", "Replied")
+        self.assertEqual(storage.log_stats()["fsyncs"], 1)
+
+    def test_log_rotated_under_a_writer_counts_as_synced(self):
+        storage = self.open()
+        storage.upsert_many([entry("a", "Priya Sharma", "Acme")])
+        seq = storage._appended + 1
+        storage._append(json.dumps({"op": "status", "id": "a", "status": "Replied"}) + "\n")
+        real_fsync = os.fsync
+        calls = []
+
+        def rotate_then_fsync(fd):
+            calls.append(fd)
+            if len(calls) == 1:
+                storage.compact()  # Swaps in a new log and closes the one being synced
+            return real_fsync(fd)
+
+        with mock.patch("logic.kb_storage.os.fsync", side_effect=rotate_then_fsync):
+            storage._sync(seq)
+        self.assertEqual(storage.log_stats()["compactions"], 1)
+        self.assertGreaterEqual(storage._synced, seq)
+
+
+if __name__ == "__main__":
+    unittest.main()
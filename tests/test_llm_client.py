@@ -0,0 +1,52 @@
+import threading
+import unittest
+from concurrent.futures import ALL_COMPLETED, wait
+from unittest import mock
+
+from logic.llm_client import KaggleClient
+
+
+def wait_for_all(futures, timeout=None, return_when=ALL_COMPLETED):
+    """wait() that hands back every attempt at once, as when they finish together."""
+    return wait(futures, timeout=timeout, return_when=ALL_COMPLETED)
+
+
+class HedgedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.client = KaggleClient("http://127.0.0.1:9", hedge=True, hedge_budget=1.0)
+        self.addCleanup(self.client.close)
+
+    def run_hedged(self, primary_text, hedge_text):
+        """Primary answers `primary_text` only after the hedge has answered `hedge_text`."""
+        hedge_done = threading.Event()
+        calls = []
+
+        def send(prompt, max_new_tokens, temperature, exclude=(), cancel=None):
+            calls.append(prompt)
+            if len(calls) == 1:
+                hedge_done.wait(5)
+                return primary_text
+            hedge_done.set()
+            return hedge_text
+
+        for _ in range(self.client.latencies.min_samples):
+            self.client.latencies.record((send.__name__, 10), 0.01)
+        with mock.patch("logic.llm_client.wait", side_effect=wait_for_all):
+            text = self.client._request_hedged(send, "prompt", 10, 0.7)
+        self.assertEqual(len(calls), 2)
+        return text
+
+    def test_good_hedge_beats_primary_error_finishing_together(self):
+        self.assertEqual(self.run_hedged("Error: boom", "answer"), "answer")
+        self.assertTrue(self.client.last_call_stats()["hedge_won"])
+
+    def test_good_primary_beats_hedge_error_finishing_together(self):
+        self.assertEqual(self.run_hedged("answer", "Error: boom"), "answer")
+        self.assertFalse(self.client.last_call_stats()["hedge_won"])
+
+    def test_error_returned_when_every_attempt_fails(self):
+        self.assertTrue(self.run_hedged("Error: boom", "Error: also boom").startswith("Error:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from benchmarks.bench_streaming import SAMPLE_PROFILE_TEXT
+from benchmarks.stub_server import StubLLMServer
+from logic.analysis_cache import AnalysisCache
+from logic.analyzer import ProspectAnalyzer
+from logic.generator import MessageGenerator
+from logic.knowledge_base import KnowledgeBase
+from logic.llm_client import KaggleClient
+from logic.pipeline import ProspectPipeline
+
+OFFERING = "An AI-driven hiring platform for engineering leaders"
+
+
+class FusedPipelineCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubLLMServer().start()
+        self.addCleanup(self.server.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.client = KaggleClient(self.server.url, streaming=True)
+        self.addCleanup(self.client.close)
+        self.cache = AnalysisCache("v1", path=os.path.join(tmp.name, "analysis.db"))
+        self.analyzer = ProspectAnalyzer(client=self.client, cache=self.cache)
+        self.kb = KnowledgeBase(os.path.join(tmp.name, "kb.json"), backend="json")
+
+    def pipeline(self, mode):
+        return ProspectPipeline(self.analyzer, MessageGenerator(client=self.client), self.kb, mode)
+
+    def test_fused_profile_is_cached_for_both_modes(self):
+        first = asyncio.run(self.pipeline("fused").arun(SAMPLE_PROFILE_TEXT, OFFERING))
+        self.assertEqual(first["mode"], "fused")
+        self.assertEqual(self.cache.stats()["writes"], 1)
+
+        # Same text again: the profile comes from the cache, only messages are generated
+        self.assertEqual(self.analyzer.cached_analysis(SAMPLE_PROFILE_TEXT), first["analysis"])
+        again = self.pipeline("two_step").run(SAMPLE_PROFILE_TEXT, OFFERING)
+        self.assertEqual(again["analysis"], first["analysis"])
+        self.assertEqual(self.cache.stats()["writes"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import copy
+import unittest
+
+from benchmarks.bench_schema import legacy_fields, legacy_replace_nulls, sample_profile
+from benchmarks.stub_server import CAMPAIGN_ANSWER, PROFILE_ANSWER
+from logic.schema import normalize_messages, normalize_profile
+
+
+class NormalizeProfileParityTest(unittest.TestCase):
+    def check_parity(self, profile):
+        legacy = legacy_replace_nulls(copy.deepcopy(profile))
+        result = normalize_profile(copy.deepcopy(profile))
+        self.assertEqual([result["name"], result["company"], result["role"]], legacy_fields(legacy))
+        for key, value in legacy.items():
+            if key not in ("name", "company", "role"):
+                self.assertEqual(result[key], value, key)
+        return result
+
+    def test_clean_profile_is_unchanged(self):
+        self.assertEqual(self.check_parity(PROFILE_ANSWER), PROFILE_ANSWER)
+
+    def test_nulls_and_scraping_junk(self):
+        result = self.check_parity(sample_profile())
+        self.assertEqual(result["company"], "Acme Robotics")
+        self.assertEqual(result["seniority"], "Unknown")
+        self.assertEqual(result["certifications"], [])
+        self.assertEqual(result["psychological_profile"]["goals"], ["Ship the new fleet platform", "Unknown"])
+
+    def test_example_profile_values_are_rejected(self):
+        profile = dict(PROFILE_ANSWER, name="Sarah Jones", company="CloudScale", role="VP Marketing")
+        result = self.check_parity(profile)
+        self.assertEqual((result["name"], result["company"], result["role"]), ("Unknown", "Unknown", "VP Marketing"))
+
+    def test_extra_keys_keep_values_with_nulls_replaced(self):
+        profile = dict(PROFILE_ANSWER, twitter=None, links=["a", None], meta={"source": None})
+        result = self.check_parity(profile)
+        self.assertEqual((result["twitter"], result["links"], result["meta"]), ("Unknown", ["a", "Unknown"],
+                                                                                 {"source": "Unknown"}))
+
+    def test_missing_fields_and_wrong_types_are_filled(self):
+        result = normalize_profile({"name": "Priya Sharma", "education": "B.Tech, IIT Bombay",
+                                    "psychological_profile": "Unknown", "seniority": 3})
+        self.assertEqual(result["education"], ["B.Tech, IIT Bombay"])
+        self.assertEqual(result["seniority"], "3")
+        self.assertEqual(result["company"], "Unknown")
+        self.assertEqual(result["psychological_profile"]["pain_points"], [])
+        self.assertEqual(result["key_insights"], [])
+
+
+class NormalizeMessagesTest(unittest.TestCase):
+    def test_campaign_nulls_match_baseline(self):
+        campaign = dict(CAMPAIGN_ANSWER, sms=None)
+        result = normalize_messages(copy.deepcopy(campaign))
+        self.assertEqual(result["sms"], "")
+        self.assertEqual(result["email"], campaign["email"])
+        self.assertEqual(result["analysis"], campaign["analysis"])
+
+    def test_plain_string_email_becomes_its_body(self):
+        result = normalize_messages({"email": "Hi Priya", "linkedin": None})
+        self.assertEqual(result["email"], {"subject": "", "body": "Hi Priya"})
+        self.assertEqual(result["linkedin"], "")
+        self.assertEqual(result["analysis"], {"personalization_score": "N/A", "reasoning": ""})
+
+
+if __name__ == "__main__":
+    unittest.main()
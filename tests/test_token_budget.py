@@ -0,0 +1,37 @@
+import unittest
+
+from logic.token_budget import DEFAULT_INPUT_TOKENS, TRUNCATED, estimate_tokens, pack_sections, split_sections
+
+HEADER = "=== PROFILE HEADER ===\nPriya Sharma\nSenior Backend Engineer @ Acme Robotics\n"
+JOB = "Senior Engineer at Company{i} · Full-time · Led the platform team building distributed systems\n"
+
+
+def long_profile():
+    return (HEADER
+            + "=== EXPERIENCE ===\n" + "".join(JOB.format(i=i) for i in range(150))
+            + "=== RESUME / CV DATA ===\n" + "Shipped the fleet scheduler in Go. " * 400 + "\n"
+            + "=== ADDITIONAL TEXT / NOTES ===\nMet at PyCon, interested in hiring tools.\n")
+
+
+class PackSectionsTest(unittest.TestCase):
+    def test_text_within_budget_is_unchanged(self):
+        text = HEADER + "=== ABOUT ===\nBuilding fleet software.\n"
+        self.assertEqual(pack_sections(text, 500), text)
+
+    def test_packed_text_fits_the_budget(self):
+        packed = pack_sections(long_profile(), 1000)
+        self.assertLessEqual(estimate_tokens(packed), 1000)
+        self.assertIn(TRUNCATED, packed)
+
+    def test_every_section_survives_and_keeps_its_order(self):
+        names = [s.name for s in split_sections(pack_sections(long_profile(), 1000))]
+        self.assertEqual(names, ["PROFILE HEADER", "EXPERIENCE", "RESUME / CV DATA", "ADDITIONAL TEXT / NOTES"])
+
+    def test_default_budget_sends_at_least_the_old_character_cut(self):
+        text = long_profile()
+        self.assertGreaterEqual(DEFAULT_INPUT_TOKENS, estimate_tokens(text[:8000]))
+        self.assertGreaterEqual(estimate_tokens(pack_sections(text)), 0.9 * estimate_tokens(text[:8000]))
+
+
+if __name__ == "__main__":
+    unittest.main()